@@ -0,0 +1 @@
+"""Замеры производительности редактора на синтетических конфигах."""
@@ -0,0 +1,112 @@
+"""Фаззинг разбора ссылок core.links.
+
+Ссылки из links_corpus.txt и синтетические ссылки всех схем случайно
+портятся (обрезка, вставка и замена символов, мусорные %-последовательности,
+повтор частей). Разбор любой строки должен либо вернуть ShareLink, из
+которого строятся outbound и ключ дедупликации, либо выбросить LinkError;
+любое другое исключение — ошибка, такие строки печатаются.
+
+    python -m bench.fuzz_links --iterations 200000 --seed 1
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+from core.links import LinkError, outbound_key, parse_link
+from core.serialize import dumps
+
+from .synth import make_share_links
+
+CORPUS = Path(__file__).with_name("links_corpus.txt")
+# Символы, значимые для разбора ссылок, и немного не-ASCII
+ALPHABET = "@:/?#&=%[]+-_.,;!~ 0123456789aZ\t\n\x00ёЯ²٣​\U0001f600"
+
+
+def load_corpus(path=CORPUS):
+    lines = path.read_text(encoding="utf-8").splitlines()
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def mutate(link, rng):
+    """Одна-три случайные порчи строки"""
+    for _ in range(rng.randint(1, 3)):
+        n = len(link)
+        position = rng.randrange(n + 1)
+        kind = rng.randrange(7)
+        if kind == 0:
+            link = link[:position]
+        elif kind == 1 and n:
+            link = link[:position] + link[position + 1:]
+        elif kind == 2:
+            link = link[:position] + rng.choice(ALPHABET) + link[position:]
+        elif kind == 3 and n:
+            link = link[:position] + rng.choice(ALPHABET) + link[position + 1:]
+        elif kind == 4:
+            link = link[:position] + rng.choice(("%", "%z", "%zz", "%C3", "%00", "%%")) + link[position:]
+        elif kind == 5 and n:
+            start = rng.randrange(n)
+            link = link[:position] + link[start:start + rng.randint(1, 40)] + link[position:]
+        else:
+            scheme, sep, rest = link.partition("://")
+            link = rng.choice((scheme.upper(), scheme[:-1], scheme + "s", "")) + sep + rest
+    return link
+
+
+def check(link):
+    """(распознана ли ссылка, текст ошибки или None)"""
+    try:
+        parsed = parse_link(link)
+    except LinkError:
+        return False, None
+    except Exception as e:
+        return False, f"parse_link: {type(e).__name__}: {e}"
+    try:
+        outbound = parsed.to_outbound("fuzz")
+        dumps(outbound)
+        config = {"outbounds": [{"tag": "x", "protocol": parsed.protocol}]}
+        parsed.apply_to(config)
+        if outbound_key(outbound) != parsed.server_key():
+            return True, "outbound_key не совпадает с server_key"
+    except Exception as e:
+        return True, f"outbound: {type(e).__name__}: {e}"
+    return True, None
+
+
+def fuzz(iterations, seed=0, seeds=None):
+    """(проверено, распознано, [(ссылка, ошибка)], секунд)"""
+    rng = random.Random(seed)
+    seeds = seeds if seeds is not None else load_corpus() + make_share_links(50, seed)
+    failures = []
+    parsed = 0
+    started = time.perf_counter()
+    for link in seeds:
+        _ok, error = check(link)
+        if error:
+            failures.append((link, error))
+    for _ in range(iterations):
+        link = mutate(rng.choice(seeds), rng)
+        ok, error = check(link)
+        parsed += ok
+        if error:
+            failures.append((link, error))
+    return len(seeds) + iterations, parsed, failures, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Фаззинг разбора ссылок")
+    parser.add_argument("--iterations", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    total, parsed, failures, elapsed = fuzz(args.iterations, args.seed)
+    for link, error in failures[:50]:
+        print(f"{error}\n    {link!r}")
+    print(f"Строк: {total}, распознано после порчи: {parsed}, ошибок: {len(failures)}, "
+          f"{total / elapsed:.0f} строк/с", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
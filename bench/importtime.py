@@ -0,0 +1,129 @@
+"""Бюджет времени импорта (python -X importtime).
+
+Каждый модуль импортируется в отдельном чистом процессе несколько раз,
+берётся минимум: сумма cumulative по модулям, которых нет в пустом запуске
+интерпретатора. Ядро не должно тянуть PyQt6, gui и отложенные модули
+(DEFERRED), точка входа main — ничего, кроме себя, до вызова main(), а окно
+(gui.editor) — необязательные функции, которые догружаются после показа.
+Без PyQt6 проверка gui пропускается.
+Код 1, если бюджет превышен или запрет нарушен.
+
+    python -m bench.importtime
+    python -m bench.importtime --repeat 9 --top 8 core.links core.share
+"""
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Модуль -> бюджет, мс, или None (только запреты). Бюджеты с запасом ~1.5x от
+# замера на одном ядре; на другой машине их можно масштабировать --scale
+BUDGETS = {
+    "main": 5,
+    "core.serialize": 35,
+    "core.config": 45,
+    "core.links": 60,
+    "core.index": 55,
+    "core.subscription": 60,
+    "core.batch": 60,
+    "core.merkle": 55,
+    "core.share": 70,
+    "gui.editor": None,
+}
+# Импорты, которые ядро откладывает до первого использования (CLI, сжатие, пулы, QR)
+DEFERRED = ("argparse", "gzip", "zstandard", "tempfile", "zipfile", "concurrent", "multiprocessing", "qrcode")
+# Модуль или пакет -> пакеты, которые он не должен импортировать
+FORBIDDEN = {
+    "core": ("PyQt6", "gui") + DEFERRED,
+    # Проверка задержки целиком на asyncio, а он тянет concurrent.futures
+    "core.probe": ("PyQt6", "gui", "argparse", "qrcode"),
+    "main": ("PyQt6", "gui", "core", "orjson", "json"),
+    "gui.editor": ("asyncio", "ssl", "qrcode", "concurrent", "core.probe", "core.share",
+                   "gui.probe_task", "gui.share_task", "gui.diff_dialog", "gui.routing_dialog"),
+}
+
+
+def parse_importtime(stderr):
+    """[(имя, собственное мкс, cumulative мкс, уровень вложенности)]"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        head, cumulative_us, name = line.split("|", 2)
+        self_us = int(head.split(":")[1])
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), self_us, int(cumulative_us), level))
+    return entries
+
+
+def run_import(module):
+    code = f"import {module}" if module else "pass"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return parse_importtime(result.stderr)
+
+
+def measure(module, repeat, baseline):
+    """(мс, [записи лучшего запуска]) — без модулей, загружаемых при старте интерпретатора"""
+    best = None
+    for _ in range(repeat):
+        entries = [entry for entry in run_import(module) if entry[0] not in baseline]
+        total = sum(cumulative for _name, _self, cumulative, level in entries if level == 0) / 1000
+        if best is None or total < best[0]:
+            best = (total, entries)
+    return best
+
+
+def forbidden_imports(module, entries):
+    prefixes = FORBIDDEN.get(module) or next(
+        (banned for owner, banned in FORBIDDEN.items() if module.startswith(owner + ".")), ())
+    return sorted({name for name, *_ in entries
+                   if name != module and any(name == p or name.startswith(p + ".") for p in prefixes)})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бюджет времени импорта модулей")
+    parser.add_argument("modules", nargs="*", help="модули (по умолчанию — все из BUDGETS)")
+    parser.add_argument("--repeat", type=int, default=5, help="запусков на модуль, берётся лучший")
+    parser.add_argument("--top", type=int, default=5, help="сколько самых дорогих импортов показать")
+    parser.add_argument("--scale", type=float, default=1.0, help="множитель бюджетов для медленной машины")
+    args = parser.parse_args(argv)
+
+    # Прогрев .pyc и кэша ФС, затем модули пустого запуска
+    modules = []
+    for module in args.modules or BUDGETS:
+        try:
+            run_import(module)
+        except RuntimeError as e:
+            if "PyQt6" not in str(e):
+                raise
+            print(f"{module:<20} пропущен: {e}")
+            continue
+        modules.append(module)
+    baseline = {name for name, *_ in run_import(None)}
+
+    failed = False
+    for module in modules:
+        total, entries = measure(module, args.repeat, baseline)
+        budget = BUDGETS.get(module)
+        banned = forbidden_imports(module, entries)
+        over = budget is not None and total > budget * args.scale
+        status = "ПРЕВЫШЕН" if over else "ok"
+        budget_text = f"{budget * args.scale:.0f}" if budget is not None else "-"
+        print(f"{module:<20} {total:7.1f} мс  бюджет {budget_text:>4}  {status}")
+        if banned:
+            print(f"    запрещённые импорты: {', '.join(banned)}")
+        if over or banned or args.modules:
+            heaviest = sorted(entries, key=lambda entry: entry[1], reverse=True)[:args.top]
+            for name, self_us, _cumulative, _level in heaviest:
+                print(f"    {self_us / 1000:6.1f} мс  {name}")
+        failed = failed or over or bool(banned)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+"""Замеры на синтетических конфигах 10, 1k, 10k и 100k outbounds и правил.
+
+Для каждого размера измеряются: чтение config.json, индекс, проверка схем,
+разбор VLESS-ссылок и ссылок всех схем, правки update_nested_value с
+сохранением, экспорт во все доступные форматы, компиляция и проверка
+маршрутов и построение формы (Qt offscreen; пропускается без PyQt6). Время — лучшее из --repeat
+запусков, память — пик tracemalloc в отдельном запуске.
+
+    python -m bench.run --out results.json
+    python -m bench.run --baseline results.json --threshold 0.2
+
+С --baseline замеры, ставшие медленнее (или прожорливее) больше чем на
+threshold, выводятся как регрессии, код выхода 1.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from core.config import load_config, update_nested_value, write_config
+from core.index import ConfigIndex
+from core.links import parse_link
+from core.routing import compile_config, route_batch
+from core.serialize import BACKEND, FORMATS, available_formats, export
+from core.validation import ConfigValidator
+
+from .synth import make_config, make_links, make_queries, make_share_links
+
+SIZES = (10, 1000, 10000, 100000)
+# Форма строит группы только показанных outbound, поэтому замеряется на всех размерах
+GUI_MAX = max(SIZES)
+# Доля замедления, считающаяся регрессией
+THRESHOLD = 0.2
+# Более короткие замеры слишком шумные для сравнения
+MIN_SECONDS = 0.002
+MIN_PEAK_MB = 1.0
+EDITS = 100
+
+
+# ----------------- Замер -----------------
+def measure(func, repeat=3, setup=None, memory=True):
+    """{"seconds": лучшее время, "peak_mb": пик памяти} для func(setup())"""
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        gc.collect()
+        started = time.perf_counter()
+        func(arg)
+        times.append(time.perf_counter() - started)
+    result = {"seconds": min(times)}
+    if memory:
+        arg = setup() if setup else None
+        gc.collect()
+        tracemalloc.start()
+        try:
+            func(arg)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        result["peak_mb"] = peak / (1 << 20)
+    return result
+
+
+def core_benchmarks(size, data, workdir):
+    """(имя, func, setup) замеров без GUI для конфига data"""
+    path = workdir / f"config_{size}.json"
+    write_config(path, data)
+    saved = workdir / f"saved_{size}.json"
+    links = make_links(size)
+    share_links = make_share_links(size)
+    queries = make_queries(data, max(1000, min(size * 10, 200000)))
+    outbounds = len(data["outbounds"])
+    counter = [0]
+
+    def edit_save(_):
+        # Каждый запуск пишет новые значения, чтобы запись не пропускалась
+        counter[0] += 1
+        for n in range(EDITS):
+            update_nested_value(data, ["outbounds", n % outbounds, "tag"], f"edit-{counter[0]}-{n}")
+        write_config(saved, data)
+
+    benchmarks = [
+        ("load", lambda _: load_config(path), None),
+        ("index", lambda _: ConfigIndex(data), None),
+        ("validate", lambda _: ConfigValidator().validate(data), None),
+        ("vless_links", lambda _: [parse_link(link) for link in links], None),
+        # Все схемы вперемешку, вплоть до готовых outbound, как при импорте подписки
+        ("share_links", lambda _: [parse_link(link).to_outbound() for link in share_links], None),
+        ("edit_save", edit_save, None),
+        ("routing_compile", lambda _: compile_config(data), None),
+        # Новый matcher на каждый запуск: кэш результатов не переносится
+        ("routing_batch", lambda matcher: route_batch(matcher, queries), lambda: compile_config(data)),
+    ]
+    for fmt in available_formats():
+        target = workdir / f"export_{size}{FORMATS[fmt][2]}"
+        benchmarks.append((f"export_{fmt}", lambda _, fmt=fmt, target=target: export(target, data, fmt), None))
+    return benchmarks
+
+
+def gui_benchmark(data, repeat):
+    """Построение формы в offscreen Qt; None, если PyQt6 недоступен"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from PyQt6.QtWidgets import QApplication, QWidget
+    except ImportError:
+        return None
+    from gui.editor import FullXrayEditor
+
+    app = QApplication.instance() or QApplication([])
+    widgets = []
+
+    def build(editor):
+        editor.config_data = data
+        editor.load_config_from_data()
+        while not editor.form_complete:
+            app.processEvents()
+        widgets.append(len(editor.findChildren(QWidget)))
+        return editor
+
+    def rebuild(editor):
+        # Повторная загрузка: строки формы берутся из пула
+        build(editor)
+        editor.deleteLater()
+        app.processEvents()
+
+    result = measure(lambda editor: build(editor).deleteLater(), repeat, setup=FullXrayEditor, memory=False)
+    result["widgets"] = widgets[-1]
+    result["rebuild_seconds"] = measure(rebuild, repeat, setup=lambda: build(FullXrayEditor()),
+                                        memory=False)["seconds"]
+    return result
+
+
+def run(sizes=SIZES, repeat=3, only=None, gui_max=GUI_MAX, progress=None):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        for size in sizes:
+            data = make_config(size)
+            current = results[str(size)] = {}
+            for name, func, setup in core_benchmarks(size, data, workdir):
+                if only and name not in only:
+                    continue
+                current[name] = measure(func, repeat, setup)
+                if progress:
+                    progress(size, name, current[name])
+            if (not only or "gui_build" in only) and size <= gui_max:
+                result = gui_benchmark(data, repeat)
+                current["gui_build"] = result if result is not None else {"skipped": "PyQt6 не установлен"}
+                if progress:
+                    progress(size, "gui_build", current["gui_build"])
+    return {"meta": metadata(repeat), "results": results}
+
+
+def metadata(repeat):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "json_backend": BACKEND,
+        "repeat": repeat,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+# ----------------- Сравнение -----------------
+def compare(baseline, current, threshold=THRESHOLD):
+    """Регрессии: [(размер, замер, метрика, было, стало)]"""
+    regressions = []
+    for size, benchmarks in current["results"].items():
+        for name, result in benchmarks.items():
+            base = baseline.get("results", {}).get(size, {}).get(name)
+            if not base:
+                continue
+            for metric, floor in (("seconds", MIN_SECONDS), ("rebuild_seconds", MIN_SECONDS),
+                                  ("peak_mb", MIN_PEAK_MB)):
+                old, new = base.get(metric), result.get(metric)
+                if old is None or new is None or max(old, new) < floor:
+                    continue
+                if new > old * (1 + threshold):
+                    regressions.append((size, name, metric, old, new))
+    return regressions
+
+
+def format_result(size, name, result):
+    if "skipped" in result:
+        return f"{size:>8}  {name:<18} пропущен: {result['skipped']}"
+    line = f"{size:>8}  {name:<18} {result['seconds'] * 1000:>10.1f} мс"
+    if "peak_mb" in result:
+        line += f"  {result['peak_mb']:>8.1f} МБ"
+    if "widgets" in result:
+        line += f"  виджетов: {result['widgets']}, повторно {result['rebuild_seconds'] * 1000:.1f} мс"
+    return line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры редактора на синтетических конфигах")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)),
+                        help="число outbounds и правил через запятую")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", help="только эти замеры, через запятую (load, export_pretty, gui_build, ...)")
+    parser.add_argument("--gui-max", type=int, default=GUI_MAX, help="не строить форму для конфигов больше")
+    parser.add_argument("--out", help="сохранить результаты в JSON")
+    parser.add_argument("--baseline", help="JSON прошлого запуска для сравнения")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="допустимое замедление (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    only = set(args.only.split(",")) if args.only else None
+    report = run(sizes, args.repeat, only, args.gui_max,
+                 progress=lambda size, name, result: print(format_result(size, name, result), flush=True))
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold)
+        for size, name, metric, old, new in regressions:
+            print(f"Регрессия: {size} {name} {metric}: {old:.4g} -> {new:.4g} (+{(new / old - 1) * 100:.0f}%)",
+                  file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"Регрессий нет (порог {args.threshold * 100:.0f}%, база {baseline.get('meta', {}).get('commit')})",
+              file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""Синтетические конфиги Xray заданного размера для замеров.
+
+Генерация детерминирована (seed), поэтому результаты разных коммитов
+сравнимы между собой.
+
+    python -m bench.synth 10000 > config_10k.json
+"""
+import base64
+import json
+import random
+import sys
+import uuid
+
+from core.serialize import dumps
+
+TLDS = ("com", "net", "org", "ru", "io", "dev")
+WORDS = ("alpha", "beta", "cloud", "cdn", "edge", "media", "video", "api", "static", "mail", "shop", "news")
+
+
+def _uuid(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _domain(rng):
+    return f"{rng.choice(WORDS)}{rng.randrange(100000)}.{rng.choice(TLDS)}"
+
+
+def _public_key(rng):
+    # X25519-ключ REALITY: 32 байта в base64url без "="
+    return base64.urlsafe_b64encode(rng.getrandbits(256).to_bytes(32, "big")).decode().rstrip("=")
+
+
+def make_outbound(i, rng):
+    """VLESS + REALITY outbound, как после импорта подписки"""
+    return {
+        "tag": f"proxy-{i}",
+        "protocol": "vless",
+        "settings": {
+            "vnext": [{
+                "address": f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}",
+                "port": 443,
+                "users": [{"id": _uuid(rng), "encryption": "none", "flow": "xtls-rprx-vision"}],
+            }]
+        },
+        "streamSettings": {
+            "network": "tcp",
+            "security": "reality",
+            "realitySettings": {
+                "publicKey": _public_key(rng),
+                "shortId": f"{rng.getrandbits(32):08x}",
+                "serverName": _domain(rng),
+                "fingerprint": "chrome",
+                "spx": "/",
+            },
+        },
+    }
+
+
+def make_rule(i, rng, tags):
+    """Правило маршрутизации: домены разных видов или CIDR"""
+    rule = {"type": "field", "outboundTag": rng.choice(tags)}
+    if i % 4 == 3:
+        rule["ip"] = [f"{rng.randrange(1, 224)}.{rng.randrange(256)}.{rng.randrange(256)}.0/24"
+                      for _ in range(3)]
+    else:
+        rule["domain"] = [
+            f"domain:{_domain(rng)}",
+            f"full:www.{_domain(rng)}",
+            f"keyword:{rng.choice(WORDS)}{rng.randrange(100000)}",
+            _domain(rng),
+        ]
+        if i % 50 == 0:
+            rule["domain"].append(rf"regexp:^{rng.choice(WORDS)}\d+\.{rng.choice(TLDS)}$")
+    if i % 10 == 0:
+        rule["network"] = "tcp"
+    return rule
+
+
+def make_config(outbounds, rules=None, seed=0):
+    """Конфиг с outbounds VLESS-серверами и rules правилами (по умолчанию столько же)"""
+    rng = random.Random(seed)
+    rules = outbounds if rules is None else rules
+    servers = [make_outbound(i, rng) for i in range(outbounds)]
+    tags = [server["tag"] for server in servers[:100]] + ["direct", "block"]
+    return {
+        "log": {"loglevel": "warning"},
+        "inbounds": [
+            {"tag": "socks", "port": 1080, "listen": "127.0.0.1", "protocol": "socks",
+             "settings": {"auth": "noauth", "udp": True}},
+            {"tag": "http", "port": 1087, "listen": "127.0.0.1", "protocol": "http", "settings": {}},
+        ],
+        "dns": {"servers": ["1.1.1.1", "8.8.8.8", "https://dns.google/dns-query"]},
+        "routing": {
+            "domainStrategy": "AsIs",
+            "rules": [make_rule(i, rng, tags) for i in range(rules)],
+        },
+        "outbounds": servers + [
+            {"tag": "direct", "protocol": "freedom"},
+            {"tag": "block", "protocol": "blackhole"},
+        ],
+    }
+
+
+def make_links(count, seed=0):
+    """VLESS-ссылки REALITY, как в подписках"""
+    rng = random.Random(seed)
+    links = []
+    for i in range(count):
+        links.append(
+            f"vless://{_uuid(rng)}@{_domain(rng)}:443?type=tcp&security=reality"
+            f"&pbk={_public_key(rng)}&fp=chrome&sni={_domain(rng)}&sid={rng.getrandbits(32):08x}"
+            f"&spx=%2F&flow=xtls-rprx-vision&encryption=none#server%20{i}"
+        )
+    return links
+
+
+def make_share_links(count, seed=0):
+    """Ссылки всех схем core.links вперемешку, как в смешанных подписках"""
+    rng = random.Random(seed)
+    links = []
+    for i in range(count):
+        kind = i % 5
+        host = _domain(rng)
+        if kind == 0:
+            links.append(
+                f"vless://{_uuid(rng)}@{host}:443?type=tcp&security=reality&pbk={_public_key(rng)}"
+                f"&fp=chrome&sni={_domain(rng)}&sid={rng.getrandbits(32):08x}&flow=xtls-rprx-vision#vless%20{i}"
+            )
+        elif kind == 1:
+            body = json.dumps({"v": "2", "ps": f"vmess {i}", "add": host, "port": "443", "id": _uuid(rng),
+                               "aid": "0", "scy": "auto", "net": "ws", "type": "none", "host": host,
+                               "path": "/ws", "tls": "tls", "sni": host})
+            links.append("vmess://" + base64.b64encode(body.encode()).decode())
+        elif kind == 2:
+            links.append(f"trojan://{rng.getrandbits(64):016x}@{host}:443?security=tls&sni={host}"
+                         f"&type=grpc&serviceName=grpc{i}#trojan%20{i}")
+        elif kind == 3:
+            userinfo = base64.urlsafe_b64encode(f"aes-256-gcm:{rng.getrandbits(64):016x}".encode())
+            links.append(f"ss://{userinfo.decode().rstrip('=')}@{host}:8388#ss%20{i}")
+        else:
+            links.append(f"hy2://{rng.getrandbits(64):016x}@{host}:443/?sni={host}&insecure=0#hy2%20{i}")
+    return links
+
+
+def make_queries(config, count, seed=0):
+    """Домены и IP для проверки маршрута: часть попадает под правила"""
+    rng = random.Random(seed)
+    known = []
+    for rule in config.get("routing", {}).get("rules", []):
+        for entry in rule.get("domain", []):
+            kind, sep, value = entry.partition(":")
+            if kind in ("domain", "full"):
+                known.append(value)
+            elif not sep:
+                known.append(entry)
+        for entry in rule.get("ip", []):
+            known.append(entry.replace("0/24", str(rng.randrange(1, 255))))
+    queries = []
+    for _ in range(count):
+        if known and rng.random() < 0.5:
+            queries.append(rng.choice(known))
+        else:
+            queries.append(_domain(rng))
+    return queries
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1 or not argv[0].isdigit():
+        print("Использование: python -m bench.synth ЧИСЛО_OUTBOUNDS > config.json", file=sys.stderr)
+        return 2
+    sys.stdout.buffer.write(dumps(make_config(int(argv[0]))) + b"\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Ядро редактора Xray: работа с config.json без зависимости от PyQt6."""
@@ -0,0 +1,121 @@
+"""Пакетное применение ссылок (vless://, vmess://, trojan://, ss://, hy2://)
+и правок полей к множеству config.json.
+
+Манифест — JSON Lines, по одной задаче на строку:
+
+    {"file": "clients/a.json", "link": "vless://...", "outbound": "proxy",
+     "set": {"inbounds.0.port": 1081, "log.loglevel": "info"}}
+
+Запуск:
+
+    python -m core.batch manifest.jsonl [--workers N] [--dry-run] [--fsync none|file|dir]
+
+Результаты по каждому файлу печатаются в stdout строками JSON по мере
+готовности, итог — в stderr.
+"""
+import json
+import os
+import sys
+import time
+
+from .config import load_config, parse_key_path, update_nested_value, write_config
+from .links import apply_link
+from .storage import FSYNC_POLICIES
+
+
+# ----------------- Одна задача -----------------
+def process_entry(entry, dry_run=False, fsync="dir"):
+    """Обрабатывает одну запись манифеста; исключения не выбрасывает"""
+    started = time.perf_counter()
+    result = {"file": entry.get("file"), "ok": False, "updated": 0}
+    try:
+        path = entry["file"]
+        config = load_config(path)
+        updated = 0
+
+        link = entry.get("link")
+        if link:
+            updated += len(apply_link(config, link, entry.get("outbound")))
+
+        for key, value in (entry.get("set") or {}).items():
+            key_path = parse_key_path(key) if isinstance(key, str) else list(key)
+            update_nested_value(config, key_path, value)
+            updated += 1
+
+        if not dry_run:
+            write_config(path, config, fsync)
+        result["ok"] = True
+        result["updated"] = updated
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    return result
+
+
+def _process_line(args):
+    line_no, line, dry_run, fsync = args
+    try:
+        entry = json.loads(line)
+    except ValueError as e:
+        return _line_error(line_no, e)
+    if not isinstance(entry, dict):
+        return _line_error(line_no, f"ожидается объект JSON, а не {type(entry).__name__}")
+    return process_entry(entry, dry_run, fsync)
+
+
+def _line_error(line_no, error):
+    return {"file": None, "ok": False, "updated": 0, "line": line_no,
+            "error": f"Неверная строка манифеста: {error}", "elapsed_ms": 0.0}
+
+
+# ----------------- Манифест -----------------
+def read_manifest(stream, dry_run=False, fsync="dir"):
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield line_no, line, dry_run, fsync
+
+
+def run(manifest, workers=None, dry_run=False, out=sys.stdout, fsync="dir"):
+    """Обрабатывает манифест в пуле процессов, печатая результаты потоком"""
+    from concurrent.futures import ProcessPoolExecutor
+
+    started = time.perf_counter()
+    total = failed = 0
+    tasks = read_manifest(manifest, dry_run, fsync)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for result in pool.map(_process_line, tasks, chunksize=16):
+            total += 1
+            failed += not result["ok"]
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+
+    elapsed = time.perf_counter() - started
+    return {"total": total, "failed": failed, "elapsed_s": round(elapsed, 3)}
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Пакетное редактирование config.json Xray")
+    parser.add_argument("manifest", help="файл манифеста JSON Lines или '-' для stdin")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="число процессов")
+    parser.add_argument("--dry-run", action="store_true", help="не записывать файлы")
+    parser.add_argument("--fsync", choices=FSYNC_POLICIES, default="dir",
+                        help="сброс на диск: none — без fsync, file — файл, dir — файл и каталог")
+    args = parser.parse_args(argv)
+
+    if args.manifest == "-":
+        summary = run(sys.stdin, args.workers, args.dry_run, fsync=args.fsync)
+    else:
+        with open(args.manifest, "r", encoding="utf-8") as manifest:
+            summary = run(manifest, args.workers, args.dry_run, fsync=args.fsync)
+
+    print(f"Готово: {summary['total']} файлов, ошибок {summary['failed']}, "
+          f"{summary['elapsed_s']} с", file=sys.stderr)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
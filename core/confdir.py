@@ -0,0 +1,303 @@
+"""Папка -confdir: конфиг Xray, разделённый на фрагменты.
+
+Фрагменты (00_log.json, 01_inbounds.json, 02_outbounds.json, ...) читаются
+в порядке имён и объединяются по правилам Xray:
+
+- inbounds дописываются в конец, outbounds — в начало (первый outbound
+  используется по умолчанию), а из файла с «tail» в имени — в конец;
+  элемент с уже встречавшимся tag заменяет прежний на его месте;
+- остальные секции верхнего уровня: более поздний файл заменяет секцию.
+
+Фрагмент читается только когда нужна секция, упомянутая в его имени;
+фрагменты без подсказки в имени читаются сразу. Элементы объединённого
+конфига — те же объекты, что и во фрагментах, поэтому правки по месту
+сразу попадают в свой фрагмент, а при сохранении перезаписываются только
+затронутые файлы.
+
+    python -m core.confdir /etc/xray/confdir > merged.json
+"""
+import os
+import re
+import sys
+from pathlib import Path
+
+from .config import load_config, write_config
+from .serialize import dumps
+
+SECTIONS = (
+    "log", "api", "dns", "routing", "policy", "inbounds", "outbounds", "transport",
+    "stats", "reverse", "fakedns", "metrics", "observatory", "burstObservatory",
+)
+ARRAY_SECTIONS = ("inbounds", "outbounds")
+
+
+class ConfDirError(ValueError):
+    """Фрагмент не является объектом JSON или секция имеет неверный тип"""
+
+
+def list_fragments(directory):
+    """Файлы *.json папки в порядке применения (по имени)"""
+    return sorted(
+        (Path(entry.path) for entry in os.scandir(directory)
+         if entry.name.endswith(".json") and not entry.name.startswith(".") and entry.is_file()),
+        key=lambda path: path.name,
+    )
+
+
+def fragment_hints(name):
+    """Секции, названные в имени файла целым словом: 02_outbounds.json -> {"outbounds"}
+    (а blog.json секцию log не упоминает)"""
+    words = set(re.split(r"[^0-9a-z]+", Path(name).stem.lower()))
+    return frozenset(section for section in SECTIONS if section.lower() in words)
+
+
+class Fragment:
+    __slots__ = ("path", "hints", "data")
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.hints = fragment_hints(self.path.name)
+        self.data = None
+
+    @property
+    def loaded(self):
+        return self.data is not None
+
+    @property
+    def tail(self):
+        return "tail" in self.path.name.lower()
+
+    def load(self):
+        data = load_config(self.path)
+        if not isinstance(data, dict):
+            raise ConfDirError(f"{self.path.name}: ожидается объект JSON")
+        self.data = data
+        return data
+
+
+class ConfDir:
+    """Объединённый вид на папку фрагментов с ленивой загрузкой и записью по фрагментам"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.fragments = [Fragment(path) for path in list_fragments(self.directory)]
+        # Секция-объект -> фрагмент, из которого она взята
+        self.section_owner = {}
+        # id(элемента inbounds/outbounds) -> (фрагмент, элемент)
+        self.item_owner = {}
+        # id элементов, заменённых элементом с тем же tag из более позднего файла
+        self.shadowed = set()
+        self.merged = set()
+
+        for fragment in self.fragments:
+            if not fragment.hints:
+                fragment.load()
+
+    # ----------------- Загрузка -----------------
+    def load_sections(self, sections=None, is_cancelled=None):
+        """Читает нужные фрагменты и объединяет секции.
+
+        Возвращает {секция: значение} для новых секций и для уже объединённых,
+        которые пришлось пересобрать (поздно прочитанный фрагмент содержал их
+        вопреки имени). Конфиг не изменяется.
+        """
+        requested = set(sections) if sections is not None else None
+        changed = set()
+        for fragment in self.fragments:
+            if fragment.loaded:
+                continue
+            if requested is not None and not (fragment.hints & requested):
+                continue
+            if is_cancelled and is_cancelled():
+                return {}
+            fragment.load()
+            # Секции, уже собранные без этого фрагмента, надо собрать заново
+            changed.update(section for section in fragment.data if section in self.merged)
+
+        if requested is None:
+            requested = {section for f in self.fragments for section in f.data}
+        result = {}
+        for section in (requested - self.merged) | changed:
+            value = self.merge_section(section)
+            if value is not None:
+                result[section] = value
+        return result
+
+    def compose(self, sections=None, is_cancelled=None):
+        """Новый словарь конфига с секциями sections (None — все)"""
+        values = self.load_sections(sections, is_cancelled)
+        order = {section: n for n, section in enumerate(SECTIONS)}
+        return {section: values[section]
+                for section in sorted(values, key=lambda s: (order.get(s, len(order)), s))}
+
+    def merge_section(self, section):
+        """Объединяет секцию из прочитанных фрагментов (None, если её нет нигде)"""
+        self.merged.add(section)
+        present = [f for f in self.fragments if f.loaded and section in f.data]
+        if not present:
+            return None
+        if section not in ARRAY_SECTIONS:
+            owner = present[-1]
+            self.section_owner[section] = owner
+            return owner.data[section]
+
+        merged = []
+        positions = {}
+        for fragment in present:
+            items = fragment.data[section]
+            if not isinstance(items, list):
+                raise ConfDirError(f"{fragment.path.name}: {section} должен быть списком")
+            block = []
+            for item in items:
+                self.item_owner[id(item)] = (fragment, item)
+                tag = item.get("tag") if isinstance(item, dict) else None
+                if tag and tag in positions:
+                    # Тот же tag: заменяет прежний элемент на его месте
+                    self.shadowed.add(id(merged[positions[tag]]))
+                    merged[positions[tag]] = item
+                else:
+                    block.append(item)
+            if section == "outbounds" and not fragment.tail:
+                merged = block + merged
+            else:
+                merged.extend(block)
+            positions = {item.get("tag"): n for n, item in enumerate(merged)
+                         if isinstance(item, dict) and item.get("tag")}
+        return merged
+
+    # ----------------- Происхождение -----------------
+    def default_owner(self, section):
+        """Фрагмент для новых данных секции: упомянувший её в имени, иначе последний"""
+        for fragment in reversed(self.fragments):
+            if section in fragment.hints or (fragment.loaded and section in fragment.data):
+                return fragment
+        return self.fragments[-1] if self.fragments else None
+
+    def origin(self, config, key_path):
+        """Файл фрагмента, из которого взят key_path (None — новое значение)"""
+        if not key_path:
+            return None
+        section = key_path[0]
+        if section in ARRAY_SECTIONS and len(key_path) > 1:
+            try:
+                item = config[section][key_path[1]]
+            except (KeyError, IndexError, TypeError):
+                return None
+            owner = self.item_owner.get(id(item))
+            return owner[0].path if owner is not None and owner[1] is item else None
+        owner = self.section_owner.get(section)
+        return owner.path if owner is not None else None
+
+    # ----------------- Запись -----------------
+    def _sync_array(self, config, section):
+        """Раскладывает элементы секции по фрагментам; возвращает изменённые фрагменты"""
+        items = config.get(section)
+        items = items if isinstance(items, list) else []
+        owners = []
+        for item in items:
+            owner = self.item_owner.get(id(item))
+            owners.append(owner[0] if owner is not None and owner[1] is item else None)
+
+        # Новый элемент попадает во фрагмент соседа (предыдущего, иначе следующего)
+        default = self.default_owner(section)
+        following = None
+        for n in range(len(owners) - 1, -1, -1):
+            if owners[n] is None:
+                owners[n] = following
+            else:
+                following = owners[n]
+        previous = None
+        for n, item in enumerate(items):
+            owner = self.item_owner.get(id(item))
+            known = owner is not None and owner[1] is item
+            if not known:
+                owners[n] = previous or owners[n] or default
+                self.item_owner[id(item)] = (owners[n], item)
+            previous = owners[n]
+
+        per_fragment = {}
+        for item, fragment in zip(items, owners):
+            per_fragment.setdefault(fragment, []).append(item)
+
+        changed = []
+        for fragment in self.fragments:
+            if not fragment.loaded:
+                continue
+            old = fragment.data.get(section)
+            if old is None and fragment not in per_fragment:
+                continue
+            new = self._fragment_items(old or [], per_fragment.get(fragment, []))
+            if old is None or len(old) != len(new) or any(a is not b for a, b in zip(old, new)):
+                fragment.data[section] = new
+                changed.append(fragment)
+        return changed
+
+    def _fragment_items(self, old, owned):
+        """Новый список фрагмента: его элементы в объединённом порядке, а заменённые
+        по tag элементы остаются на прежних местах"""
+        new = []
+        position = 0
+        owned_ids = {id(item) for item in owned}
+        for item in old:
+            if id(item) in self.shadowed:
+                new.append(item)
+            elif id(item) in owned_ids:
+                # Новые элементы, стоящие перед этим, идут перед ним
+                while position < len(owned):
+                    new.append(owned[position])
+                    position += 1
+                    if new[-1] is item:
+                        break
+        new.extend(owned[position:])
+        return new
+
+    def save(self, config, dirty_paths, write=write_config):
+        """Записывает фрагменты, затронутые правками; возвращает пути записанных файлов.
+
+        write(path, data) — True, если файл записан (или поставлен в очередь записи).
+        """
+        touched = []
+        synced = set()
+        for key_path in dirty_paths:
+            section = key_path[0]
+            if section in ARRAY_SECTIONS:
+                if section not in synced:
+                    synced.add(section)
+                    touched.extend(self._sync_array(config, section))
+                origin = self.origin(config, key_path)
+                if origin is not None:
+                    touched.extend(f for f in self.fragments if f.path == origin)
+                continue
+
+            owner = self.section_owner.get(section) or self.default_owner(section)
+            if owner is None:
+                continue
+            if not owner.loaded:
+                owner.load()
+            if section in config:
+                owner.data[section] = config[section]
+            else:
+                owner.data.pop(section, None)
+            self.section_owner[section] = owner
+            touched.append(owner)
+
+        written = []
+        for fragment in dict.fromkeys(touched):
+            if write(fragment.path, fragment.data):
+                written.append(fragment.path)
+        return written
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print("Использование: python -m core.confdir ПАПКА", file=sys.stderr)
+        return 2
+    confdir = ConfDir(argv[0])
+    sys.stdout.buffer.write(dumps(confdir.compose()) + b"\n")
+    print(f"Фрагментов: {len(confdir.fragments)}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
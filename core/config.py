@@ -0,0 +1,160 @@
+import os
+
+from .serialize import dumps, loads
+from .storage import atomic_write
+from .trace import traced
+
+
+# Маркер отсутствующего значения
+MISSING = object()
+
+# Поля, для которых при сохранении приводится тип
+BOOL_KEYS = ("udp", "spx")
+INT_KEYS = ("port",)
+
+
+# ----------------- Типы значений -----------------
+def coerce_value(key, value):
+    """Приводит значение к типу, ожидаемому Xray для данного ключа"""
+    if key in BOOL_KEYS:
+        # Boolean поля
+        return bool(value)
+    if key in INT_KEYS:
+        # Числовые поля
+        try:
+            str_value = str(value).strip()
+            return int(str_value) if str_value else 0
+        except ValueError:
+            # Если не число, сохраняем как строку
+            return str(value).strip()
+    # Строковые поля
+    return str(value).strip()
+
+
+# ----------------- Вложенные значения -----------------
+def set_nested_value(data, key_path, value):
+    """Записывает значение как есть, создавая недостающие промежуточные узлы"""
+    if not key_path:
+        return
+
+    d = data
+    for i, key in enumerate(key_path[:-1]):
+        # Недостающий узел — список, если следующий ключ индекс
+        make = list if isinstance(key_path[i + 1], int) else dict
+        if isinstance(d, list):
+            while len(d) <= key:
+                d.append(make())
+        elif key not in d:
+            d[key] = make()
+        d = d[key]
+
+    last_key = key_path[-1]
+    if isinstance(d, list):
+        while len(d) <= last_key:
+            d.append(None)
+    d[last_key] = value
+
+
+@traced()
+def update_nested_value(data, key_path, value):
+    """Обновляет значение во вложенной структуре, не удаляя другие поля"""
+    if not key_path:
+        return
+    set_nested_value(data, key_path, coerce_value(key_path[-1], value))
+
+
+def get_nested_value(data, key_path, default=None):
+    """Возвращает значение по пути ключей или default, если пути нет"""
+    d = data
+    for key in key_path:
+        try:
+            d = d[key]
+        except (KeyError, IndexError, TypeError):
+            return default
+    return d
+
+
+def restore_nested_value(data, key_path, old_value):
+    """Возвращает прежнее значение (или удаляет ключ, если его не было)"""
+    parent = get_nested_value(data, key_path[:-1])
+    if parent is None:
+        return
+    if old_value is MISSING:
+        if isinstance(parent, dict):
+            parent.pop(key_path[-1], None)
+    else:
+        parent[key_path[-1]] = old_value
+
+
+def parse_key_path(text):
+    """Разбирает путь вида "outbounds.0.settings.vnext.0.port" в список ключей"""
+    return [int(part) if part.isdigit() else part for part in text.split(".") if part]
+
+
+# ----------------- Поиск секций -----------------
+def find_by_protocol(items, protocol):
+    """Индекс первого элемента inbounds/outbounds с указанным протоколом"""
+    for i, item in enumerate(items):
+        if isinstance(item, dict) and item.get("protocol") == protocol:
+            return i
+    return None
+
+
+def find_outbound(config, selector=None, protocol="vless"):
+    """Индекс outbound по тегу или индексу; по умолчанию — первый с protocol"""
+    outbounds = config.get("outbounds", [])
+    if selector is None:
+        return find_by_protocol(outbounds, protocol)
+    if isinstance(selector, int) or str(selector).isdigit():
+        index = int(selector)
+        return index if index < len(outbounds) else None
+    for i, outbound in enumerate(outbounds):
+        if outbound.get("tag") == selector:
+            return i
+    return None
+
+
+# ----------------- Файлы -----------------
+class LoadCancelled(Exception):
+    """Загрузка прервана пользователем"""
+
+
+@traced()
+def load_config(path, progress=None, is_cancelled=None, chunk_size=1 << 20):
+    """Читает и разбирает config.json.
+
+    progress(done, total) вызывается после каждого прочитанного блока,
+    is_cancelled() проверяется между блоками и перед разбором.
+    """
+    if progress is None and is_cancelled is None:
+        with open(path, "rb") as f:
+            return loads(f.read())
+
+    chunks = []
+    with open(path, "rb") as f:
+        total = os.fstat(f.fileno()).st_size
+        done = 0
+        while True:
+            if is_cancelled and is_cancelled():
+                raise LoadCancelled()
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            done += len(chunk)
+            if progress:
+                progress(done, total)
+
+    if is_cancelled and is_cancelled():
+        raise LoadCancelled()
+    return loads(b"".join(chunks))
+
+
+def dump_config(data):
+    """Байты config.json: отступ 4, как json.dumps(indent=4, ensure_ascii=False)"""
+    return dumps(data, "pretty")
+
+
+def write_config(path, data, fsync="dir"):
+    """Атомарно сохраняет конфиг; False, если файл уже совпадает"""
+    return atomic_write(path, dump_config(data), fsync=fsync)
@@ -0,0 +1,85 @@
+"""Структурное сравнение двух версий конфига.
+
+Изменение — (key_path, старое, новое); MISSING означает, что ключа нет.
+Одинаковые поддеревья отсекаются сравнением хэшей core.merkle, поэтому
+обход идёт только по изменившимся ветвям, а хэши прошлой версии
+переиспользуются между сравнениями (передайте её MerkleTree). Списки
+одинаковой длины сравниваются поэлементно, списки разной длины
+заменяются целиком — так изменения применяются по путям как есть.
+"""
+from .config import MISSING, get_nested_value
+from .index import SECTIONS
+from .merkle import MerkleTree
+
+
+def diff(old, new, path=(), old_tree=None, new_tree=None):
+    """Список изменений от old к new; old_tree/new_tree — деревья хэшей old и new"""
+    old_tree = old_tree if old_tree is not None else MerkleTree(old)
+    new_tree = new_tree if new_tree is not None else MerkleTree(new)
+    changes = []
+    _diff(old_tree, new_tree, old, new, tuple(path), changes)
+    return changes
+
+
+def _diff(old_tree, new_tree, old, new, path, out):
+    if old is new:
+        return
+    old_type, new_type = type(old), type(new)
+    if old_type is dict and new_type is dict:
+        if old_tree.digest(old) == new_tree.digest(new):
+            return
+        for key, value in old.items():
+            other = new.get(key, MISSING)
+            if other is MISSING:
+                out.append((path + (key,), value, MISSING))
+            else:
+                _diff(old_tree, new_tree, value, other, path + (key,), out)
+        for key, value in new.items():
+            if key not in old:
+                out.append((path + (key,), MISSING, value))
+    elif old_type is list and new_type is list and len(old) == len(new):
+        if old_tree.digest(old) == new_tree.digest(new):
+            return
+        for i, (value, other) in enumerate(zip(old, new)):
+            _diff(old_tree, new_tree, value, other, path + (i,), out)
+    elif old_type is not new_type or old != new:
+        # 1 и True равны для ==, но в JSON это разные значения
+        out.append((path, old, new))
+
+
+def overlaps(a, b):
+    """True, если один путь — префикс другого (правки затрагивают одно поддерево)"""
+    n = min(len(a), len(b))
+    return tuple(a[:n]) == tuple(b[:n])
+
+
+def is_container(value):
+    return isinstance(value, (dict, list))
+
+
+def resizes_sections(changes):
+    """True, если изменения добавляют или удаляют inbound/outbound либо
+    заменяют конфиг целиком (меняется состав формы, а не отдельные поля)"""
+    for key_path, _old, _new in changes:
+        if len(key_path) == 0 or (key_path[0] in SECTIONS and len(key_path) <= 2):
+            return True
+    return False
+
+
+def split_conflicts(changes, local, dirty_paths):
+    """Делит внешние изменения на применимые и конфликтующие с локальными правками.
+
+    Конфликт — изменение, затрагивающее поддерево несохранённой правки,
+    если новое значение на диске отличается от локального.
+    """
+    dirty = [tuple(path) for path in dirty_paths]
+    clean, conflicts = [], []
+    for change in changes:
+        key_path = change[0]
+        if not any(overlaps(key_path, path) for path in dirty):
+            clean.append(change)
+            continue
+        if get_nested_value(local, key_path, MISSING) != change[2]:
+            conflicts.append(change)
+    return clean, conflicts
+
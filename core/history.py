@@ -0,0 +1,98 @@
+"""История правок для undo/redo.
+
+Шаг хранит только изменённые пути и ссылки на прежнее/новое значение,
+поэтому его размер пропорционален правке, а не размеру конфига.
+Неизменённые поддеревья общие у всех шагов — копий конфига нет.
+"""
+from collections import deque
+
+from .config import MISSING
+
+
+class HistoryStep:
+    __slots__ = ("label", "changes", "merge_key", "created")
+
+    def __init__(self, label, changes, merge_key=None, created=None):
+        self.label = label
+        # Список (key_path, old_value, new_value); old_value может быть MISSING
+        self.changes = changes
+        self.merge_key = merge_key
+        # Промежуточные узлы, созданные правкой: отмена удаляет их вместе с ключом
+        self.created = created or []
+
+
+class History:
+    """Стеки undo/redo из HistoryStep с ограничением глубины"""
+
+    def __init__(self, limit=500):
+        self._undo = deque(maxlen=limit)
+        self._redo = []
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def undo_label(self):
+        return self._undo[-1].label if self._undo else ""
+
+    def redo_label(self):
+        return self._redo[-1].label if self._redo else ""
+
+    def record(self, label, changes, merge_key=None, created=()):
+        """Добавляет шаг; правки с тем же merge_key подряд сливаются в один шаг
+
+        (так набор текста в одном поле отменяется целиком). created — пути
+        промежуточных узлов, которые правка создала (ConfigIndex.set).
+        """
+        changes = [(tuple(path), old, new) for path, old, new in changes]
+        if not changes:
+            return
+        created = [tuple(path) for path in created if path is not None]
+        self._redo.clear()
+        last = self._undo[-1] if self._undo else None
+        if merge_key is not None and last is not None and last.merge_key == merge_key:
+            last.created.extend(created)
+            positions = {path: n for n, (path, _old, _new) in enumerate(last.changes)}
+            for path, old, new in changes:
+                n = positions.get(path)
+                if n is None:
+                    positions[path] = len(last.changes)
+                    last.changes.append((path, old, new))
+                else:
+                    last.changes[n] = (path, last.changes[n][1], new)
+            return
+        self._undo.append(HistoryStep(label, changes, merge_key, created))
+
+    def seal(self):
+        """Запрещает слияние следующей правки с последним шагом"""
+        if self._undo:
+            self._undo[-1].merge_key = None
+
+    def undo(self, apply):
+        """Отменяет последний шаг: apply(key_path, value) для каждого пути в обратном порядке,
+        затем apply(path, MISSING) для созданных правкой промежуточных узлов"""
+        if not self._undo:
+            return None
+        step = self._undo.pop()
+        for path, old, _new in reversed(step.changes):
+            apply(path, old)
+        for path in reversed(step.created):
+            apply(path, MISSING)
+        step.merge_key = None
+        self._redo.append(step)
+        return step
+
+    def redo(self, apply):
+        if not self._redo:
+            return None
+        step = self._redo.pop()
+        for path, _old, new in step.changes:
+            apply(path, new)
+        self._undo.append(step)
+        return step
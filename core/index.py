@@ -0,0 +1,226 @@
+"""Структурный индекс загруженного конфига.
+
+Строится один раз при загрузке и дальше обновляется по месту при каждой
+правке через set()/update(), без полного перестроения.
+"""
+from bisect import insort
+
+from .config import MISSING, coerce_value, set_nested_value
+from .trace import traced
+
+# Секции-списки, для которых ведутся индексы по protocol и tag
+SECTIONS = ("inbounds", "outbounds")
+
+
+# ----------------- JSON Pointer -----------------
+def escape_key(key):
+    if isinstance(key, int):
+        return str(key)
+    if not isinstance(key, str):
+        raise TypeError(f"Ключ пути должен быть str или int, а не {type(key).__name__}")
+    if "~" in key or "/" in key:
+        return key.replace("~", "~0").replace("/", "~1")
+    return key
+
+
+def to_pointer(key_path):
+    """Путь ключей -> JSON Pointer (RFC 6901)"""
+    return "".join(["/" + escape_key(key) for key in key_path])
+
+
+def from_pointer(pointer, data=None):
+    """JSON Pointer -> путь ключей; индексы списков становятся int"""
+    key_path = []
+    node = data
+    for part in pointer.split("/")[1:]:
+        key = part.replace("~1", "/").replace("~0", "~")
+        if isinstance(node, list) or (node is None and key.isdigit()):
+            key = int(key)
+        key_path.append(key)
+        if node is not None:
+            node = node[key]
+    return key_path
+
+
+class ConfigIndex:
+    """Индекс: JSON Pointer -> узел, protocol/tag -> индексы, подпись -> пути"""
+
+    def __init__(self, data):
+        self.data = data
+        self.nodes = {}
+        self.protocols = {section: {} for section in SECTIONS}
+        self.tags = {section: {} for section in SECTIONS}
+        self.labels = {}
+        self._add_subtree((), data)
+
+    # ----------------- Построение -----------------
+    def _section_items(self, key_path, value):
+        """Элементы inbounds/outbounds, попадающие в поддерево key_path"""
+        depth = len(key_path)
+        if depth == 0 and isinstance(value, dict):
+            for section in SECTIONS:
+                items = value.get(section)
+                if isinstance(items, list):
+                    yield from ((section, i, item) for i, item in enumerate(items))
+        elif depth == 1 and key_path[0] in SECTIONS and isinstance(value, list):
+            yield from ((key_path[0], i, item) for i, item in enumerate(value))
+        elif depth == 2 and key_path[0] in SECTIONS:
+            yield key_path[0], key_path[1], value
+
+    @staticmethod
+    def _walk(key_path, value):
+        """Все (pointer, узел) поддерева"""
+        stack = [(to_pointer(key_path), value)]
+        while stack:
+            pointer, node = stack.pop()
+            yield pointer, node
+            if type(node) is dict:
+                stack.extend([(f"{pointer}/{escape_key(key)}", child) for key, child in node.items()])
+            elif type(node) is list:
+                stack.extend([(f"{pointer}/{i}", child) for i, child in enumerate(node)])
+
+    def _add_subtree(self, key_path, value):
+        key_path = tuple(key_path)
+        self.nodes.update(self._walk(key_path, value))
+        for section, index, item in self._section_items(key_path, value):
+            self._add_item(section, index, item)
+
+    def _remove_subtree(self, key_path, value):
+        key_path = tuple(key_path)
+        nodes = self.nodes
+        for pointer, _node in self._walk(key_path, value):
+            nodes.pop(pointer, None)
+        for section, index, item in self._section_items(key_path, value):
+            self._remove_item(section, index, item)
+
+    def _add_item(self, section, index, item):
+        if not isinstance(item, dict):
+            return
+        protocol = item.get("protocol")
+        if protocol is not None:
+            insort(self.protocols[section].setdefault(protocol, []), index)
+        tag = item.get("tag")
+        if tag is not None:
+            tags = self.tags[section]
+            # При повторе тега Xray использует первый outbound
+            if tag not in tags or index < tags[tag]:
+                tags[tag] = index
+
+    def _remove_item(self, section, index, item):
+        if not isinstance(item, dict):
+            return
+        indices = self.protocols[section].get(item.get("protocol"))
+        if indices and index in indices:
+            indices.remove(index)
+        tags = self.tags[section]
+        if tags.get(item.get("tag")) == index:
+            del tags[item.get("tag")]
+
+    # ----------------- Поиск -----------------
+    def get(self, key_path, default=None):
+        return self.nodes.get(to_pointer(key_path), default)
+
+    def __contains__(self, key_path):
+        return to_pointer(key_path) in self.nodes
+
+    def find(self, section, protocol):
+        """Все индексы элементов секции с данным протоколом (по возрастанию)"""
+        return list(self.protocols.get(section, {}).get(protocol, ()))
+
+    def first(self, section, protocol):
+        indices = self.protocols.get(section, {}).get(protocol)
+        return indices[0] if indices else None
+
+    def by_tag(self, section, tag):
+        return self.tags.get(section, {}).get(tag)
+
+    # ----------------- Подписи полей -----------------
+    def add_label(self, label, key_path):
+        self.labels.setdefault(label, []).append(tuple(key_path))
+
+    def paths_for_label(self, label):
+        return self.labels.get(label, [])
+
+    def clear_labels(self):
+        self.labels.clear()
+
+    def discard_labels(self, prefix):
+        """Убирает подписи полей под prefix (их строки строятся заново)"""
+        n = len(prefix)
+        for paths in self.labels.values():
+            paths[:] = [path for path in paths if path[:n] != prefix]
+
+    # ----------------- Правки -----------------
+    @traced()
+    def set(self, key_path, value):
+        """Записывает значение по пути и обновляет индекс только для него.
+
+        Возвращает путь самого верхнего созданного промежуточного узла или None.
+        """
+        key_path = tuple(key_path)
+        if not key_path:
+            raise ValueError("Пустой путь")
+
+        # Ищем самый глубокий существующий предок: всё ниже него появится заново
+        depth = len(key_path)
+        while depth > 0 and to_pointer(key_path[:depth - 1]) not in self.nodes:
+            depth -= 1
+        anchor = key_path[:depth - 1] if depth > 0 else ()
+
+        if depth == len(key_path):
+            parent = self.nodes[to_pointer(key_path[:-1])]
+            old = self.nodes.get(to_pointer(key_path), MISSING)
+            if old is not MISSING:
+                self._remove_subtree(key_path, old)
+            section_item = len(key_path) == 3 and key_path[0] in SECTIONS
+            if section_item:
+                item = self.nodes.get(to_pointer(key_path[:2]))
+                self._remove_item(key_path[0], key_path[1], item)
+            if isinstance(parent, list) and key_path[-1] == len(parent):
+                parent.append(value)
+            else:
+                parent[key_path[-1]] = value
+            self._add_subtree(key_path, value)
+            if section_item:
+                self._add_item(key_path[0], key_path[1], item)
+            return None
+
+        # Промежуточные узлы отсутствуют: создаём их и индексируем только новое
+        anchor_value = self.nodes[to_pointer(anchor)]
+        old_length = len(anchor_value) if isinstance(anchor_value, list) else None
+        set_nested_value(self.data, list(key_path), value)
+        created = key_path[:len(anchor) + 1]
+        if old_length is None:
+            self._add_subtree(created, self.nodes[to_pointer(anchor)][created[-1]])
+        else:
+            self.add_list_items(anchor, old_length)
+        return created
+
+    @traced()
+    def update(self, key_path, value):
+        """Как set(), но с приведением типа, как при сохранении формы"""
+        return self.set(key_path, coerce_value(key_path[-1], value))
+
+    def restore(self, key_path, old_value):
+        """Возвращает прежнее значение или удаляет ключ (последний элемент списка), если его не было"""
+        if old_value is not MISSING:
+            self.set(key_path, old_value)
+            return
+        key_path = tuple(key_path)
+        parent = self.nodes.get(to_pointer(key_path[:-1]))
+        old = self.nodes.get(to_pointer(key_path), MISSING)
+        if old is MISSING:
+            return
+        if isinstance(parent, dict):
+            self._remove_subtree(key_path, old)
+            del parent[key_path[-1]]
+        elif isinstance(parent, list) and key_path[-1] == len(parent) - 1:
+            # Отмена дописанного в конец списка элемента
+            self._remove_subtree(key_path, old)
+            parent.pop()
+
+    def add_list_items(self, key_path, start):
+        """Индексирует элементы, дописанные в конец списка начиная с start"""
+        items = self.nodes[to_pointer(key_path)]
+        for i in range(start, len(items)):
+            self._add_subtree(tuple(key_path) + (i,), items[i])
@@ -0,0 +1,558 @@
+"""Разбор ссылок vless://, vmess://, trojan://, ss:// и hysteria2:// (hy2://).
+
+Токенизатор схемы за один проход раскладывает ссылку в словарь параметров,
+а таблица полей схемы переводит параметры в поля outbound: (подпись,
+параметр, путь относительно outbound, преобразование). Сегменты пути
+"{security}" и "{network}" выбираются по значениям из самой ссылки; если
+блока для них нет (security=none, network=tcp), поле пропускается.
+Регулярные выражения компилируются при импорте.
+
+Результат — ShareLink с уже приведёнными типами: его можно применить к
+любому outbound того же протокола (apply_to) или превратить в новый
+outbound (to_outbound).
+"""
+import base64
+import functools
+import json
+import re
+import urllib.parse
+
+from .config import find_outbound, get_nested_value, set_nested_value
+
+
+# схема://[userinfo@]host[:port][/][?query][#name]
+URI_PATTERN = re.compile(
+    r'([A-Za-z][A-Za-z0-9+.-]*)://(?:([^@/?#]*)@)?(\[[^\]/?#]*\]|[^:/?#\[\]]*)(?::([0-9]+))?/?'
+    r'(?:\?([^#]*))?(?:#(.*))?\Z',
+    re.S,
+)
+
+# Блок streamSettings для сегментов {security} и {network}
+SECURITY_BLOCKS = {"reality": "realitySettings", "tls": "tlsSettings"}
+NETWORK_BLOCKS = {
+    "ws": "wsSettings",
+    "httpupgrade": "httpupgradeSettings",
+    "xhttp": "xhttpSettings",
+    "splithttp": "splithttpSettings",
+}
+
+# Имена ключей JSON из vmess:// -> общие имена параметров
+VMESS_KEYS = {
+    "add": "address", "ps": "name", "aid": "alterId", "scy": "cipher",
+    "net": "type", "type": "headerType", "tls": "security",
+}
+
+
+class LinkError(ValueError):
+    """Ссылка не распознана"""
+
+
+# ----------------- Преобразования значений -----------------
+def _port(value):
+    port = int(value) if value.isascii() and value.isdigit() else 0
+    if not 0 < port < 65536:
+        raise LinkError(f"Неверный порт: {value}")
+    return port
+
+
+def _int(value):
+    try:
+        return int(value)
+    except ValueError:
+        raise LinkError(f"Ожидалось число: {value}") from None
+
+
+CONVERTERS = {
+    "port": _port,
+    "int": _int,
+    # Для SPX - если значение "/", это True
+    "spx": lambda value: value == "/",
+    "flag": lambda value: value.lower() in ("1", "true"),
+    "list": lambda value: [item for item in value.split(",") if item],
+}
+
+
+def _text(value):
+    # Объекты, списки и флаги без преобразования в ссылку не попадают
+    if value is None or value == "" or isinstance(value, (bool, dict, list)):
+        return None
+    return str(value)
+
+
+# Обратные преобразования: значение поля outbound -> параметр ссылки или None
+REVERSE = {
+    "port": _text,
+    "int": _text,
+    "spx": lambda value: "/" if value is True else _text(value),
+    "flag": lambda value: "1" if value is True else "0" if value is False else None,
+    "list": lambda value: ",".join(map(str, value)) if isinstance(value, list) and value else _text(value),
+}
+
+
+# ----------------- Таблицы полей -----------------
+# (подпись, параметр, путь относительно outbound, преобразование)
+STREAM_FIELDS = (
+    ("Network", "type", ("streamSettings", "network"), None),
+    ("Security", "security", ("streamSettings", "security"), None),
+    ("Public Key", "pbk", ("streamSettings", "realitySettings", "publicKey"), None),
+    ("Fingerprint", "fp", ("streamSettings", "{security}", "fingerprint"), None),
+    ("Server Name", "sni", ("streamSettings", "{security}", "serverName"), None),
+    ("Short ID", "sid", ("streamSettings", "realitySettings", "shortId"), None),
+    ("SPX", "spx", ("streamSettings", "realitySettings", "spx"), "spx"),
+    ("ALPN", "alpn", ("streamSettings", "tlsSettings", "alpn"), "list"),
+    ("Allow Insecure", "allowInsecure", ("streamSettings", "tlsSettings", "allowInsecure"), "flag"),
+    ("Host", "host", ("streamSettings", "{network}", "host"), None),
+    ("Path", "path", ("streamSettings", "{network}", "path"), None),
+    ("Service Name", "serviceName", ("streamSettings", "grpcSettings", "serviceName"), None),
+)
+
+VLESS_FIELDS = (
+    ("User ID", "id", ("settings", "vnext", 0, "users", 0, "id"), None),
+    ("Server Address", "address", ("settings", "vnext", 0, "address"), None),
+    ("Server Port", "port", ("settings", "vnext", 0, "port"), "port"),
+    *STREAM_FIELDS,
+    ("Flow", "flow", ("settings", "vnext", 0, "users", 0, "flow"), None),
+    ("Encryption", "encryption", ("settings", "vnext", 0, "users", 0, "encryption"), None),
+)
+
+VMESS_FIELDS = (
+    ("User ID", "id", ("settings", "vnext", 0, "users", 0, "id"), None),
+    ("Server Address", "address", ("settings", "vnext", 0, "address"), None),
+    ("Server Port", "port", ("settings", "vnext", 0, "port"), "port"),
+    *STREAM_FIELDS,
+    ("Alter ID", "alterId", ("settings", "vnext", 0, "users", 0, "alterId"), "int"),
+    ("Cipher", "cipher", ("settings", "vnext", 0, "users", 0, "security"), None),
+)
+
+TROJAN_FIELDS = (
+    ("Password", "password", ("settings", "servers", 0, "password"), None),
+    ("Server Address", "address", ("settings", "servers", 0, "address"), None),
+    ("Server Port", "port", ("settings", "servers", 0, "port"), "port"),
+    *STREAM_FIELDS,
+)
+
+SHADOWSOCKS_FIELDS = (
+    ("Password", "password", ("settings", "servers", 0, "password"), None),
+    ("Server Address", "address", ("settings", "servers", 0, "address"), None),
+    ("Server Port", "port", ("settings", "servers", 0, "port"), "port"),
+    ("Method", "method", ("settings", "servers", 0, "method"), None),
+)
+
+HYSTERIA_FIELDS = (
+    ("Auth", "auth", ("streamSettings", "hysteriaSettings", "auth"), None),
+    ("Server Address", "address", ("settings", "address"), None),
+    ("Server Port", "port", ("settings", "port"), "port"),
+    ("Server Name", "sni", ("streamSettings", "tlsSettings", "serverName"), None),
+    ("ALPN", "alpn", ("streamSettings", "tlsSettings", "alpn"), "list"),
+    ("Allow Insecure", "insecure", ("streamSettings", "tlsSettings", "allowInsecure"), "flag"),
+)
+
+
+# ----------------- Каркасы outbound -----------------
+def _vless_outbound():
+    return {
+        "protocol": "vless",
+        "settings": {"vnext": [{"address": "", "port": 443,
+                                "users": [{"id": "", "encryption": "none", "flow": ""}]}]},
+        "streamSettings": {"network": "tcp", "security": "none"},
+    }
+
+
+def _vmess_outbound():
+    return {
+        "protocol": "vmess",
+        "settings": {"vnext": [{"address": "", "port": 443,
+                                "users": [{"id": "", "alterId": 0, "security": "auto"}]}]},
+        "streamSettings": {"network": "tcp", "security": "none"},
+    }
+
+
+def _trojan_outbound():
+    return {
+        "protocol": "trojan",
+        "settings": {"servers": [{"address": "", "port": 443, "password": ""}]},
+        "streamSettings": {"network": "tcp", "security": "tls"},
+    }
+
+
+def _shadowsocks_outbound():
+    return {
+        "protocol": "shadowsocks",
+        "settings": {"servers": [{"address": "", "port": 443, "method": "", "password": ""}]},
+    }
+
+
+def _hysteria_outbound():
+    return {
+        "protocol": "hysteria",
+        "settings": {"version": 2, "address": "", "port": 443},
+        "streamSettings": {"network": "hysteria", "security": "tls",
+                           "hysteriaSettings": {"version": 2, "auth": ""}},
+    }
+
+
+# ----------------- Токенизаторы -----------------
+def _unquote(value):
+    # Большинство значений не закодировано — не вызываем unquote зря
+    return urllib.parse.unquote(value) if '%' in value else value
+
+
+@functools.lru_cache(maxsize=4096)
+def _unquote_param(value):
+    # Закодированные параметры (spx=%2F, path=%2Fws) повторяются из ссылки в ссылку
+    return urllib.parse.unquote(value)
+
+
+def _b64decode(text):
+    text = text.strip()
+    text += "=" * (-len(text) % 4)
+    try:
+        if "-" in text or "_" in text:
+            return base64.urlsafe_b64decode(text).decode("utf-8")
+        return base64.b64decode(text, validate=True).decode("utf-8")
+    except ValueError:
+        raise LinkError("Неверная base64-часть ссылки") from None
+
+
+def _after_scheme(url):
+    """Часть ссылки после "схема://" (регистр схемы не важен)"""
+    return url.partition("://")[2]
+
+
+def _uri_params(url, user_key):
+    """Общий разбор userinfo@host:port?query#name; userinfo кладётся в user_key"""
+    match = URI_PATTERN.match(url)
+    if match is None:
+        raise LinkError("Неверный формат ссылки")
+    _scheme, user, host, port, query, name = match.groups()
+    if not host or not port:
+        raise LinkError("В ссылке нет адреса или порта")
+    params = {}
+    if query:
+        for pair in query.split("&"):
+            key, sep, value = pair.partition("=")
+            if sep and key:
+                params[key] = _unquote_param(value) if "%" in value else value
+    params[user_key] = _unquote(user) if user else ""
+    params["address"] = host[1:-1] if host[0] == "[" else host
+    params["port"] = port
+    params["name"] = _unquote(name) if name else ""
+    return params
+
+
+def _vless_params(url):
+    params = _uri_params(url, "id")
+    if not params["id"]:
+        raise LinkError("В ссылке VLESS нет User ID")
+    params.setdefault("encryption", "none")
+    return params
+
+
+def _trojan_params(url):
+    params = _uri_params(url, "password")
+    params.setdefault("security", "tls")
+    return params
+
+
+def _hysteria_params(url):
+    return _uri_params(url, "auth")
+
+
+def _vmess_params(url):
+    body, _, _name = _after_scheme(url).partition("#")
+    try:
+        data = json.loads(_b64decode(body))
+    except ValueError:
+        raise LinkError("Неверный формат VMess ссылки") from None
+    if not isinstance(data, dict):
+        raise LinkError("Неверный формат VMess ссылки")
+    params = {VMESS_KEYS.get(key, key): str(value) for key, value in data.items()
+              if value is not None and value != ""}
+    if not params.get("address") or not params.get("port") or not params.get("id"):
+        raise LinkError("В ссылке VMess нет адреса, порта или id")
+    if params.get("security") == "none":
+        del params["security"]
+    params.setdefault("name", "")
+    return params
+
+
+def _shadowsocks_params(url):
+    head, sep, name = url.partition("#")
+    body, query_sep, query = _after_scheme(head).partition("?")
+    if "@" not in body:
+        # Старый вид: ss://base64(method:password@host:port)#name, пароль не закодирован
+        user, at, server = _b64decode(_unquote(body).rstrip("/")).rpartition("@")
+        if not at:
+            raise LinkError("Неверный формат Shadowsocks ссылки")
+        params = _uri_params(f"ss://x@{server}{query_sep}{query}{sep}{name}", "user")
+        del params["user"]
+    else:
+        params = _uri_params(url, "user")
+        user = params.pop("user")
+        if ":" not in user:
+            user = _b64decode(user)
+    params["method"], sep, params["password"] = user.partition(":")
+    if not sep or not params["method"]:
+        raise LinkError("В ссылке Shadowsocks нет метода шифрования")
+    return params
+
+
+# ----------------- Сборка ссылок -----------------
+def _quote(value):
+    return urllib.parse.quote(value, safe="")
+
+
+def _host(address):
+    return f"[{address}]" if ":" in address else address
+
+
+def _build_uri(scheme, params):
+    """схема://credential@host:port?query#name — обратное _uri_params"""
+    credential = params.pop(scheme.credential, "")
+    address, port, name = params.pop("address"), params.pop("port"), params.pop("name", "")
+    url = f"{scheme.name}://{_quote(credential)}@{_host(address)}:{port}"
+    if params:
+        url += "?" + "&".join(f"{key}={_quote(value)}" for key, value in params.items())
+    return url + "#" + _quote(name) if name else url
+
+
+def _build_vmess(scheme, params):
+    data = {"v": "2"}
+    for key, value in params.items():
+        data[VMESS_NAMES.get(key, key)] = value
+    return "vmess://" + base64.b64encode(json.dumps(data, ensure_ascii=False).encode("utf-8")).decode("ascii")
+
+
+def _build_shadowsocks(scheme, params):
+    if not params.get("method"):
+        raise LinkError("У outbound Shadowsocks нет метода шифрования")
+    userinfo = base64.urlsafe_b64encode(f"{params['method']}:{params['password']}".encode("utf-8"))
+    url = f"ss://{userinfo.decode('ascii').rstrip('=')}@{_host(params['address'])}:{params['port']}"
+    return url + "#" + _quote(params["name"]) if params.get("name") else url
+
+
+VMESS_NAMES = {value: key for key, value in VMESS_KEYS.items()}
+
+
+# ----------------- Реестр схем -----------------
+class LinkScheme:
+    """Схема ссылки: протокол outbound, разбор и сборка, таблица полей и каркас"""
+
+    __slots__ = ("name", "protocol", "tokenize", "build", "fields", "make_outbound", "credential",
+                 "credential_path", "plans")
+
+    def __init__(self, name, protocol, tokenize, build, fields, make_outbound, credential):
+        self.name = name
+        self.protocol = protocol
+        self.tokenize = tokenize
+        self.build = build
+        self.fields = fields
+        self.make_outbound = make_outbound
+        # Параметр, который вместе с адресом и портом отличает сервер
+        self.credential = credential
+        self.credential_path = next(rel_path for _label, param, rel_path, _convert in fields if param == credential)
+        # (блок security, блок сети) -> таблица с подставленными блоками
+        self.plans = {}
+
+    def plan(self, security, network):
+        """Таблица полей для ссылок с данными security и network:
+        [(подпись, параметр, путь, преобразование, обратное преобразование)] без шаблонов"""
+        key = (SECURITY_BLOCKS.get(security), NETWORK_BLOCKS.get(network))
+        plan = self.plans.get(key)
+        if plan is None:
+            blocks = {"{security}": key[0], "{network}": key[1]}
+            plan = []
+            for label, param, rel_path, convert in self.fields:
+                if any(part in blocks for part in rel_path):
+                    rel_path = tuple(blocks[part] if part in blocks else part for part in rel_path)
+                    if None in rel_path:
+                        continue
+                plan.append((label, param, rel_path, CONVERTERS[convert] if convert else None,
+                             REVERSE.get(convert, _text)))
+            plan = self.plans[key] = tuple(plan)
+        return plan
+
+
+SCHEMES = {}
+
+
+def register_scheme(scheme, aliases=()):
+    for name in (scheme.name, *aliases):
+        SCHEMES[name] = scheme
+
+
+register_scheme(LinkScheme("vless", "vless", _vless_params, _build_uri, VLESS_FIELDS, _vless_outbound, "id"))
+register_scheme(LinkScheme("vmess", "vmess", _vmess_params, _build_vmess, VMESS_FIELDS, _vmess_outbound, "id"))
+register_scheme(LinkScheme("trojan", "trojan", _trojan_params, _build_uri, TROJAN_FIELDS,
+                           _trojan_outbound, "password"))
+register_scheme(LinkScheme("ss", "shadowsocks", _shadowsocks_params, _build_shadowsocks, SHADOWSOCKS_FIELDS,
+                           _shadowsocks_outbound, "password"))
+register_scheme(LinkScheme("hysteria2", "hysteria", _hysteria_params, _build_uri, HYSTERIA_FIELDS,
+                           _hysteria_outbound, "auth"), aliases=("hy2",))
+
+# Пути полей по протоколу: для поиска существующих серверов (outbound_key)
+PROTOCOL_FIELDS = {scheme.protocol: scheme for scheme in SCHEMES.values()}
+
+
+def link_scheme(url):
+    """Имя схемы ссылки или None"""
+    scheme, sep, _ = url[:16].partition("://")
+    return scheme.lower() if sep else None
+
+
+# ----------------- Разобранная ссылка -----------------
+class ShareLink:
+    """Разобранная ссылка: протокол, имя и типизированные значения полей outbound"""
+
+    __slots__ = ("scheme", "protocol", "name", "params", "fields")
+
+    def __init__(self, scheme, params, fields):
+        self.scheme = scheme
+        self.protocol = scheme.protocol
+        self.name = params.get("name", "")
+        self.params = params
+        # [(подпись, путь относительно outbound, значение)]
+        self.fields = fields
+
+    def __repr__(self):
+        return f"ShareLink({self.protocol} {self.params.get('address')}:{self.params.get('port')})"
+
+    def field_values(self):
+        return self.fields
+
+    def server_key(self):
+        """Ключ дедупликации: (адрес, порт, id/пароль, SNI)"""
+        params = self.params
+        # SNI — только если он попадает в outbound (есть блок tls/reality)
+        sni = next((value for _label, rel_path, value in self.fields if rel_path[-1] == "serverName"), "")
+        return (params["address"].lower(), str(int(params["port"])), params.get(self.scheme.credential, ""), sni)
+
+    def stale_blocks(self, outbound):
+        """Пути блоков streamSettings другой security (tlsSettings у reality-ссылки
+        и наоборот), которые после применения ссылки остались бы в outbound"""
+        security = next((value for _label, rel_path, value in self.fields
+                         if rel_path == ("streamSettings", "security")), None)
+        stream = outbound.get("streamSettings") if isinstance(outbound, dict) else None
+        if security is None or not isinstance(stream, dict):
+            return []
+        return [("streamSettings", block) for name, block in SECURITY_BLOCKS.items()
+                if name != security and block in stream]
+
+    def to_outbound(self, tag=None):
+        """Новый outbound по ссылке"""
+        outbound = self.scheme.make_outbound()
+        if tag is not None:
+            outbound = {"tag": tag, **outbound}
+        for _label, rel_path, value in self.fields:
+            node = outbound
+            for key in rel_path[:-1]:
+                # Списки есть в каркасе, недостающие объекты создаются
+                node = node[key] if type(key) is int else node.setdefault(key, {})
+            node[rel_path[-1]] = value
+        return outbound
+
+    def apply_to(self, config, outbound=None):
+        """Применяет ссылку к outbound (тег/индекс, по умолчанию первый того же протокола).
+
+        Редактируются только поля, указанные в ссылке; блок настроек другой
+        security удаляется. Возвращает список изменённых путей.
+        """
+        index = find_outbound(config, outbound, self.protocol)
+        if index is None:
+            raise LinkError("В конфиге нет подходящего outbound")
+        updated = []
+        stream = config["outbounds"][index].get("streamSettings")
+        for rel_path in self.stale_blocks(config["outbounds"][index]):
+            del stream[rel_path[-1]]
+            updated.append(["outbounds", index, *rel_path])
+        for _label, rel_path, value in self.fields:
+            key_path = ["outbounds", index, *rel_path]
+            set_nested_value(config, key_path, value)
+            updated.append(key_path)
+        return updated
+
+
+def parse_link(url):
+    """Разбирает ссылку любой зарегистрированной схемы в ShareLink"""
+    url = url.strip()
+    name = link_scheme(url)
+    scheme = SCHEMES.get(name)
+    if scheme is None:
+        raise LinkError(f"Неизвестный тип ссылки: {name}://" if name else "В буфере нет ссылки")
+
+    params = scheme.tokenize(url)
+    fields = []
+    for label, param, rel_path, convert, _reverse in scheme.plan(params.get("security"), params.get("type")):
+        value = params.get(param)
+        if value:
+            fields.append((label, rel_path, convert(value) if convert is not None else value))
+    return ShareLink(scheme, params, fields)
+
+
+def outbound_key(outbound):
+    """Ключ дедупликации для уже существующего outbound (как ShareLink.server_key)"""
+    scheme = PROTOCOL_FIELDS.get(outbound.get("protocol"))
+    if scheme is None:
+        return None
+    values = {}
+    for _label, param, rel_path, _convert in scheme.fields:
+        if param in ("address", "port", scheme.credential):
+            values[param] = get_nested_value(outbound, rel_path, "")
+    stream = outbound.get("streamSettings") or {}
+    sni = (get_nested_value(stream, ["realitySettings", "serverName"], "")
+           or get_nested_value(stream, ["tlsSettings", "serverName"], ""))
+    return (str(values.get("address", "")).lower(), str(values.get("port", "")),
+            str(values.get(scheme.credential, "")), str(sni))
+
+
+# ----------------- Ссылки из outbound -----------------
+def target_path(rel_path, server, user):
+    """Путь поля для сервера server и пользователя user вместо нулевых"""
+    indices = iter((server, user))
+    return [next(indices) if type(key) is int else key for key in rel_path]
+
+
+def link_targets(outbound):
+    """[(сервер, пользователь)] — для каждого своя ссылка"""
+    scheme = PROTOCOL_FIELDS.get(outbound.get("protocol"))
+    if scheme is None:
+        return []
+    path = scheme.credential_path
+    slots = [n for n, key in enumerate(path) if type(key) is int]
+    if not slots:
+        return [(0, 0)]
+    servers = get_nested_value(outbound, path[:slots[0]])
+    if not isinstance(servers, list):
+        return []
+    if len(slots) == 1:
+        return [(n, 0) for n in range(len(servers))]
+    targets = []
+    for n, server in enumerate(servers):
+        users = get_nested_value(server, path[slots[0] + 1:slots[1]])
+        if isinstance(users, list):
+            targets.extend((n, k) for k in range(len(users)))
+    return targets
+
+
+def format_link(outbound, server=0, user=0, name=None):
+    """Ссылка на сервер server и пользователя user outbound (обратное parse_link)"""
+    protocol = outbound.get("protocol")
+    scheme = PROTOCOL_FIELDS.get(protocol)
+    if scheme is None:
+        raise LinkError(f"Ссылки для протокола {protocol} не поддерживаются")
+    stream = outbound.get("streamSettings") or {}
+    params = {}
+    for _label, param, rel_path, _convert, reverse in scheme.plan(stream.get("security"), stream.get("network")):
+        value = reverse(get_nested_value(outbound, target_path(rel_path, server, user)))
+        if value is not None:
+            params[param] = value
+    if not params.get("address") or not params.get("port") or not params.get(scheme.credential):
+        raise LinkError("У outbound нет адреса, порта или id/пароля")
+    params["name"] = outbound.get("tag", "") if name is None else name
+    return scheme.build(scheme, params)
+
+
+# ----------------- Применение к конфигу -----------------
+def apply_link(config, url, outbound=None):
+    """Разбирает ссылку и применяет к outbound; возвращает изменённые пути"""
+    return parse_link(url).apply_to(config, outbound)
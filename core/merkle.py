@@ -0,0 +1,308 @@
+"""Хэши поддеревьев конфига (дерево Меркла) и структурное сравнение по ним.
+
+Хэш объекта или списка считается из хэшей детей, поэтому одинаковые
+поддеревья двух конфигов распознаются сравнением 16 байт без обхода, а
+после правки достаточно пересчитать только предков изменённого поля
+(invalidate). Порядок ключей объекта на хэш не влияет, порядок элементов
+списка — влияет.
+
+В сравнении элементы списков-объектов (outbounds, inbounds, rules, users)
+сопоставляются по tag/id/..., затем по одинаковому содержимому, и
+только оставшиеся — по позиции.
+
+    python -m core.merkle old.json new.json
+    python -m core.merkle --against base.json clients/*.json
+"""
+import bisect
+import sys
+from collections import deque
+from hashlib import blake2b
+
+from .config import load_config
+
+DIGEST_SIZE = 16
+# Поля, по которым сопоставляются элементы списков
+MATCH_KEYS = ("tag", "ruleTag", "id", "email", "address", "name")
+
+
+# ----------------- Хэши -----------------
+def _scalar(value):
+    """Байты скаляра с признаком типа: "1", 1 и true различаются"""
+    if isinstance(value, str):
+        return b"s" + value.encode("utf-8", "surrogatepass")
+    if value is True:
+        return b"T"
+    if value is False:
+        return b"F"
+    if value is None:
+        return b"N"
+    if isinstance(value, int):
+        return b"i" + str(value).encode()
+    return b"f" + repr(value).encode()
+
+
+class MerkleTree:
+    """Хэши контейнеров дерева data с ленивым пересчётом.
+
+    Кэш хранит сам узел вместе с хэшем, поэтому id узла не переиспользуется,
+    пока запись жива. Правки на месте надо сообщать через invalidate().
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self._cache = {}
+
+    def digest(self, node=None):
+        """Хэш узла (по умолчанию — всего конфига)"""
+        node = self.data if node is None else node
+        node_type = type(node)
+        if node_type is not dict and node_type is not list:
+            return blake2b(_scalar(node), digest_size=DIGEST_SIZE).digest()
+        cached = self._cache.get(id(node))
+        if cached is not None and cached[0] is node:
+            return cached[1]
+        parts = []
+        if node_type is dict:
+            parts.append(b"{")
+            for key in sorted(node):
+                value = node[key]
+                value_type = type(value)
+                parts.append(key.encode("utf-8", "surrogatepass"))
+                if value_type is dict or value_type is list:
+                    parts.append(self.digest(value))
+                else:
+                    parts.append(_scalar(value))
+        else:
+            parts.append(b"[")
+            for value in node:
+                value_type = type(value)
+                if value_type is dict or value_type is list:
+                    parts.append(self.digest(value))
+                else:
+                    parts.append(_scalar(value))
+        digest = blake2b(b"\x00".join(parts), digest_size=DIGEST_SIZE).digest()
+        self._cache[id(node)] = (node, digest)
+        return digest
+
+    def invalidate(self, key_path=()):
+        """Сбрасывает хэши узлов по пути от корня до key_path (после правки)"""
+        node = self.data
+        self._cache.pop(id(node), None)
+        for key in key_path:
+            try:
+                node = node[key]
+            except (KeyError, IndexError, TypeError):
+                return
+            self._cache.pop(id(node), None)
+
+    def clear(self):
+        self._cache.clear()
+
+    def diff(self, other):
+        """Изменения от этого дерева к other (см. diff_trees)"""
+        return diff_trees(self, other)
+
+
+# ----------------- Сравнение -----------------
+def item_key(item):
+    """(поле, значение) для сопоставления элемента списка или None"""
+    if type(item) is dict:
+        for field in MATCH_KEYS:
+            value = item.get(field)
+            if isinstance(value, (str, int)) and not isinstance(value, bool) and value != "":
+                return field, value
+    return None
+
+
+def _stable(pairs, fixed=frozenset()):
+    """Множество позиций пар (old, new), не требующих перемещения: наибольшая
+    возрастающая подпоследовательность старых индексов, а из равных по длине —
+    с наибольшим числом позиций из fixed (оставшихся на своём месте)"""
+    size = len(pairs)
+    ranks = {old: rank for rank, old in enumerate(sorted(old for old, _new in pairs), 1)}
+    # Дерево Фенвика по рангам старых индексов: максимум (длина, из fixed, позиция) на префиксе
+    tree = [(0, 0, -1)] * (size + 1)
+    previous = [-1] * size
+    best = (0, 0, -1)
+    for n, (old, _new) in enumerate(pairs):
+        rank = ranks[old]
+        top, k = (0, 0, -1), rank - 1
+        while k > 0:
+            top = max(top, tree[k])
+            k -= k & -k
+        entry = (top[0] + 1, top[1] + (n in fixed), n)
+        previous[n] = top[2]
+        best = max(best, entry)
+        k = rank
+        while k <= size:
+            tree[k] = max(tree[k], entry)
+            k += k & -k
+    stable = set()
+    n = best[2]
+    while n >= 0:
+        stable.add(n)
+        n = previous[n]
+    return stable
+
+
+def _trim(old_tree, new_tree, old, new):
+    """Длины общего начала и конца списков (совпадающих по хэшам элементов)"""
+    limit = min(len(old), len(new))
+    start = 0
+    while start < limit and old_tree.digest(old[start]) == new_tree.digest(new[start]):
+        start += 1
+    end = 0
+    while end < limit - start and old_tree.digest(old[-1 - end]) == new_tree.digest(new[-1 - end]):
+        end += 1
+    return start, end
+
+
+def _match_items(old_tree, new_tree, old, new, start=0, end=0):
+    """Пары индексов (old, new) в порядке new и несопоставленные индексы.
+
+    Сопоставляются только элементы между общим началом start и концом end.
+    """
+    old_range = range(start, len(old) - end)
+    new_range = range(start, len(new) - end)
+    matched = {}
+    old_left = set(old_range)
+
+    # 1. По ключу, если он уникален в обоих списках
+    old_keys, new_keys = {}, {}
+    for i in old_range:
+        old_keys.setdefault(item_key(old[i]), []).append(i)
+    for j in new_range:
+        new_keys.setdefault(item_key(new[j]), []).append(j)
+    for key, new_indices in new_keys.items():
+        old_indices = old_keys.get(key)
+        if key is not None and old_indices and len(old_indices) == 1 and len(new_indices) == 1:
+            matched[new_indices[0]] = old_indices[0]
+            old_left.discard(old_indices[0])
+
+    # 2. По одинаковому содержимому
+    by_digest = {}
+    for i in sorted(old_left):
+        by_digest.setdefault(old_tree.digest(old[i]), deque()).append(i)
+    for j in new_range:
+        if j in matched:
+            continue
+        candidates = by_digest.get(new_tree.digest(new[j]))
+        if candidates:
+            i = candidates.popleft()
+            matched[j] = i
+            old_left.discard(i)
+
+    # 3. Остальные — по позиции среди оставшихся (изменённые на месте)
+    new_left = [j for j in new_range if j not in matched]
+    old_left = sorted(old_left)
+    for i, j in zip(old_left, new_left):
+        matched[j] = i
+    count = min(len(old_left), len(new_left))
+    return sorted(((matched[j], j) for j in matched), key=lambda pair: pair[1]), \
+        old_left[count:], new_left[count:]
+
+
+def diff_trees(old_tree, new_tree, old=None, new=None, path=()):
+    """Изменения от old к new: [(вид, путь, старое, новое)].
+
+    Вид — "changed", "added", "removed" или "moved" (для moved старое и новое —
+    индексы элемента). Путь — в координатах new, для removed — в координатах old.
+    """
+    old = old_tree.data if old is None else old
+    new = new_tree.data if new is None else new
+    changes = []
+    _diff(old_tree, new_tree, old, new, tuple(path), changes)
+    return changes
+
+
+def _diff(old_tree, new_tree, old, new, path, out):
+    old_type, new_type = type(old), type(new)
+    if old_type is new_type and (old_type is dict or old_type is list):
+        if old_tree.digest(old) == new_tree.digest(new):
+            return
+        if old_type is dict:
+            for key, value in old.items():
+                if key not in new:
+                    out.append(("removed", path + (key,), value, None))
+                else:
+                    _diff(old_tree, new_tree, value, new[key], path + (key,), out)
+            for key, value in new.items():
+                if key not in old:
+                    out.append(("added", path + (key,), None, value))
+            return
+        # Общие начало и конец не изменились и остаются на местах
+        start, end = _trim(old_tree, new_tree, old, new)
+        pairs, removed, added = _match_items(old_tree, new_tree, old, new, start, end)
+        # Индекс элемента, сдвинутый только удалёнными и добавленными до него, — не перемещение
+        fixed = {n for n, (i, j) in enumerate(pairs)
+                 if i - bisect.bisect_left(removed, i) + bisect.bisect_left(added, j) == j}
+        stable = _stable(pairs, fixed)
+        for n, (i, j) in enumerate(pairs):
+            if n not in stable and n not in fixed:
+                out.append(("moved", path + (j,), i, j))
+            _diff(old_tree, new_tree, old[i], new[j], path + (j,), out)
+        for i in removed:
+            out.append(("removed", path + (i,), old[i], None))
+        for j in added:
+            out.append(("added", path + (j,), None, new[j]))
+        return
+    if old_type is not new_type or old != new:
+        out.append(("changed", path, old, new))
+
+
+def diff_configs(old, new):
+    """Сравнение двух конфигов (деревья строятся заново)"""
+    return diff_trees(MerkleTree(old), MerkleTree(new))
+
+
+# ----------------- Вывод -----------------
+def format_path(key_path):
+    return ".".join(str(key) for key in key_path) or "(весь конфиг)"
+
+
+def _short(value, limit=80):
+    text = repr(value) if not isinstance(value, str) else f'"{value}"'
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+def format_change(change):
+    kind, key_path, old, new = change
+    path = format_path(key_path)
+    if kind == "changed":
+        return f"~ {path}: {_short(old)} -> {_short(new)}"
+    if kind == "added":
+        return f"+ {path}: {_short(new)}"
+    if kind == "removed":
+        return f"- {path}: {_short(old)}"
+    return f"> {path}: с позиции {old} на {new}"
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Структурное сравнение config.json")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--against", help="сравнить каждый файл с этим (по умолчанию — два файла)")
+    args = parser.parse_args(argv)
+
+    if args.against:
+        base = MerkleTree(load_config(args.against))
+        pairs = [(base, path) for path in args.files]
+    elif len(args.files) == 2:
+        pairs = [(MerkleTree(load_config(args.files[0])), args.files[1])]
+    else:
+        parser.error("нужно два файла или --against")
+
+    status = 0
+    for base, path in pairs:
+        changes = base.diff(MerkleTree(load_config(path)))
+        if len(pairs) > 1:
+            print(f"=== {path}: изменений {len(changes)}")
+        for change in changes:
+            print(format_change(change))
+        status = status or bool(changes)
+    return 1 if status else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
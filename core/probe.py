@@ -0,0 +1,227 @@
+"""Проверка задержки до серверов outbound на asyncio.
+
+Для каждого address:port измеряется время TCP-соединения и, для
+tls/reality, время TLS-рукопожатия с настроенным serverName. Проверки
+идут параллельно с ограничением числа одновременных соединений,
+результаты кэшируются на ttl секунд.
+
+    python -m core.probe config.json [--concurrency 200] [--timeout 3]
+"""
+import asyncio
+import json
+import ssl
+import sys
+import time
+
+from .config import load_config
+from .search import server_entries, stream_server_name
+
+TLS_SECURITY = ("tls", "reality")
+
+
+# ----------------- Сбор адресов -----------------
+def collect_endpoints(config):
+    """Все (address, port) из outbounds: список словарей с индексом и тегом outbound"""
+    endpoints = []
+    for i, outbound in enumerate(config.get("outbounds", [])):
+        if not isinstance(outbound, dict):
+            continue
+        security = (outbound.get("streamSettings") or {}).get("security", "none")
+        server_name = stream_server_name(outbound)
+        for server in server_entries(outbound):
+            if not isinstance(server, dict) or not server.get("address"):
+                continue
+            try:
+                port = int(server.get("port", 443))
+            except (TypeError, ValueError):
+                continue
+            endpoints.append({
+                "outbound": i,
+                "tag": outbound.get("tag", ""),
+                "address": server["address"],
+                "port": port,
+                "server_name": server_name or server["address"],
+                "tls": security in TLS_SECURITY,
+            })
+    return endpoints
+
+
+def endpoint_key(endpoint):
+    return (endpoint["address"], endpoint["port"], endpoint["server_name"] if endpoint["tls"] else None)
+
+
+# ----------------- Кэш -----------------
+class ProbeCache:
+    """Результаты проверок с временем жизни ttl секунд"""
+
+    def __init__(self, ttl=300.0, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self._items = {}
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is None:
+            return None
+        stamp, result = item
+        if self.clock() - stamp > self.ttl:
+            del self._items[key]
+            return None
+        return result
+
+    def put(self, key, result):
+        self._items[key] = (self.clock(), result)
+
+    def clear(self):
+        self._items.clear()
+
+
+# ----------------- Проверка -----------------
+def default_ssl_context():
+    """Контекст без проверки сертификата: измеряется только рукопожатие
+
+    (у reality-серверов сертификат принадлежит маскировочному сайту).
+    """
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+async def probe_endpoint(address, port, server_name=None, tls=False, timeout=3.0, ssl_context=None):
+    """Время TCP connect и TLS handshake в миллисекундах (None, если не измерялось)"""
+    result = {"tcp_ms": None, "tls_ms": None, "error": None}
+    writer = None
+    try:
+        started = time.perf_counter()
+        _reader, writer = await asyncio.wait_for(asyncio.open_connection(address, port), timeout)
+        result["tcp_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+        if tls:
+            started = time.perf_counter()
+            await asyncio.wait_for(
+                writer.start_tls(ssl_context or default_ssl_context(), server_hostname=server_name),
+                timeout,
+            )
+            result["tls_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    except asyncio.TimeoutError:
+        result["error"] = "timeout"
+    except (OSError, ssl.SSLError, UnicodeError, ValueError, TypeError) as e:
+        # UnicodeError — адрес, который не кодируется в IDNA ("a..b"),
+        # TypeError/ValueError — адрес или порт неверного типа
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        if writer is not None:
+            writer.close()
+            try:
+                await asyncio.wait_for(writer.wait_closed(), 1.0)
+            except (asyncio.TimeoutError, OSError, ssl.SSLError):
+                pass
+    return result
+
+
+async def probe_all(endpoints, concurrency=200, timeout=3.0, cache=None, ssl_context=None, progress=None):
+    """Проверяет все адреса параллельно (не более concurrency одновременно).
+
+    Одинаковые адреса проверяются один раз. Возвращает словарь
+    endpoint_key -> результат.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    context = ssl_context or default_ssl_context()
+    unique = {}
+    for endpoint in endpoints:
+        unique.setdefault(endpoint_key(endpoint), endpoint)
+
+    results = {}
+    pending = []
+    for key, endpoint in unique.items():
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            results[key] = cached
+        else:
+            pending.append((key, endpoint))
+
+    done = 0
+
+    async def run(key, endpoint):
+        nonlocal done
+        async with semaphore:
+            result = await probe_endpoint(endpoint["address"], endpoint["port"], endpoint["server_name"],
+                                          endpoint["tls"], timeout, context)
+        results[key] = result
+        if cache is not None:
+            cache.put(key, result)
+        done += 1
+        if progress:
+            progress(done, len(pending))
+
+    await asyncio.gather(*(run(key, endpoint) for key, endpoint in pending))
+    return results
+
+
+def run_probe(config, concurrency=200, timeout=3.0, cache=None, ssl_context=None, progress=None):
+    """Синхронная обёртка: список адресов с полями tcp_ms/tls_ms/error, отсортированный по задержке"""
+    return probe_endpoints(collect_endpoints(config), concurrency, timeout, cache, ssl_context, progress)
+
+
+def probe_endpoints(endpoints, concurrency=200, timeout=3.0, cache=None, ssl_context=None, progress=None):
+    """Как run_probe, но для уже собранного списка адресов"""
+    results = asyncio.run(probe_all(endpoints, concurrency, timeout, cache, ssl_context, progress))
+    for endpoint in endpoints:
+        endpoint.update(results[endpoint_key(endpoint)])
+    endpoints.sort(key=latency_key)
+    return endpoints
+
+
+# ----------------- Сортировка -----------------
+def latency_ms(endpoint):
+    """Полная задержка (TCP + TLS) или None, если сервер недоступен"""
+    if endpoint.get("error") or endpoint.get("tcp_ms") is None:
+        return None
+    return endpoint["tcp_ms"] + (endpoint.get("tls_ms") or 0)
+
+
+def latency_key(endpoint):
+    latency = latency_ms(endpoint)
+    return (latency is None, latency or 0.0)
+
+
+def outbound_latency(endpoints):
+    """Лучшая задержка по каждому outbound: {индекс: мс или None}"""
+    best = {}
+    for endpoint in endpoints:
+        latency = latency_ms(endpoint)
+        i = endpoint["outbound"]
+        if i not in best or (latency is not None and (best[i] is None or latency < best[i])):
+            best[i] = latency
+    return best
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Задержка до серверов outbound из config.json")
+    parser.add_argument("config")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=3.0)
+    parser.add_argument("--json", action="store_true", help="вывод в JSON")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    endpoints = run_probe(load_config(args.config), args.concurrency, args.timeout)
+    elapsed = time.perf_counter() - started
+
+    if args.json:
+        json.dump(endpoints, sys.stdout, ensure_ascii=False, indent=4)
+        print()
+    else:
+        for endpoint in endpoints:
+            latency = latency_ms(endpoint)
+            status = f"{latency:8.1f} ms" if latency is not None else f"{'—':>8}    {endpoint['error']}"
+            print(f"{status}  {endpoint['tag']:<20} {endpoint['address']}:{endpoint['port']}")
+    print(f"Проверено адресов: {len(endpoints)} за {elapsed:.2f} с", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
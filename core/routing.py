@@ -0,0 +1,542 @@
+"""Проверка маршрутизации: в какой outbound попадёт домен или IP.
+
+routing.rules компилируются в общие индексы по всем правилам:
+
+- domain:/full: — дерево по меткам домена в обратном порядке (com -> example -> www);
+- keyword: и строки без префикса — автомат Ахо-Корасик;
+- regexp: — выражения с ^ объединяются в одно, сработавшая ветвь и есть первое
+  правило; остальные проверяются по порядку, если совпал общий фильтр;
+- CIDR — префиксное дерево с шагом 8 бит (IPv4 и IPv6).
+
+Побеждает первое по порядку правило, все условия которого выполнены, как
+в Xray. geosite:/ext: и geoip: (кроме geoip:private) без dat-файлов не
+проверяются и учитываются в stats["unsupported"]. Резолв доменов
+(domainStrategy IPIfNonMatch/IPOnDemand) не выполняется.
+
+    python -m core.routing config.json queries.txt [--field N] [--json]
+"""
+import ipaddress
+import json
+import re
+import socket
+import sys
+import time
+from collections import Counter, deque
+
+from .config import load_config
+
+# Сети geoip:private из набора Xray
+GEOIP_PRIVATE = (
+    "0.0.0.0/8", "10.0.0.0/8", "100.64.0.0/10", "127.0.0.0/8", "169.254.0.0/16",
+    "172.16.0.0/12", "192.0.0.0/24", "192.0.2.0/24", "192.88.99.0/24", "192.168.0.0/16",
+    "198.18.0.0/15", "198.51.100.0/24", "203.0.113.0/24", "224.0.0.0/4", "240.0.0.0/4",
+    "255.255.255.255/32", "::/128", "::1/128", "fc00::/7", "fe80::/10", "ff00::/8",
+)
+
+CACHE_SIZE = 200000
+
+# Условия правила, которые нельзя проверить по одному домену/IP
+CONTEXT_CONDITIONS = ("inboundTag", "source", "sourcePort", "user", "protocol", "attrs", "sourceIP")
+# \1 или (?P=name) в выражении
+BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=")
+
+
+# ----------------- Домены -----------------
+class DomainTrie:
+    """Дерево меток домена в обратном порядке.
+
+    Узел: [дети, правила domain: (домен и поддомены), правила full:]
+    """
+
+    def __init__(self):
+        self.root = [{}, [], []]
+
+    def add(self, domain, value, full=False):
+        node = self.root
+        for label in reversed(domain.split(".")):
+            child = node[0].get(label)
+            if child is None:
+                child = node[0][label] = [{}, [], []]
+            node = child
+        node[2 if full else 1].append(value)
+
+    def match(self, domain, out):
+        node = self.root
+        for label in reversed(domain.split(".")):
+            node = node[0].get(label)
+            if node is None:
+                return
+            if node[1]:
+                out.extend(node[1])
+        if node[2]:
+            out.extend(node[2])
+
+
+class AhoCorasick:
+    """Автомат Ахо-Корасик для поиска всех подстрок-ключевых слов за один проход"""
+
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        self._built = False
+
+    def add(self, word, value):
+        state = 0
+        for char in word:
+            nxt = self.goto[state].get(char)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][char] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = nxt
+        self.output[state].append(value)
+        self._built = False
+
+    def build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fail = self.fail[state]
+                while fail and char not in self.goto[fail]:
+                    fail = self.fail[fail]
+                target = self.goto[fail].get(char, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                # Выходы суффиксного состояния наследуются
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+        self._built = True
+
+    def __bool__(self):
+        return len(self.goto) > 1
+
+    def match(self, text, out):
+        if not self._built:
+            self.build()
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                out.extend(output[state])
+
+
+# ----------------- IP -----------------
+class CidrTree:
+    """Префиксное дерево с шагом 8 бит; префиксы не кратные 8 раскрываются.
+
+    Узел — словарь байт -> [правила, дочерний узел или None].
+    """
+
+    def __init__(self):
+        self.roots = {4: {}, 6: {}}
+        self.any = {4: [], 6: []}
+
+    def add(self, network, value):
+        packed = network.network_address.packed
+        network_version = network.version
+        length = network.prefixlen
+        if length == 0:
+            self.any[network_version].append(value)
+            return
+        node = self.roots[network_version]
+        full, rest = divmod(length, 8)
+        if rest == 0:
+            full, rest = full - 1, 8
+        for byte in packed[:full]:
+            entry = node.get(byte)
+            if entry is None:
+                entry = node[byte] = [[], None]
+            if entry[1] is None:
+                entry[1] = {}
+            node = entry[1]
+        first = packed[full] & (0xFF << (8 - rest)) & 0xFF
+        for byte in range(first, first + (1 << (8 - rest))):
+            entry = node.get(byte)
+            if entry is None:
+                entry = node[byte] = [[], None]
+            entry[0].append(value)
+
+    def match(self, packed, out):
+        """packed — адрес в байтах (4 или 16)"""
+        version = 4 if len(packed) == 4 else 6
+        if self.any[version]:
+            out.extend(self.any[version])
+        node = self.roots[version]
+        for byte in packed:
+            entry = node.get(byte)
+            if entry is None:
+                return
+            if entry[0]:
+                out.extend(entry[0])
+            node = entry[1]
+            if node is None:
+                return
+
+
+# ----------------- Правила -----------------
+def parse_ports(value):
+    """"53,443,1000-2000" или число -> список диапазонов (от, до)"""
+    ranges = []
+    for part in str(value).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        low, _, high = part.partition("-")
+        ranges.append((int(low), int(high or low)))
+    return ranges
+
+
+def pack_ip(text):
+    """IP-адрес в байтах или None, если это не IP (быстрее ipaddress)"""
+    try:
+        if ":" in text:
+            return socket.inet_pton(socket.AF_INET6, text)
+        if text[-1:].isdigit():
+            return socket.inet_pton(socket.AF_INET, text)
+    except OSError:
+        pass
+    return None
+
+
+def as_list(value):
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def parse_target(text):
+    """"example.com", "1.2.3.4", "example.com:443", "[::1]:53" -> (цель, порт или None)"""
+    text = text.strip()
+    port = None
+    if text.startswith("["):
+        host, _, rest = text[1:].partition("]")
+        if rest.startswith(":") and rest[1:].isdigit():
+            port = int(rest[1:])
+        return host, port
+    if text.count(":") == 1:
+        host, _, rest = text.partition(":")
+        if rest.isdigit():
+            return host, int(rest)
+    return text, port
+
+
+class RoutingMatcher:
+    """Скомпилированные routing.rules.
+
+    default_tag — outbound для запросов, не попавших ни под одно правило
+    (в Xray это первый outbound). loose=True игнорирует условия, которые
+    нельзя проверить по одному адресу (inboundTag, source, user, ...).
+    """
+
+    def __init__(self, routing, default_tag=None, loose=False):
+        self.default_tag = default_tag
+        self.loose = loose
+        self.rules = []
+        self.domains = DomainTrie()
+        self.keywords = AhoCorasick()
+        self.regexps = []
+        self.regexp_anchored = None
+        # Индексы regexps в объединённом выражении с ^ (по порядку)
+        self.regexp_anchored_ids = []
+        self.regexp_filter = None
+        # Индексы regexps: без ^ (объединённое выражение — только фильтр)
+        # и проверяемые по одному (с обратными ссылками)
+        self.regexp_unanchored = []
+        self.regexp_separate = []
+        self.cidrs = CidrTree()
+        # Правила без условий domain/ip (только порт/сеть) подходят любому запросу
+        self.generic = []
+        self.stats = Counter()
+        # В логах одни и те же домены повторяются: кэш результатов route()
+        self._cache = {}
+        self._compile(routing or {})
+
+    def _compile(self, routing):
+        for n, rule in enumerate(routing.get("rules") or []):
+            if not isinstance(rule, dict):
+                continue
+            checks = {}
+            if rule.get("port") is not None:
+                try:
+                    checks["port"] = parse_ports(rule["port"])
+                except ValueError:
+                    self.stats["bad_port"] += 1
+                    continue
+            if rule.get("network"):
+                checks["network"] = {net.strip() for net in str(rule["network"]).split(",")}
+            context = [key for key in CONTEXT_CONDITIONS if rule.get(key)]
+            self.rules.append({
+                "index": n,
+                "outboundTag": rule.get("outboundTag"),
+                "balancerTag": rule.get("balancerTag"),
+                "ruleTag": rule.get("ruleTag"),
+                "checks": checks,
+                "context": context,
+                "has_domain": bool(rule.get("domain") or rule.get("domains")),
+                "has_ip": bool(rule.get("ip")),
+            })
+            rule_id = len(self.rules) - 1
+
+            for entry in as_list(rule.get("domain")) + as_list(rule.get("domains")):
+                self._add_domain(rule_id, str(entry))
+            for entry in as_list(rule.get("ip")):
+                self._add_ip(rule_id, str(entry))
+            if not self.rules[rule_id]["has_domain"] and not self.rules[rule_id]["has_ip"]:
+                self.generic.append((rule_id, ""))
+
+        self.stats["rules"] = len(self.rules)
+        if self.keywords:
+            self.keywords.build()
+        if self.regexps:
+            self._compile_regexps()
+
+    def _compile_regexps(self):
+        anchored = []
+        for n, (_rule_id, _entry, pattern) in enumerate(self.regexps):
+            text = pattern.pattern
+            if BACKREFERENCE.search(text):
+                # Номера групп в объединённом выражении сдвигаются
+                self.regexp_separate.append(n)
+            elif text.startswith("^") and "|" not in text:
+                anchored.append(n)
+            else:
+                self.regexp_unanchored.append(n)
+        try:
+            # Один match с начала строки: совпавшая ветвь — первое по порядку выражение
+            self.regexp_anchored = re.compile(
+                "|".join(f"(?P<r{n}>{self.regexps[n][2].pattern[1:]})" for n in anchored)) if anchored else None
+            self.regexp_anchored_ids = anchored
+        except re.error:
+            # Повторяющиеся имена групп, флаги в середине и т.п. — проверяем по одному
+            self.regexp_separate.extend(anchored)
+        try:
+            self.regexp_filter = re.compile(
+                "|".join(f"(?:{self.regexps[n][2].pattern})" for n in self.regexp_unanchored)
+            ) if self.regexp_unanchored else None
+        except re.error:
+            self.regexp_separate.extend(self.regexp_unanchored)
+            self.regexp_unanchored = []
+        self.regexp_separate.sort()
+
+    def _match_regexp(self, domain, accept):
+        """Первое по порядку совпавшее regexp-выражение, правило которого принимает
+        accept(rule_id): (rule_id, entry) или None. Выражения отклонённых правил
+        (порт, сеть, ...) пропускаются, и поиск идёт дальше"""
+        found = len(self.regexps)
+        if self.regexp_anchored is not None:
+            hit = self.regexp_anchored.match(domain)
+            if hit is not None:
+                first = int(hit.lastgroup[1:])
+                if accept(self.regexps[first][0]):
+                    found = first
+                else:
+                    # Объединённое выражение даёт только первую ветвь — следующие по одной
+                    for n in self.regexp_anchored_ids:
+                        if n > first and self.regexps[n][2].match(domain) and accept(self.regexps[n][0]):
+                            found = n
+                            break
+        # Остальные — только если совпало объединённое выражение, по порядку
+        if self.regexp_filter is not None and self.regexp_filter.search(domain):
+            for n in self.regexp_unanchored:
+                if n >= found:
+                    break
+                if self.regexps[n][2].search(domain) and accept(self.regexps[n][0]):
+                    found = n
+                    break
+        for n in self.regexp_separate:
+            if n >= found:
+                break
+            if self.regexps[n][2].search(domain) and accept(self.regexps[n][0]):
+                found = n
+                break
+        return self.regexps[found][:2] if found < len(self.regexps) else None
+
+    def _add_domain(self, rule_id, entry):
+        value = (rule_id, entry)
+        kind, sep, pattern = entry.partition(":")
+        if not sep:
+            kind, pattern = "plain", entry
+        if kind == "domain":
+            self.domains.add(pattern.lower().rstrip("."), value)
+            self.stats["domain"] += 1
+        elif kind == "full":
+            self.domains.add(pattern.lower().rstrip("."), value, full=True)
+            self.stats["full"] += 1
+        elif kind in ("keyword", "plain"):
+            self.keywords.add(pattern.lower(), value)
+            self.stats["keyword"] += 1
+        elif kind == "regexp":
+            try:
+                self.regexps.append((rule_id, entry, re.compile(pattern)))
+                self.stats["regexp"] += 1
+            except re.error:
+                self.stats["bad_regexp"] += 1
+        else:
+            # geosite:, ext: — нужны dat-файлы
+            self.stats["unsupported"] += 1
+
+    def _add_ip(self, rule_id, entry):
+        if entry == "geoip:private":
+            for cidr in GEOIP_PRIVATE:
+                self.cidrs.add(ipaddress.ip_network(cidr), (rule_id, entry))
+            self.stats["cidr"] += 1
+            return
+        if entry.startswith(("geoip:", "ext:", "ext-ip:")):
+            self.stats["unsupported"] += 1
+            return
+        try:
+            self.cidrs.add(ipaddress.ip_network(entry, strict=False), (rule_id, entry))
+            self.stats["cidr"] += 1
+        except ValueError:
+            self.stats["bad_ip"] += 1
+
+    def _accepts(self, rule, is_ip, port, network):
+        if (rule["has_domain"] and is_ip) or (rule["has_ip"] and not is_ip):
+            return False
+        if rule["context"] and not self.loose:
+            return False
+        checks = rule["checks"]
+        if "port" in checks:
+            if port is None or not any(low <= port <= high for low, high in checks["port"]):
+                return False
+        if "network" in checks and network is not None and network not in checks["network"]:
+            return False
+        return True
+
+    def match(self, target, port=None, network=None):
+        """Первое подходящее правило: словарь с rule, outboundTag, matched; None — по умолчанию"""
+        candidates = list(self.generic)
+        address = pack_ip(target)
+
+        if address is not None:
+            self.cidrs.match(address, candidates)
+        else:
+            domain = target.lower().rstrip(".")
+            self.domains.match(domain, candidates)
+            if self.keywords:
+                self.keywords.match(domain, candidates)
+            if self.regexps:
+                found = self._match_regexp(
+                    domain, lambda rule_id: self._accepts(self.rules[rule_id], False, port, network))
+                if found is not None:
+                    candidates.append(found)
+
+        for rule_id, entry in sorted(candidates):
+            rule = self.rules[rule_id]
+            if self._accepts(rule, address is not None, port, network):
+                return {
+                    "rule": rule["index"],
+                    "outboundTag": rule["outboundTag"],
+                    "balancerTag": rule["balancerTag"],
+                    "matched": entry,
+                }
+        return None
+
+    def route(self, text, network=None):
+        """Разбор строки запроса и результат: target, port, rule, outboundTag, matched"""
+        key = (text, network)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        target, port = parse_target(text)
+        result = self.match(target, port, network)
+        if result is None:
+            result = {"rule": None, "outboundTag": self.default_tag, "balancerTag": None, "matched": "default"}
+        result["target"] = target
+        result["port"] = port
+        if len(self._cache) >= CACHE_SIZE:
+            self._cache.clear()
+        self._cache[key] = result
+        return result
+
+
+def compile_config(config, loose=False):
+    """RoutingMatcher для конфига; outbound по умолчанию — первый"""
+    outbounds = config.get("outbounds") or []
+    default_tag = outbounds[0].get("tag") if outbounds and isinstance(outbounds[0], dict) else None
+    return RoutingMatcher(config.get("routing"), default_tag, loose)
+
+
+def read_targets(lines, field=None):
+    """Цели из строк файла: вся строка или поле номер field (с 1) по пробелам"""
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if field is not None:
+            parts = line.split()
+            if len(parts) < field:
+                continue
+            line = parts[field - 1]
+        yield line
+
+
+def route_batch(matcher, targets):
+    """Результаты для всех целей и сводка {outboundTag: число}"""
+    results = [matcher.route(target) for target in targets]
+    summary = Counter(result["outboundTag"] or result["balancerTag"] or "—" for result in results)
+    return results, summary
+
+
+def rule_summary(rule):
+    """Краткое описание условий правила: "domain ×120, ip ×40, port 443" """
+    parts = []
+    for key in ("domain", "domains", "ip"):
+        if rule.get(key):
+            parts.append(f"{key} ×{len(as_list(rule[key]))}")
+    for key in ("port", "network", "protocol", *CONTEXT_CONDITIONS[:2]):
+        if rule.get(key):
+            parts.append(f"{key} {','.join(map(str, as_list(rule[key])))}")
+    return ", ".join(parts) or "любой запрос"
+
+
+def format_result(result):
+    tag = result["outboundTag"] or (f"balancer:{result['balancerTag']}" if result["balancerTag"] else "—")
+    rule = f"#{result['rule']}" if result["rule"] is not None else "—"
+    target = result["target"] if result["port"] is None else f"{result['target']}:{result['port']}"
+    return f"{target}\t{rule}\t{tag}\t{result['matched']}"
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="В какой outbound попадут домены/IP по routing.rules")
+    parser.add_argument("config")
+    parser.add_argument("queries", help="файл с доменами/IP по одному в строке (- для stdin)")
+    parser.add_argument("--field", type=int, help="брать поле номер N строки (например, из DNS-лога)")
+    parser.add_argument("--loose", action="store_true",
+                        help="не учитывать условия inboundTag, source, user и т.п.")
+    parser.add_argument("--json", action="store_true", help="вывод в JSON lines")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    matcher = compile_config(load_config(args.config), args.loose)
+    compiled = time.perf_counter() - started
+
+    source = sys.stdin if args.queries == "-" else open(args.queries, encoding="utf-8", errors="replace")
+    with source:
+        started = time.perf_counter()
+        results, summary = route_batch(matcher, read_targets(source, args.field))
+        elapsed = time.perf_counter() - started
+
+    out = sys.stdout
+    for result in results:
+        out.write((json.dumps(result, ensure_ascii=False) if args.json else format_result(result)) + "\n")
+
+    stats = ", ".join(f"{key}: {value}" for key, value in sorted(matcher.stats.items()))
+    print(f"Правила: {stats}; компиляция {compiled:.2f} с", file=sys.stderr)
+    for tag, count in summary.most_common():
+        print(f"{count:>10}  {tag}", file=sys.stderr)
+    rate = len(results) / elapsed if elapsed else 0
+    print(f"Запросов: {len(results)} за {elapsed:.2f} с ({rate:.0f}/с)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
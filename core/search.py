@@ -0,0 +1,126 @@
+"""Поисковый индекс по outbound-серверам.
+
+Токены (tag, адреса, SNI, publicKey, ID пользователей) хранятся в
+отсортированном списке пар (токен, индекс outbound), поэтому поиск по
+префиксу — это bisect и срез, без перебора всех серверов.
+"""
+import re
+from bisect import bisect_left, insort
+
+from .config import get_nested_value
+
+# Разделители, по которым адреса и теги режутся на дополнительные токены
+TOKEN_SPLIT = re.compile(r"[.\-_:/@\s]+")
+
+
+def server_entries(outbound):
+    """Адресные записи outbound: vnext (vless/vmess), servers (trojan/ss)
+    или сам settings (hysteria: address/port лежат прямо в нём)"""
+    settings = outbound.get("settings") or {}
+    entries = settings.get("vnext") or settings.get("servers")
+    if entries:
+        return entries
+    return [settings] if isinstance(settings, dict) and settings.get("address") else []
+
+
+def stream_server_name(outbound):
+    stream = outbound.get("streamSettings") or {}
+    return (get_nested_value(stream, ["realitySettings", "serverName"])
+            or get_nested_value(stream, ["tlsSettings", "serverName"]))
+
+
+def outbound_terms(outbound):
+    """Строки outbound, по которым возможен поиск"""
+    if not isinstance(outbound, dict):
+        return []
+    terms = [outbound.get("tag"), stream_server_name(outbound),
+             get_nested_value(outbound, ["streamSettings", "realitySettings", "publicKey"])]
+    for server in server_entries(outbound):
+        if not isinstance(server, dict):
+            continue
+        terms.append(server.get("address"))
+        for user in server.get("users") or ():
+            if isinstance(user, dict):
+                terms.append(user.get("id"))
+    return [str(term) for term in terms if term not in (None, "")]
+
+
+def tokenize(terms):
+    tokens = set()
+    for term in terms:
+        term = term.lower()
+        tokens.add(term)
+        tokens.update(part for part in TOKEN_SPLIT.split(term) if part)
+    return tokens
+
+
+class ServerSearchIndex:
+    """Инвертированный префиксный индекс outbound по tag/address/SNI/publicKey/ID"""
+
+    def __init__(self, outbounds=()):
+        self._tokens = {}
+        pairs = []
+        for i, outbound in enumerate(outbounds):
+            tokens = tokenize(outbound_terms(outbound))
+            self._tokens[i] = tokens
+            pairs.extend((token, i) for token in tokens)
+        pairs.sort()
+        self._pairs = pairs
+
+    def __len__(self):
+        return len(self._tokens)
+
+    # ----------------- Изменения -----------------
+    def remove(self, index):
+        for token in self._tokens.pop(index, ()):
+            pos = bisect_left(self._pairs, (token, index))
+            if pos < len(self._pairs) and self._pairs[pos] == (token, index):
+                del self._pairs[pos]
+
+    def update(self, index, outbound):
+        """Переиндексирует один outbound после правки"""
+        self.remove(index)
+        tokens = tokenize(outbound_terms(outbound))
+        self._tokens[index] = tokens
+        for token in tokens:
+            insort(self._pairs, (token, index))
+
+    def add_many(self, items):
+        """Переиндексирует пары (индекс, outbound) одной сортировкой — для импорта.
+
+        Вставка по одному (update) сдвигает весь список на каждый токен, и
+        импорт тысяч серверов становится квадратичным; здесь — extend и sort,
+        который на уже упорядоченном хвосте почти линеен.
+        """
+        pairs = []
+        for index, outbound in items:
+            self.remove(index)
+            tokens = tokenize(outbound_terms(outbound))
+            self._tokens[index] = tokens
+            pairs.extend((token, index) for token in tokens)
+        self._pairs.extend(pairs)
+        self._pairs.sort()
+
+    # ----------------- Поиск -----------------
+    def _prefix(self, prefix):
+        pairs = self._pairs
+        start = bisect_left(pairs, (prefix,))
+        end = bisect_left(pairs, (prefix + "\U0010ffff",), start)
+        return {index for _token, index in pairs[start:end]}
+
+    def search(self, query):
+        """Индексы outbound, у которых каждое слово запроса — префикс какого-либо токена.
+
+        Пустой запрос возвращает None (фильтр не применяется).
+        """
+        words = [word for word in query.lower().split() if word]
+        if not words:
+            return None
+        result = None
+        # Сначала самые длинные (обычно самые избирательные) слова
+        for word in sorted(words, key=len, reverse=True):
+            matches = self._prefix(word)
+            result = matches if result is None else result & matches
+            if not result:
+                break
+        return result
@@ -0,0 +1,304 @@
+"""Чтение и запись JSON с быстрым бэкендом.
+
+Если установлен orjson, разбор и запись идут через него, иначе — через
+стандартный json. Вывод в режиме "pretty" байт-в-байт совпадает с
+json.dumps(data, indent=4, ensure_ascii=False), поэтому смена бэкенда не
+меняет сохраняемые файлы.
+
+    python -m core.serialize *.json --out DIR [--format gzip]   экспорт
+    python -m core.serialize *.json --check                     сравнение со stdlib
+
+Модули сжатия и разбора аргументов импортируются при первом использовании:
+чтение и запись конфига их не требуют.
+"""
+import json
+import os
+import sys
+import time
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+# Формат экспорта -> (режим JSON, сжатие, расширение)
+FORMATS = {
+    "pretty": ("pretty", None, ".json"),
+    "minified": ("minified", None, ".min.json"),
+    "gzip": ("minified", "gzip", ".json.gz"),
+    "zstd": ("minified", "zstd", ".json.zst"),
+}
+
+INDENT = b"    "
+# До какой глубины поток режется на части: верхний уровень и секции
+# (outbounds, inbounds, rules), дальше элементы кодируются пачками
+STREAM_DEPTH = 2
+SLICE = 256
+
+
+# ----------------- Разбор -----------------
+def loads(data):
+    """Разбирает JSON из bytes/str"""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # Числа вне int64, NaN и т.п. orjson не принимает — stdlib даст
+            # либо результат, либо привычное сообщение об ошибке
+            pass
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = bytes(data).decode("utf-8")
+    return json.loads(data)
+
+
+# ----------------- Запись -----------------
+def stdlib_dumps(data, mode="pretty"):
+    """Эталонный вывод стандартного json"""
+    if mode == "pretty":
+        text = json.dumps(data, indent=4, ensure_ascii=False)
+    else:
+        text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    return text.encode("utf-8")
+
+
+def has_floats(data):
+    """True, если в дереве есть float (их запись у orjson и stdlib различается)"""
+    if type(data) is float:
+        return True
+    if not isinstance(data, (dict, list)):
+        return False
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        values = value.values() if isinstance(value, dict) else value
+        for item in values:
+            kind = type(item)
+            if kind is float:
+                return True
+            if kind is dict or kind is list:
+                stack.append(item)
+    return False
+
+
+def _reindent(out, minified):
+    """Отступ orjson (2 пробела) -> 4 пробела, как у stdlib.
+
+    Если ни в одной строке нет двух пробелов подряд (в минимизированном
+    выводе пробелы есть только внутри строк), все пары пробелов — это
+    отступ и удваиваются одной заменой. Иначе проход d добавляет 2 пробела
+    строкам глубины >= d: после d-1 проходов такие строки начинаются
+    с 4d-2 пробелов или больше, а строки меньшей глубины — не больше чем с 4d-4.
+    """
+    if b"  " not in minified:
+        return out.replace(b"  ", b"    ")
+    depth = 1
+    while True:
+        pattern = b"\n" + b" " * (4 * depth - 2)
+        if pattern not in out:
+            return out
+        out = out.replace(pattern, pattern + b"  ")
+        depth += 1
+
+
+def _encode(data, mode, fast):
+    if fast:
+        try:
+            minified = orjson.dumps(data)
+            if mode == "pretty":
+                return _reindent(orjson.dumps(data, option=orjson.OPT_INDENT_2), minified)
+            return minified
+        except (orjson.JSONEncodeError, TypeError):
+            # Нестроковые ключи, int вне 64 бит — остаётся stdlib
+            pass
+    return stdlib_dumps(data, mode)
+
+
+def _use_fast(data):
+    return orjson is not None and not has_floats(data)
+
+
+def dumps(data, mode="pretty"):
+    """JSON в bytes; mode — "pretty" (отступ 4) или "minified"."""
+    return b"".join(iterencode(data, mode))
+
+
+def _key(key):
+    # Ключи как у stdlib: int/float/bool/None приводятся к строке
+    if not isinstance(key, str):
+        key = json.dumps(key)
+    return json.dumps(key, ensure_ascii=False).encode("utf-8")
+
+
+def iterencode(data, mode="pretty", depth=STREAM_DEPTH):
+    """Генератор частей JSON (bytes) для потоковой записи.
+
+    Верхние depth уровней раскладываются по ключам, элементы списков
+    кодируются пачками по SLICE, поэтому в памяти одновременно только одна
+    часть. Склеенный результат совпадает с выводом stdlib.
+    """
+    return _iterencode(data, mode, depth, 0, _use_fast(data))
+
+
+def _indent(chunk, level):
+    return chunk.replace(b"\n", b"\n" + INDENT * level) if level else chunk
+
+
+def _iterencode(data, mode, depth, level, fast):
+    pretty = mode == "pretty"
+    if depth <= 0 or not isinstance(data, (dict, list)) or not data:
+        chunk = _encode(data, mode, fast)
+        yield _indent(chunk, level) if pretty else chunk
+        return
+
+    inner = b"\n" + INDENT * (level + 1) if pretty else b""
+    separator = b"," + inner
+    if isinstance(data, list):
+        yield b"[" + inner
+        for start in range(0, len(data), SLICE):
+            if start:
+                yield separator
+            if depth > 1:
+                for n, item in enumerate(data[start:start + SLICE]):
+                    if n:
+                        yield separator
+                    yield from _iterencode(item, mode, depth - 1, level + 1, fast)
+            else:
+                # Пачка кодируется как список; скобки отрезаются
+                chunk = _encode(data[start:start + SLICE], mode, fast)
+                yield _indent(chunk[2 + len(INDENT):-2], level) if pretty else chunk[1:-1]
+        yield (b"\n" + INDENT * level if pretty else b"") + b"]"
+        return
+
+    yield b"{" + inner
+    first = True
+    for key, value in data.items():
+        if not first:
+            yield separator
+        first = False
+        yield _key(key) + (b": " if pretty else b":")
+        yield from _iterencode(value, mode, depth - 1, level + 1, fast)
+    yield (b"\n" + INDENT * level if pretty else b"") + b"}"
+
+
+def write_stream(data, f, mode="pretty", buffer_size=1 << 16):
+    """Пишет JSON в бинарный файловый объект частями по ~buffer_size байт"""
+    buffer = []
+    size = 0
+    for chunk in iterencode(data, mode):
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= buffer_size:
+            f.write(b"".join(buffer))
+            buffer.clear()
+            size = 0
+    if buffer:
+        f.write(b"".join(buffer))
+
+
+def _zstandard():
+    """Необязательный пакет zstandard или None"""
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def _zstd_compressor():
+    zstandard = _zstandard()
+    if zstandard is None:
+        raise ValueError("Для сжатия zstd установите пакет zstandard")
+    return zstandard.ZstdCompressor(level=3)
+
+
+def open_compressed(path, compression):
+    """Бинарный файл для записи с нужным сжатием (None, "gzip", "zstd")"""
+    if compression is None:
+        return open(path, "wb")
+    if compression == "gzip":
+        import gzip
+
+        return gzip.open(path, "wb", compresslevel=6)
+    if compression == "zstd":
+        return _zstd_compressor().stream_writer(open(path, "wb"), closefd=True)
+    raise ValueError(f"Неизвестное сжатие: {compression}")
+
+
+def compress(data, compression):
+    """Сжатые байты (compression как в open_compressed)"""
+    if compression is None:
+        return data
+    if compression == "gzip":
+        import gzip
+
+        return gzip.compress(data, compresslevel=6)
+    if compression == "zstd":
+        return _zstd_compressor().compress(data)
+    raise ValueError(f"Неизвестное сжатие: {compression}")
+
+
+def encode(data, fmt="pretty"):
+    """(JSON в bytes, функция сжатия) для формата из FORMATS: сжатие можно
+    выполнить в другом потоке, когда снимок данных уже снят"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Неизвестный формат: {fmt}")
+    mode, compression, _suffix = FORMATS[fmt]
+    return dumps(data, mode), lambda raw: compress(raw, compression)
+
+
+def export(path, data, fmt="pretty"):
+    """Экспорт конфига в формате из FORMATS (потоково, без полной строки в памяти)"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Неизвестный формат: {fmt}")
+    mode, compression, _suffix = FORMATS[fmt]
+    with open_compressed(path, compression) as f:
+        write_stream(data, f, mode)
+
+
+def available_formats():
+    return [fmt for fmt, (_mode, compression, _suffix) in FORMATS.items()
+            if compression != "zstd" or _zstandard() is not None]
+
+
+# ----------------- Проверка -----------------
+def check_roundtrip(data):
+    """True, если pretty-вывод совпадает со stdlib байт-в-байт и разбирается обратно"""
+    fast = dumps(data, "pretty")
+    return fast == stdlib_dumps(data, "pretty") and loads(fast) == data
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Экспорт конфигов и проверка совпадения вывода с json stdlib")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--check", action="store_true", help="сравнить pretty-вывод со stdlib байт-в-байт")
+    parser.add_argument("--out", help="каталог для экспорта")
+    parser.add_argument("--format", choices=available_formats(), default="pretty")
+    args = parser.parse_args(argv)
+    if not args.check and not args.out:
+        parser.error("укажите --check и/или --out")
+
+    started = time.perf_counter()
+    failed = 0
+    for path in args.files:
+        with open(path, "rb") as f:
+            data = loads(f.read())
+        if args.check:
+            ok = check_roundtrip(data)
+            failed += not ok
+            print(f"{'OK  ' if ok else 'DIFF'} {path}")
+        if args.out:
+            name = os.path.basename(path)
+            name = name[:-len(".json")] if name.endswith(".json") else name
+            export(os.path.join(args.out, name + FORMATS[args.format][2]), data, args.format)
+    elapsed = time.perf_counter() - started
+    print(f"Бэкенд: {BACKEND}; файлов: {len(args.files)} за {elapsed:.2f} с; расхождений: {failed}",
+          file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
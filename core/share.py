@@ -0,0 +1,356 @@
+"""Раздача: ссылки и QR-коды для всех outbound и пользователей конфига.
+
+Для каждого outbound поддерживаемого протокола (core.links) строится по
+ссылке на каждый сервер и пользователя; QR-коды рисуются в SVG пакетом
+qrcode (необязательный: без него выдаются только ссылки) в пуле процессов.
+Результат кэшируется по хэшу содержимого outbound (core.merkle), поэтому
+после правки заново рисуются только изменённые серверы.
+
+    python -m core.share config.json --out share/
+    python -m core.share config.json --zip share.zip --workers 8
+"""
+import os
+import re
+import sys
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from .config import get_nested_value, load_config
+from .links import PROTOCOL_FIELDS, LinkError, format_link, link_targets, target_path
+from .merkle import MerkleTree
+from .serialize import dumps, loads
+from .storage import same_content
+
+# Меньше стольких outbound с QR рисуются в текущем процессе: пул дороже
+PARALLEL_MIN = 16
+# Записей кэша в памяти и на диске; с диска сверх предела удаляются давно не читанные
+MEMORY_ENTRIES = 2000
+DISK_ENTRIES = 20000
+
+
+def _qrcode():
+    """Необязательный пакет qrcode (импорт при первой отрисовке) или None"""
+    try:
+        import qrcode
+        import qrcode.image.svg
+    except ImportError:
+        return None
+    return qrcode
+
+
+def default_cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "xray-editor" / "share"
+
+
+# ----------------- Кэш -----------------
+class ShareCache:
+    """Ссылки и QR по ключу содержимого outbound: в памяти и, если задан каталог, на диске.
+
+    В ссылках — ID и пароли, поэтому каталог создаётся с правами 0700, файлы — 0600.
+    """
+
+    def __init__(self, directory=None, limit=MEMORY_ENTRIES, disk_limit=DISK_ENTRIES):
+        self.directory = Path(directory) if directory is not None else None
+        self.limit = limit
+        self.disk_limit = disk_limit
+        self._items = OrderedDict()
+        # Файлов в каталоге; считается при первой записи
+        self._disk_count = None
+
+    def get(self, key):
+        items = self._items.get(key)
+        if items is not None:
+            self._items.move_to_end(key)
+            return items
+        if self.directory is None:
+            return None
+        path = self.directory / f"{key}.json"
+        try:
+            items = loads(path.read_bytes())
+            # mtime — время последнего чтения: по нему вытесняются старые файлы
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        self._remember(key, items)
+        return items
+
+    def put(self, key, items):
+        self._remember(key, items)
+        if self.directory is not None:
+            try:
+                self._write(self.directory / f"{key}.json", dumps(items, "minified"))
+            except OSError:
+                # Кэш не обязателен: без записи на диск просто нарисуем заново
+                pass
+
+    def _write(self, path, data):
+        if self._disk_count is None:
+            self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+            self._disk_count = sum(1 for name in os.listdir(self.directory) if name.endswith(".json"))
+        exists = path.exists()
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        if not exists:
+            self._disk_count += 1
+            if self._disk_count > self.disk_limit:
+                self._prune()
+
+    def _prune(self):
+        """Удаляет давно не читанные файлы, оставляя 90% предела"""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                try:
+                    entries.append((entry.stat().st_mtime_ns, entry.path))
+                except OSError:
+                    pass
+        entries.sort()
+        keep = self.disk_limit * 9 // 10
+        for _mtime, path in entries[:max(0, len(entries) - keep)]:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        self._disk_count = min(len(entries), keep)
+
+    def _remember(self, key, items):
+        self._items[key] = items
+        self._items.move_to_end(key)
+        while len(self._items) > self.limit:
+            self._items.popitem(last=False)
+
+
+def cache_key(outbound_digest, qr):
+    return outbound_digest.hex() + ("-qr" if qr else "")
+
+
+# ----------------- Ссылки и QR -----------------
+def item_name(outbound, server, user, targets):
+    """Имя ссылки: тег, для нескольких пользователей — с email или номером"""
+    tag = str(outbound.get("tag") or outbound.get("protocol"))
+    path = PROTOCOL_FIELDS[outbound["protocol"]].credential_path
+    slots = [n for n, key in enumerate(path) if type(key) is int]
+    entry = get_nested_value(outbound, target_path(path[:slots[-1] + 1], server, user)) if slots else None
+    email = entry.get("email") if isinstance(entry, dict) else None
+    if email:
+        return f"{tag} {email}"
+    if len(targets) > 1:
+        return f"{tag} {server + 1}.{user + 1}"
+    return tag
+
+
+def render_qr(link):
+    """SVG с QR-кодом ссылки"""
+    qrcode = _qrcode()
+    image = qrcode.make(link, image_factory=qrcode.image.svg.SvgPathImage, border=2)
+    return image.to_string(encoding="unicode")
+
+
+def render_outbound(outbound, qr=True):
+    """[{"name", "link", "svg"} или {"name", "error"}] для всех серверов и пользователей"""
+    targets = link_targets(outbound)
+    items = []
+    for server, user in targets:
+        name = item_name(outbound, server, user, targets)
+        try:
+            link = format_link(outbound, server, user, name)
+        except LinkError as e:
+            items.append({"name": name, "error": str(e)})
+            continue
+        item = {"name": name, "link": link}
+        if qr:
+            item["svg"] = render_qr(link)
+        items.append(item)
+    return items
+
+
+def _render_job(job):
+    index, key, outbound, qr = job
+    return index, key, render_outbound(outbound, qr)
+
+
+def _run(jobs, workers, qr, progress):
+    if not qr or len(jobs) < PARALLEL_MIN or workers == 1:
+        for n, job in enumerate(jobs, 1):
+            yield _render_job(job)
+            if progress:
+                progress(n, len(jobs))
+        return
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(jobs) // (workers * 8))
+    # Вызывается и из потока GUI: fork процесса с потоками Qt небезопасен
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        for n, result in enumerate(pool.map(_render_job, jobs, chunksize=chunksize), 1):
+            yield result
+            if progress:
+                progress(n, len(jobs))
+
+
+def generate(outbounds, qr=True, cache=None, workers=None, progress=None):
+    """Ссылки (и QR) для всех outbound: (элементы по порядку outbounds, статистика).
+
+    Элемент — словарь name, tag, link, svg (если qr) или error. progress(done,
+    total) вызывается по мере отрисовки некэшированных outbound.
+    """
+    started = time.perf_counter()
+    qr = qr and _qrcode() is not None
+    tree = MerkleTree(outbounds)
+    results = {}
+    jobs = []
+    stats = {"outbounds": 0, "links": 0, "errors": 0, "cached": 0, "rendered": 0, "qr": qr}
+    for i, outbound in enumerate(outbounds):
+        if not isinstance(outbound, dict) or outbound.get("protocol") not in PROTOCOL_FIELDS:
+            continue
+        stats["outbounds"] += 1
+        key = cache_key(tree.digest(outbound), qr)
+        items = cache.get(key) if cache is not None else None
+        if items is not None:
+            results[i] = items
+            stats["cached"] += 1
+        else:
+            jobs.append((i, key, outbound, qr))
+
+    for i, key, items in _run(jobs, workers, qr, progress):
+        results[i] = items
+        stats["rendered"] += 1
+        if cache is not None:
+            cache.put(key, items)
+
+    ordered = []
+    for i in sorted(results):
+        tag = outbounds[i].get("tag", "")
+        for item in results[i]:
+            ordered.append({"tag": tag, **item})
+            stats["errors" if "error" in item else "links"] += 1
+    stats["elapsed_s"] = round(time.perf_counter() - started, 3)
+    return ordered, stats
+
+
+# ----------------- Экспорт -----------------
+def safe_name(name, used):
+    """Имя файла без служебных символов, уникальное в used"""
+    base = re.sub(r"[^\w.@-]+", "_", name).strip("._")[:100] or "link"
+    candidate, n = base, 1
+    while candidate.lower() in used:
+        n += 1
+        candidate = f"{base}-{n}"
+    used.add(candidate.lower())
+    return candidate
+
+
+def export_files(items):
+    """(имя файла, байты): links.txt, links.tsv и qr/<имя>.svg"""
+    links = [item for item in items if "link" in item]
+    used = set()
+    table = ["name\ttag\tlink\tqr"]
+    svgs = []
+    for item in links:
+        filename = f"qr/{safe_name(item['name'], used)}.svg" if "svg" in item else ""
+        table.append(f"{item['name']}\t{item['tag']}\t{item['link']}\t{filename}")
+        if filename:
+            svgs.append((filename, item["svg"].encode("utf-8")))
+    yield "links.txt", "".join(item["link"] + "\n" for item in links).encode("utf-8")
+    yield "links.tsv", ("\n".join(table) + "\n").encode("utf-8")
+    yield from svgs
+
+
+def previous_qr_files(directory):
+    """Имена qr/*.svg из прошлого links.tsv в каталоге: только их экспорт считает своими"""
+    try:
+        lines = (Path(directory) / "links.tsv").read_text(encoding="utf-8").splitlines()
+    except (OSError, UnicodeDecodeError):
+        return set()
+    names = set()
+    for line in lines[1:]:
+        filename = line.rsplit("\t", 1)[-1]
+        if filename.startswith("qr/") and filename.endswith(".svg") and "/" not in filename[3:]:
+            names.add(filename)
+    return names
+
+
+def export_dir(items, directory):
+    """Пишет файлы в каталог; неизменившиеся не перезаписываются, QR удалённых
+    серверов из прошлого экспорта удаляются (чужие файлы в qr/ не трогаются).
+    Возвращает число записанных"""
+    directory = Path(directory)
+    previous = previous_qr_files(directory)
+    written = 0
+    current = set()
+    for filename, data in export_files(items):
+        path = directory / filename
+        current.add(filename)
+        if same_content(path, data):
+            continue
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        written += 1
+    for filename in previous - current:
+        try:
+            (directory / filename).unlink()
+        except FileNotFoundError:
+            pass
+    return written
+
+
+def export_zip(items, path):
+    """Один архив со всеми файлами; старый архив заменяется только готовым новым"""
+    import tempfile
+    import zipfile
+
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f, zipfile.ZipFile(f, "w", zipfile.ZIP_DEFLATED) as archive:
+            for filename, data in export_files(items):
+                archive.writestr(filename, data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def export(items, target):
+    """В архив, если target оканчивается на .zip, иначе в каталог"""
+    if str(target).lower().endswith(".zip"):
+        export_zip(items, target)
+    else:
+        export_dir(items, target)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ссылки и QR-коды для всех outbound конфига")
+    parser.add_argument("config")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--out", help="каталог для links.txt, links.tsv и qr/*.svg")
+    target.add_argument("--zip", help="то же одним архивом")
+    parser.add_argument("--no-qr", action="store_true", help="только ссылки")
+    parser.add_argument("--workers", type=int, help="процессов для QR (по умолчанию — по числу ядер)")
+    parser.add_argument("--cache", default=str(default_cache_dir()), help="каталог кэша")
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args(argv)
+
+    if not args.no_qr and _qrcode() is None:
+        print("Пакет qrcode не установлен — только ссылки (pip install qrcode)", file=sys.stderr)
+    cache = None if args.no_cache else ShareCache(args.cache)
+    config = load_config(args.config)
+    items, stats = generate(config.get("outbounds", []), not args.no_qr, cache, args.workers)
+    export(items, args.zip or args.out)
+    for item in items:
+        if "error" in item:
+            print(f"{item['name']}: {item['error']}", file=sys.stderr)
+    print(f"outbound: {stats['outbounds']}, ссылок: {stats['links']}, ошибок: {stats['errors']}, "
+          f"из кэша: {stats['cached']}, заново: {stats['rendered']}, {stats['elapsed_s']} с", file=sys.stderr)
+    return 1 if stats["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+import os
+
+# Политики сброса на диск: без fsync, fsync файла, файла и каталога
+FSYNC_POLICIES = ("none", "file", "dir")
+
+
+# ----------------- Атомарная запись -----------------
+def same_content(path, data):
+    """True, если файл уже содержит ровно эти байты"""
+    try:
+        if os.path.getsize(path) != len(data):
+            return False
+        with open(path, "rb") as f:
+            return f.read() == data
+    except OSError:
+        return False
+
+
+def fsync_dir(directory):
+    """Сбрасывает на диск запись каталога (после rename), где это возможно"""
+    if os.name != "posix":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path, data, skip_unchanged=True, fsync="dir"):
+    """Записывает байты через временный файл, fsync и rename.
+
+    При сбое на диске остаётся либо старая, либо новая версия файла,
+    но не обрезанная. fsync — "dir" (файл и каталог), "file" (только файл:
+    после сбоя питания rename может не сохраниться) или "none" (без сброса,
+    быстрее всего). Возвращает False, если запись пропущена, так как
+    содержимое не изменилось.
+    """
+    if fsync not in FSYNC_POLICIES:
+        raise ValueError(f"Неизвестная политика fsync: {fsync}")
+    path = os.fspath(path)
+    if skip_unchanged and same_content(path, data):
+        return False
+
+    # tempfile тянет random и shutil — импорт откладывается до первой записи
+    import tempfile
+
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            if fsync != "none":
+                os.fsync(f.fileno())
+        try:
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+        except FileNotFoundError:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    if fsync == "dir":
+        fsync_dir(directory)
+    return True
@@ -0,0 +1,103 @@
+"""Импорт подписок: base64-блоб (или обычный текст) со ссылками любых
+схем из core.links (vless://, vmess://, trojan://, ss://, hy2://).
+
+Все ссылки разбираются за один проход по строкам, дубликаты отсекаются
+по ключу (host, port, id/пароль, sni) через словарь.
+"""
+import base64
+import binascii
+import time
+
+from .links import SCHEMES, LinkError, link_scheme, outbound_key, parse_link
+
+
+# ----------------- Декодирование -----------------
+def decode_subscription(blob):
+    """Возвращает текст подписки: декодирует base64 или отдаёт как есть"""
+    if isinstance(blob, bytes):
+        raw = blob.strip()
+    else:
+        raw = blob.strip().encode("utf-8")
+
+    if b"://" in raw[:64]:
+        # Уже обычный текст со ссылками
+        return raw.decode("utf-8", errors="replace")
+
+    compact = b"".join(raw.split())
+    compact += b"=" * (-len(compact) % 4)
+    try:
+        if b"-" in compact or b"_" in compact:
+            decoded = base64.urlsafe_b64decode(compact)
+        else:
+            decoded = base64.b64decode(compact)
+    except (binascii.Error, ValueError):
+        return raw.decode("utf-8", errors="replace")
+    return decoded.decode("utf-8", errors="replace")
+
+
+def unique_tag(base, used, counters):
+    """Тег, не совпадающий с уже занятыми; counters хранит следующий номер для base"""
+    base = base or "proxy"
+    tag = base
+    n = counters.get(base, 1)
+    while tag in used:
+        n += 1
+        tag = f"{base}-{n}"
+    counters[base] = n
+    used.add(tag)
+    return tag
+
+
+# ----------------- Импорт -----------------
+def parse_subscription(text, tag_prefix="sub", used_tags=(), known_keys=()):
+    """Разбирает все ссылки подписки за один проход.
+
+    Возвращает (outbounds, stats); stats содержит счётчики и скорость
+    разбора в ссылках в секунду.
+    """
+    started = time.perf_counter()
+    seen = set(known_keys)
+    used = set(used_tags)
+    counters = {}
+    outbounds = []
+    stats = {"links": 0, "unique": 0, "duplicates": 0, "errors": 0, "skipped": 0}
+
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if link_scheme(line) not in SCHEMES:
+            stats["skipped"] += 1
+            continue
+        stats["links"] += 1
+        try:
+            link = parse_link(line)
+        except LinkError:
+            stats["errors"] += 1
+            continue
+
+        key = link.server_key()
+        if key in seen:
+            stats["duplicates"] += 1
+            continue
+        seen.add(key)
+
+        name = link.name or f"{link.params['address']}:{link.params['port']}"
+        tag = unique_tag(f"{tag_prefix}-{name}" if tag_prefix else name, used, counters)
+        outbounds.append(link.to_outbound(tag))
+
+    stats["unique"] = len(outbounds)
+    elapsed = time.perf_counter() - started
+    stats["elapsed_s"] = round(elapsed, 4)
+    stats["links_per_s"] = int(stats["links"] / elapsed) if elapsed > 0 else stats["links"]
+    return outbounds, stats
+
+
+def import_subscription(config, blob, tag_prefix="sub"):
+    """Добавляет в config по одному outbound на уникальный сервер подписки"""
+    outbounds = config.setdefault("outbounds", [])
+    used = {o.get("tag") for o in outbounds if isinstance(o, dict)}
+    known = {outbound_key(o) for o in outbounds if isinstance(o, dict)}
+    new_outbounds, stats = parse_subscription(decode_subscription(blob), tag_prefix, used, known)
+    outbounds.extend(new_outbounds)
+    return new_outbounds, stats
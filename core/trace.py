@@ -0,0 +1,245 @@
+"""Лёгкий трассировщик участков кода для отчётов о медленной работе.
+
+Включается переменной окружения XRAY_EDITOR_TRACE (путь к файлу или 1):
+
+    XRAY_EDITOR_TRACE=trace.json python main.py
+
+При выходе пишется trace.json в формате Chrome trace (открывается в
+chrome://tracing и ui.perfetto.dev) и trace.summary.txt со сводкой:
+число вызовов, p50/p99/max и последние значения счётчиков (виджеты).
+
+Без переменной traced() возвращает функцию без обёртки, а span() —
+общий пустой контекст, поэтому выключенный трассировщик ничего не стоит.
+
+    python -m core.trace trace.json      # сводка по готовому файлу
+"""
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from functools import wraps
+
+DEFAULT_PATH = "xray_editor_trace.json"
+# Дальше события не хранятся (сводка считается по всем)
+MAX_EVENTS = 1000000
+
+
+def trace_path():
+    """Файл трассы из XRAY_EDITOR_TRACE или None, если трассировка выключена"""
+    value = os.environ.get("XRAY_EDITOR_TRACE", "").strip()
+    if not value or value == "0":
+        return None
+    return DEFAULT_PATH if value == "1" else value
+
+
+class Tracer:
+    """Накопитель завершённых участков (name, начало, длительность) и счётчиков"""
+
+    def __init__(self):
+        self.origin = time.perf_counter_ns()
+        self.pid = os.getpid()
+        self.events = []
+        self.durations = {}
+        self.counters = {}
+        self.dropped = 0
+
+    def add(self, name, start, end, args=None):
+        """Завершённый участок; start/end — из now()"""
+        duration = end - start
+        durations = self.durations.get(name)
+        if durations is None:
+            durations = self.durations[name] = []
+        durations.append(duration)
+        if len(self.events) >= MAX_EVENTS:
+            self.dropped += 1
+            return
+        self.events.append(("X", name, start, duration, threading.get_ident(), args))
+
+    def counter(self, name, values):
+        """Значения счётчика в текущий момент, например {"inputs": 120}"""
+        self.counters[name] = dict(values)
+        if len(self.events) < MAX_EVENTS:
+            self.events.append(("C", name, time.perf_counter_ns(), 0, threading.get_ident(), dict(values)))
+
+    def chrome_events(self):
+        threads = {}
+        result = []
+        for phase, name, start, duration, thread, args in self.events:
+            tid = threads.setdefault(thread, len(threads) + 1)
+            event = {"name": name, "ph": phase, "ts": (start - self.origin) / 1000, "pid": self.pid, "tid": tid}
+            if phase == "X":
+                event["dur"] = duration / 1000
+            if args:
+                event["args"] = args
+            result.append(event)
+        return result
+
+    def summary(self):
+        """{name: {count, total_ms, p50_ms, p99_ms, max_ms}} по убыванию общего времени"""
+        return summarize(self.durations)
+
+    def dump(self, path):
+        """Пишет трассу и сводку рядом с ней; возвращает путь сводки"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.chrome_events(), "displayTimeUnit": "ms"}, f)
+        summary_path = os.path.splitext(path)[0] + ".summary.txt"
+        with open(summary_path, "w", encoding="utf-8") as f:
+            f.write(format_summary(self.summary(), self.counters, self.dropped))
+        return summary_path
+
+
+# ----------------- Сводка -----------------
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0
+    rank = max(int(len(sorted_values) * fraction + 0.5) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(durations):
+    """Сводка по длительностям в наносекундах"""
+    result = {}
+    for name, values in durations.items():
+        values = sorted(values)
+        result[name] = {
+            "count": len(values),
+            "total_ms": sum(values) / 1e6,
+            "p50_ms": percentile(values, 0.5) / 1e6,
+            "p99_ms": percentile(values, 0.99) / 1e6,
+            "max_ms": values[-1] / 1e6,
+        }
+    return dict(sorted(result.items(), key=lambda item: -item[1]["total_ms"]))
+
+
+def format_summary(summary, counters=None, dropped=0):
+    lines = [f"{'участок':<28}{'вызовов':>10}{'всего, мс':>12}{'p50, мс':>10}{'p99, мс':>10}{'max, мс':>10}"]
+    for name, row in summary.items():
+        lines.append(f"{name:<28}{row['count']:>10}{row['total_ms']:>12.1f}{row['p50_ms']:>10.3f}"
+                     f"{row['p99_ms']:>10.3f}{row['max_ms']:>10.1f}")
+    for name, values in (counters or {}).items():
+        lines.append(f"{name}: " + ", ".join(f"{key}={value}" for key, value in values.items()))
+    if dropped:
+        lines.append(f"Событий не записано (предел {MAX_EVENTS}): {dropped}")
+    return "\n".join(lines) + "\n"
+
+
+def summary_from_file(path):
+    """Сводка и счётчики по готовому файлу трассы"""
+    with open(path, encoding="utf-8") as f:
+        events = json.load(f)["traceEvents"]
+    durations = {}
+    counters = {}
+    for event in events:
+        if event.get("ph") == "X":
+            durations.setdefault(event["name"], []).append(int(event["dur"] * 1000))
+        elif event.get("ph") == "C":
+            counters[event["name"]] = event.get("args", {})
+    return summarize(durations), counters
+
+
+# ----------------- Глобальный трассировщик -----------------
+PATH = trace_path()
+TRACER = Tracer() if PATH is not None else None
+ENABLED = TRACER is not None
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        TRACER.add(self.name, self.start, time.perf_counter_ns(), self.args)
+        return False
+
+
+def span(name, **args):
+    """with span("имя"): ... — участок трассы (пустой контекст, если выключено)"""
+    if TRACER is None:
+        return _NULL_SPAN
+    return _Span(name, args or None)
+
+
+def traced(name=None):
+    """Декоратор участка трассы; при выключенной трассировке функция не оборачивается"""
+    def decorate(func):
+        if TRACER is None:
+            return func
+        label = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                TRACER.add(label, start, time.perf_counter_ns())
+        return wrapper
+    return decorate
+
+
+def now():
+    """Отметка времени для участков, начало и конец которых в разных местах"""
+    return time.perf_counter_ns() if TRACER is not None else 0
+
+
+def add(name, start, args=None):
+    """Завершает участок, начатый в start = now()"""
+    if TRACER is not None:
+        TRACER.add(name, start, time.perf_counter_ns(), args)
+
+
+def counter(name, values):
+    if TRACER is not None:
+        TRACER.counter(name, values)
+
+
+def dump(path=None):
+    """Пишет трассу (по умолчанию в файл из XRAY_EDITOR_TRACE); путь сводки или None"""
+    if TRACER is None:
+        return None
+    return TRACER.dump(path or PATH)
+
+
+def _dump_at_exit():
+    summary_path = dump()
+    print(f"Трасса: {PATH}, сводка: {summary_path}", file=sys.stderr)
+
+
+if ENABLED:
+    atexit.register(_dump_at_exit)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print("Использование: python -m core.trace trace.json", file=sys.stderr)
+        return 2
+    summary, counters = summary_from_file(argv[0])
+    sys.stdout.write(format_summary(summary, counters))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
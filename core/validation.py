@@ -0,0 +1,374 @@
+"""Проверка config.json по схеме Xray.
+
+Схема описана декларативно и один раз компилируется в замыкания.
+Конфиг проверяется по единицам — каждый inbound, каждый outbound и
+секция dns; результат единицы кэшируется по хэшу её содержимого
+(core.merkle), поэтому после правки заново проверяется только изменённая
+единица.
+"""
+import re
+
+from .merkle import MerkleTree
+
+# ----------------- Схема -----------------
+PORT = {"type": "port"}
+STRING = {"type": "string"}
+BOOL = {"type": "bool"}
+
+REALITY = {
+    "type": "object",
+    "fields": {
+        "publicKey": {"type": "string", "pattern": r"[A-Za-z0-9_-]{43}",
+                      "message": "publicKey: 43 символа base64url"},
+        "shortId": {"type": "string", "pattern": r"(?:[0-9a-fA-F]{2}){0,8}",
+                    "message": "shortId: до 16 hex-символов, чётная длина"},
+        "serverName": STRING,
+        "fingerprint": {"enum": ("", "chrome", "firefox", "safari", "ios", "android", "edge",
+                                 "360", "qq", "random", "randomized")},
+        "spx": {"type": ("string", "bool")},
+    },
+}
+
+TLS = {
+    "type": "object",
+    "fields": {
+        "serverName": STRING,
+        "fingerprint": REALITY["fields"]["fingerprint"],
+        "allowInsecure": BOOL,
+        "alpn": {"type": "array", "items": STRING},
+    },
+}
+
+HYSTERIA = {
+    "type": "object",
+    "fields": {
+        "version": {"enum": (2,)},
+        "auth": STRING,
+    },
+}
+
+STREAM = {
+    "type": "object",
+    "fields": {
+        "network": {"enum": ("tcp", "raw", "kcp", "ws", "http", "h2", "quic", "grpc",
+                             "httpupgrade", "splithttp", "xhttp", "hysteria")},
+        "security": {"enum": ("none", "", "tls", "reality", "xtls")},
+        "realitySettings": REALITY,
+        "tlsSettings": TLS,
+        "hysteriaSettings": HYSTERIA,
+    },
+}
+
+USER = {
+    "type": "object",
+    "required": ("id",),
+    "fields": {
+        "id": {"type": "user_id"},
+        "flow": {"enum": ("", "xtls-rprx-vision", "xtls-rprx-vision-udp443")},
+        "encryption": STRING,
+    },
+}
+
+VNEXT = {
+    "type": "object",
+    "required": ("address", "port"),
+    "fields": {
+        "address": {"type": "string", "min_length": 1},
+        "port": PORT,
+        "users": {"type": "array", "items": USER},
+    },
+}
+
+SERVER = {
+    "type": "object",
+    "required": ("address", "port"),
+    "fields": {
+        "address": {"type": "string", "min_length": 1},
+        "port": PORT,
+        "password": STRING,
+        "method": STRING,
+    },
+}
+
+INBOUND = {
+    "type": "object",
+    "required": ("protocol", "port"),
+    "fields": {
+        "tag": STRING,
+        "port": {"type": "port_range"},
+        "listen": STRING,
+        "protocol": {"enum": ("socks", "http", "vless", "vmess", "trojan", "shadowsocks",
+                              "dokodemo-door", "tunnel", "wireguard", "mixed")},
+        "settings": {
+            "type": "object",
+            "fields": {"udp": BOOL, "auth": {"enum": ("noauth", "password")}},
+        },
+        "streamSettings": STREAM,
+    },
+}
+
+OUTBOUND = {
+    "type": "object",
+    "required": ("protocol",),
+    "fields": {
+        "tag": STRING,
+        "protocol": {"enum": ("vless", "vmess", "trojan", "shadowsocks", "socks", "http",
+                              "freedom", "blackhole", "dns", "wireguard", "loopback",
+                              "hysteria", "hysteria2")},
+        "settings": {
+            "type": "object",
+            "fields": {
+                "vnext": {"type": "array", "items": VNEXT},
+                "servers": {"type": "array", "items": SERVER},
+                # hysteria: сервер прямо в settings
+                "address": {"type": "string", "min_length": 1},
+                "port": PORT,
+            },
+        },
+        "streamSettings": STREAM,
+    },
+}
+
+DNS = {
+    "type": "object",
+    "fields": {
+        "servers": {"type": "array", "items": {"type": ("string", "object")}},
+        "queryStrategy": {"enum": ("UseIP", "UseIPv4", "UseIPv6", "UseSystem")},
+    },
+}
+
+UNIT_SCHEMAS = {"inbounds": INBOUND, "outbounds": OUTBOUND, "dns": DNS}
+
+UUID_RE = re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}")
+TYPE_NAMES = {"string": "строка", "bool": "true/false", "object": "объект", "array": "список"}
+
+
+# ----------------- Компиляция -----------------
+def _check_port(value):
+    return isinstance(value, int) and not isinstance(value, bool) and 1 <= value <= 65535
+
+
+def _check_port_range(value):
+    if isinstance(value, str):
+        # Xray допускает "1000-2000" и "80,443"
+        parts = re.split(r"[,-]", value)
+        return all(part.strip().isdigit() and _check_port(int(part)) for part in parts)
+    return _check_port(value)
+
+
+def _check_user_id(value):
+    # Xray принимает UUID или произвольную строку 1-30 символов (преобразуется в UUID)
+    if not isinstance(value, str) or not value:
+        return False
+    return bool(UUID_RE.fullmatch(value)) if len(value) == 36 else len(value) <= 30
+
+
+# Простые типы проверяются одним isinstance
+PY_TYPES = {"string": str, "bool": bool, "object": dict, "array": list}
+
+TYPE_CHECKS = {
+    "port": _check_port,
+    "port_range": _check_port_range,
+    "user_id": _check_user_id,
+}
+
+TYPE_MESSAGES = {
+    "port": "порт должен быть числом 1-65535",
+    "port_range": "порт должен быть числом 1-65535 или диапазоном",
+    "user_id": "ID должен быть UUID или строкой до 30 символов",
+}
+
+
+def compile_schema(spec):
+    """Превращает описание схемы в функцию check(value, path, errors)"""
+    checks = []
+
+    types = spec.get("type")
+    if types is not None:
+        types = types if isinstance(types, tuple) else (types,)
+        message = TYPE_MESSAGES.get(types[0]) if len(types) == 1 else None
+        message = message or "ожидается " + " или ".join(TYPE_NAMES.get(t, t) for t in types)
+
+        if all(t in PY_TYPES for t in types):
+            py_types = tuple(PY_TYPES[t] for t in types)
+
+            def check_type(value, path, errors):
+                if not isinstance(value, py_types):
+                    errors.append((path, message))
+                    return False
+                return True
+        else:
+            type_checks = [TYPE_CHECKS[t] for t in types]
+
+            def check_type(value, path, errors):
+                if not any(check(value) for check in type_checks):
+                    errors.append((path, message))
+                    return False
+                return True
+        checks.append(check_type)
+
+    if "enum" in spec:
+        allowed = frozenset(spec["enum"])
+        message = "допустимо: " + ", ".join(str(v) for v in spec["enum"] if v != "")
+
+        def check_enum(value, path, errors):
+            if value not in allowed:
+                errors.append((path, message))
+                return False
+            return True
+        checks.append(check_enum)
+
+    if "pattern" in spec:
+        pattern = re.compile(spec["pattern"])
+        message = spec.get("message", f"не соответствует шаблону {spec['pattern']}")
+
+        def check_pattern(value, path, errors):
+            # Пустое значение — «не задано», его не проверяем
+            if isinstance(value, str) and value and not pattern.fullmatch(value):
+                errors.append((path, message))
+                return False
+            return True
+        checks.append(check_pattern)
+
+    if "min_length" in spec:
+        min_length = spec["min_length"]
+
+        def check_length(value, path, errors):
+            if isinstance(value, str) and len(value) < min_length:
+                errors.append((path, "значение не может быть пустым"))
+                return False
+            return True
+        checks.append(check_length)
+
+    if "required" in spec or "fields" in spec:
+        required = tuple(spec.get("required", ()))
+        fields = tuple((key, compile_schema(sub)) for key, sub in spec.get("fields", {}).items())
+
+        def check_object(value, path, errors):
+            if not isinstance(value, dict):
+                return True
+            for key in required:
+                if key not in value:
+                    errors.append((path + (key,), "обязательное поле"))
+            for key, check in fields:
+                if key in value:
+                    check(value[key], path + (key,), errors)
+            return True
+        checks.append(check_object)
+
+    if "items" in spec:
+        item_check = compile_schema(spec["items"])
+
+        def check_items(value, path, errors):
+            if isinstance(value, list):
+                for i, item in enumerate(value):
+                    item_check(item, path + (i,), errors)
+            return True
+        checks.append(check_items)
+
+    if len(checks) == 1:
+        return checks[0]
+
+    def check(value, path, errors):
+        for step in checks:
+            if not step(value, path, errors):
+                # Тип не тот — дальнейшие проверки бессмысленны
+                return
+    return check
+
+
+COMPILED = {kind: compile_schema(spec) for kind, spec in UNIT_SCHEMAS.items()}
+
+
+# ----------------- Единицы проверки -----------------
+def unit_for_path(key_path):
+    """Путь единицы проверки, в которую входит key_path, или None"""
+    if not key_path:
+        return None
+    if key_path[0] in ("inbounds", "outbounds") and len(key_path) >= 2:
+        return tuple(key_path[:2])
+    if key_path[0] == "dns":
+        return ("dns",)
+    return None
+
+
+def iter_units(config):
+    for section in ("inbounds", "outbounds"):
+        items = config.get(section)
+        if isinstance(items, list):
+            for i, item in enumerate(items):
+                yield (section, i), item
+    if "dns" in config:
+        yield ("dns",), config["dns"]
+
+
+class ConfigValidator:
+    """Проверка по единицам с кэшем результатов по хэшу содержимого.
+
+    errors: {путь единицы: [(полный путь поля, сообщение), ...]}
+    """
+
+    def __init__(self, max_cache=200000):
+        self.errors = {}
+        self.max_cache = max_cache
+        self._cache = {}
+
+    def _check_unit(self, unit, value, tree=None):
+        kind = unit[0]
+        key = (kind, (tree or MerkleTree(value)).digest(value))
+        relative = self._cache.get(key)
+        if relative is None:
+            found = []
+            COMPILED[kind](value, (), found)
+            relative = tuple(found)
+            if len(self._cache) >= self.max_cache:
+                # Вытесняем самую старую запись
+                del self._cache[next(iter(self._cache))]
+            self._cache[key] = relative
+        return [(unit + path, message) for path, message in relative]
+
+    def validate(self, config):
+        """Полная проверка (при загрузке); возвращает словарь ошибок"""
+        errors = {}
+        tree = MerkleTree(config)
+        for unit, value in iter_units(config):
+            unit_errors = self._check_unit(unit, value, tree)
+            if unit_errors:
+                errors[unit] = unit_errors
+        self.errors = errors
+        return errors
+
+    def validate_path(self, config, key_path):
+        """Перепроверяет только единицу, содержащую key_path.
+
+        Возвращает (unit, прежние ошибки, новые ошибки) или None, если путь
+        не входит в проверяемые секции.
+        """
+        unit = unit_for_path(key_path)
+        if unit is None:
+            return None
+        old_errors = self.errors.get(unit, [])
+        value = config
+        try:
+            for key in unit:
+                value = value[key]
+        except (KeyError, IndexError, TypeError):
+            self.errors.pop(unit, None)
+            return unit, old_errors, []
+        new_errors = self._check_unit(unit, value)
+        if new_errors:
+            self.errors[unit] = new_errors
+        else:
+            self.errors.pop(unit, None)
+        return unit, old_errors, new_errors
+
+    def error_for(self, key_path):
+        """Сообщение об ошибке для конкретного поля или None"""
+        key_path = tuple(key_path)
+        for path, message in self.errors.get(unit_for_path(key_path), ()):
+            if path == key_path:
+                return message
+        return None
+
+    def count(self):
+        return sum(len(errors) for errors in self.errors.values())
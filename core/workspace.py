@@ -0,0 +1,151 @@
+"""Рабочая папка с несколькими конфигами и LRU-кэш разобранных конфигов.
+
+Кэш хранит произвольное состояние редактора (разобранное дерево, индексы,
+построенную форму) по пути файла и проверяет его актуальность по
+(mtime, размер). Общий объём ограничен числом байт; конфиги с
+несохранёнными правками не вытесняются.
+
+Предел задаётся переменной окружения XRAY_EDITOR_CACHE_MB (по умолчанию 256).
+"""
+import os
+from collections import OrderedDict
+from pathlib import Path
+
+CONFIG_SUFFIXES = (".json",)
+DEFAULT_CACHE_MB = 256
+
+# Разобранный JSON занимает в памяти примерно во столько раз больше файла
+PARSED_FACTOR = 8
+# Примерный объём одной строки формы (рамка, подпись, поле ввода)
+FIELD_BYTES = 4096
+
+
+def cache_limit_bytes(default_mb=DEFAULT_CACHE_MB):
+    """Предел кэша из XRAY_EDITOR_CACHE_MB (в мегабайтах)"""
+    value = os.environ.get("XRAY_EDITOR_CACHE_MB", "")
+    try:
+        mb = float(value) if value else default_mb
+    except ValueError:
+        mb = default_mb
+    return int(max(mb, 0) * 1024 * 1024)
+
+
+def list_configs(directory):
+    """Файлы конфигов в папке (без вложенных и скрытых), по имени"""
+    configs = []
+    for entry in os.scandir(directory):
+        if entry.name.startswith(".") or not entry.name.endswith(CONFIG_SUFFIXES):
+            continue
+        if entry.is_file():
+            configs.append(Path(entry.path))
+    configs.sort(key=lambda path: path.name.lower())
+    return configs
+
+
+def file_key(path):
+    """(mtime_ns, размер) файла или None, если файла нет"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def estimate_size(file_size, fields=0):
+    """Оценка памяти под разобранный конфиг и его форму"""
+    return file_size * PARSED_FACTOR + fields * FIELD_BYTES
+
+
+class _Entry:
+    __slots__ = ("key", "payload", "size", "pinned")
+
+    def __init__(self, key, payload, size, pinned):
+        self.key = key
+        self.payload = payload
+        self.size = size
+        self.pinned = pinned
+
+
+class ConfigCache:
+    """LRU по пути файла с ограничением суммарного размера.
+
+    on_evict(payload) вызывается для вытесненных и устаревших записей,
+    чтобы владелец мог освободить связанные с ними ресурсы.
+    """
+
+    def __init__(self, max_bytes=None, on_evict=None):
+        self.max_bytes = cache_limit_bytes() if max_bytes is None else max_bytes
+        self.on_evict = on_evict
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, path):
+        return str(path) in self._entries
+
+    def get(self, path):
+        """Состояние для path или None, если его нет или файл изменился на диске.
+
+        Запись с несохранёнными правками (pinned) отдаётся и при изменённом
+        файле — правки не теряются.
+        """
+        name = str(path)
+        entry = self._entries.get(name)
+        if entry is None:
+            return None
+        if entry.key != file_key(name) and not entry.pinned:
+            self.discard(name)
+            return None
+        self._entries.move_to_end(name)
+        return entry.payload
+
+    def put(self, path, payload, size, pinned=False, key=None):
+        """Кладёт состояние path; ключ актуальности — file_key версии файла,
+        с которой совпадает состояние (key), по умолчанию текущей"""
+        name = str(path)
+        old = self._entries.pop(name, None)
+        if old is not None:
+            self.total_bytes -= old.size
+            if old.payload is not payload:
+                self._release(old.payload)
+        self._entries[name] = _Entry(file_key(name) if key is None else key, payload, size, pinned)
+        self.total_bytes += size
+        self._evict()
+
+    def take(self, path):
+        """Как get, но забирает состояние из кэша: оно снова активно"""
+        payload = self.get(path)
+        if payload is not None:
+            self.pop(path)
+        return payload
+
+    def pop(self, path):
+        """Удаляет запись без on_evict и возвращает её состояние"""
+        entry = self._entries.pop(str(path), None)
+        if entry is None:
+            return None
+        self.total_bytes -= entry.size
+        return entry.payload
+
+    def discard(self, path):
+        payload = self.pop(path)
+        if payload is not None:
+            self._release(payload)
+
+    def clear(self):
+        for name in list(self._entries):
+            self.discard(name)
+
+    def _release(self, payload):
+        if self.on_evict is not None:
+            self.on_evict(payload)
+
+    def _evict(self):
+        # От давно не использованных к недавним; pinned пропускаются
+        for name in list(self._entries):
+            if self.total_bytes <= self.max_bytes:
+                break
+            if not self._entries[name].pinned:
+                self.discard(name)
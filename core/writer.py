@@ -0,0 +1,130 @@
+"""Фоновая запись файлов с объединением сохранений.
+
+Запись (временный файл, fsync, rename — core.storage) идёт в отдельном
+потоке, поэтому медленный или сетевой диск не держит интерфейс. Если
+прежняя версия файла ещё ждёт записи, она заменяется новой: на диск
+попадает только последняя. Байты готовит вызывающий (снимок данных на
+момент сохранения); в потоке записи выполняется только необязательное
+преобразование encode, например сжатие.
+
+Политика fsync — из FSYNC_POLICIES, по умолчанию из переменной окружения
+XRAY_EDITOR_FSYNC ("none", "file" или "dir"; без неё — "dir").
+"""
+import os
+import threading
+import time
+import traceback
+from pathlib import Path
+
+from .storage import FSYNC_POLICIES, atomic_write
+
+
+def default_fsync():
+    policy = os.environ.get("XRAY_EDITOR_FSYNC", "dir")
+    return policy if policy in FSYNC_POLICIES else "dir"
+
+
+class WriteResult:
+    """Итог одной записи: written — False, если содержимое не изменилось;
+    error — текст ошибки или None; coalesced — сколько версий заменено этой;
+    queued — после неё ждёт ещё версия того же файла"""
+
+    __slots__ = ("path", "written", "error", "coalesced", "queued", "elapsed_s")
+
+    def __init__(self, path, written, error, coalesced, queued, elapsed_s):
+        self.path = path
+        self.written = written
+        self.error = error
+        self.coalesced = coalesced
+        self.queued = queued
+        self.elapsed_s = elapsed_s
+
+
+class WriteQueue:
+    """Очередь записи с одним фоновым потоком.
+
+    on_done(result) вызывается в потоке записи после каждой выполненной
+    записи; заменённые версии отдельно не сообщаются.
+    """
+
+    def __init__(self, fsync=None, on_done=None):
+        fsync = default_fsync() if fsync is None else fsync
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Неизвестная политика fsync: {fsync}")
+        self.fsync = fsync
+        self.on_done = on_done
+        # Путь -> (байты, encode, сколько версий заменено); порядок — порядок постановки
+        self._pending = {}
+        self._active = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def submit(self, path, data, encode=None):
+        """Ставит запись в очередь; True, если заменена ещё не записанная версия"""
+        path = Path(path)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Очередь записи закрыта")
+            previous = self._pending.get(path)
+            self._pending[path] = (data, encode, previous[2] + 1 if previous else 0)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="write-queue", daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+        return previous is not None
+
+    def busy(self, path=None):
+        """Есть ли незаписанные версии (файла path или любых)"""
+        with self._condition:
+            if path is None:
+                return bool(self._pending) or self._active is not None
+            path = Path(path)
+            return path in self._pending or self._active == path
+
+    def flush(self, timeout=None):
+        """Ждёт окончания всех записей; False, если не успели за timeout"""
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending and self._active is None, timeout)
+
+    def close(self, timeout=None):
+        """Дописывает очередь и останавливает поток"""
+        done = self.flush(timeout)
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None and done:
+            self._thread.join(timeout)
+        return done
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+                path = next(iter(self._pending))
+                data, encode, coalesced = self._pending.pop(path)
+                self._active = path
+
+            started = time.perf_counter()
+            written, error = False, None
+            try:
+                if encode is not None:
+                    data = encode(data)
+                written = atomic_write(path, data, fsync=self.fsync)
+            except Exception as e:
+                error = str(e) or type(e).__name__
+
+            with self._condition:
+                queued = path in self._pending
+            if self.on_done is not None:
+                try:
+                    self.on_done(WriteResult(path, written, error, coalesced, queued,
+                                             round(time.perf_counter() - started, 3)))
+                except Exception:
+                    # Ошибка обработчика не должна останавливать очередь
+                    traceback.print_exc()
+            with self._condition:
+                self._active = None
+                self._condition.notify_all()
@@ -0,0 +1 @@
+"""Графический интерфейс редактора на PyQt6."""
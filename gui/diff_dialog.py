@@ -0,0 +1,101 @@
+from PyQt6.QtCore import QObject, QRunnable, Qt, QThreadPool, pyqtSignal
+from PyQt6.QtWidgets import QDialog, QFileDialog, QHBoxLayout, QLabel, QPlainTextEdit, QPushButton, QVBoxLayout
+
+from core.config import load_config
+from core.merkle import MerkleTree, format_change
+
+# Сколько изменений показывать в окне
+MAX_SHOWN = 5000
+
+
+class CompareSignals(QObject):
+    finished = pyqtSignal(str, list)
+    failed = pyqtSignal(str, str)
+
+
+class CompareTask(QRunnable):
+    """Чтение другого файла и сравнение с текущим конфигом в пуле потоков.
+
+    Окно модальное, поэтому config_data во время сравнения не меняется.
+    """
+
+    def __init__(self, tree, path):
+        super().__init__()
+        self.tree = tree
+        self.path = path
+        self.signals = CompareSignals()
+
+    def run(self):
+        try:
+            changes = self.tree.diff(MerkleTree(load_config(self.path)))
+        except Exception as e:
+            self.signals.failed.emit(self.path, str(e))
+            return
+        self.signals.finished.emit(self.path, changes)
+
+
+class CompareDialog(QDialog):
+    """Что изменится, если заменить текущий конфиг другим файлом"""
+
+    def __init__(self, config, parent=None):
+        super().__init__(parent)
+        # Окно создаётся на каждое открытие: после закрытия освобождаем его и дерево хэшей
+        self.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        self.setWindowTitle("Сравнение конфигов")
+        self.resize(800, 600)
+        # Хэши текущего конфига считаются один раз на все сравнения в окне
+        self.tree = MerkleTree(config)
+        self.task = None
+
+        layout = QVBoxLayout()
+        buttons = QHBoxLayout()
+        self.file_button = QPushButton("Сравнить с файлом...")
+        self.file_button.clicked.connect(self.choose_file)
+        buttons.addWidget(self.file_button)
+        buttons.addStretch()
+        layout.addLayout(buttons)
+
+        self.summary_label = QLabel("")
+        self.summary_label.setWordWrap(True)
+        layout.addWidget(self.summary_label)
+        self.output = QPlainTextEdit()
+        self.output.setReadOnly(True)
+        self.output.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        layout.addWidget(self.output, 1)
+        self.setLayout(layout)
+
+    def choose_file(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Конфиг для сравнения", "", "JSON Files (*.json)")
+        if path:
+            self.compare(path)
+
+    def compare(self, path):
+        task = CompareTask(self.tree, path)
+        task.signals.finished.connect(self.on_finished)
+        task.signals.failed.connect(self.on_failed)
+        self.task = task
+        self.file_button.setEnabled(False)
+        self.summary_label.setText(f"Сравнение с {path}...")
+        QThreadPool.globalInstance().start(task)
+
+    def on_finished(self, path, changes):
+        self.task = None
+        self.file_button.setEnabled(True)
+        counts = {}
+        for kind, *_ in changes:
+            counts[kind] = counts.get(kind, 0) + 1
+        if not changes:
+            self.summary_label.setText(f"{path}: отличий нет")
+        else:
+            self.summary_label.setText(
+                f"{path}: изменено {counts.get('changed', 0)}, добавлено {counts.get('added', 0)}, "
+                f"удалено {counts.get('removed', 0)}, перемещено {counts.get('moved', 0)}")
+        shown = "\n".join(format_change(change) for change in changes[:MAX_SHOWN])
+        if len(changes) > MAX_SHOWN:
+            shown += f"\n... ещё {len(changes) - MAX_SHOWN}"
+        self.output.setPlainText(shown)
+
+    def on_failed(self, path, error):
+        self.task = None
+        self.file_button.setEnabled(True)
+        self.summary_label.setText(f"Ошибка чтения {path}: {error}")
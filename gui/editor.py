@@ -0,0 +1,1525 @@
+import copy
+import importlib
+from pathlib import Path
+from PyQt6.QtWidgets import (
+    QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
+    QLineEdit, QPushButton, QFileDialog, QMessageBox, QScrollArea, QTabWidget, QTreeView, QHeaderView, QProgressBar, QMenu, QGroupBox,
+    QListWidget, QListWidgetItem, QSplitter
+)
+from PyQt6.QtCore import Qt, QThreadPool, QTimer
+from PyQt6.QtGui import QKeySequence, QShortcut
+
+from core import trace
+from core.config import MISSING, dump_config, write_config
+from core.diff import is_container, overlaps, resizes_sections, split_conflicts
+from core.history import History
+from core.index import ConfigIndex
+from core.links import LinkError, parse_link
+from core.merkle import format_path
+from core.routing import rule_summary
+from core.search import ServerSearchIndex
+from core.serialize import FORMATS, available_formats, encode
+from core.subscription import import_subscription, unique_tag
+from core.validation import ConfigValidator
+from core.workspace import ConfigCache, estimate_size, list_configs
+from gui.field_pool import FieldPool
+from gui.loader import ConfDirLoadTask, ConfigLoadTask
+from gui.theme import apply_theme, set_role
+from gui.watcher import ConfigWatcher
+from gui.writer import BackgroundWriter
+from gui.tree_model import ConfigTreeModel
+
+EXPORT_FILTERS = {
+    "pretty": "JSON с отступами (*.json)",
+    "minified": "JSON без отступов (*.min.json)",
+    "gzip": "JSON, сжатый gzip (*.json.gz)",
+    "zstd": "JSON, сжатый zstd (*.json.zst)",
+}
+
+# Поля ссылки, значения которых в сообщении после вставки обрезаются
+SECRET_LABELS = ("User ID", "Public Key", "Password", "Auth")
+
+# Необязательные функции (проверка задержки с asyncio/ssl, QR, сравнение, тестер
+# маршрутов) импортируются при первом использовании, а после показа окна —
+# заранее, по одному модулю за проход цикла событий
+OPTIONAL_MODULES = ("gui.probe_task", "core.probe", "gui.share_task", "gui.diff_dialog", "gui.routing_dialog")
+PRELOAD_DELAY_MS = 500
+
+
+class FullXrayEditor(QWidget):
+    # Состояние одного открытого конфига; при переключении в рабочей папке
+    # оно целиком уходит в кэш вместе с построенной формой
+    STATE_ATTRS = (
+        "config_path", "config_data", "index", "validator", "history", "dirty_paths",
+        "inputs", "checkboxes", "field_rows", "outbound_groups", "server_search",
+        "current_outbound", "outbound_latency", "form_complete", "confdir",
+        "outbound_layout", "outbound_more", "outbound_limit", "section_widgets",
+    )
+    # Секции, которые показывает форма; в режиме -confdir читаются сразу
+    FORM_SECTIONS = ("log", "inbounds", "dns", "outbounds")
+    # Части формы над группами outbound: каждая в своём контейнере и строится заново отдельно
+    FIELD_SECTIONS = ("log", "inbounds", "dns", "routing")
+    # Поля outbound, от которых зависит набор строк его группы
+    GROUP_LAYOUT_KEYS = ("protocol", "security")
+    # Правил маршрутизации в форме не больше этого; остальные — во вкладке «Весь конфиг»
+    MAX_ROUTING_RULES = 200
+    # Групп outbound строится за раз: остальные — по кнопке «Показать ещё» или через поиск
+    OUTBOUND_PAGE = 50
+
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("Xray Config Editor")
+        self.config_path = None
+        self.config_data = None
+        self.inputs = {}
+        self.index = None
+        self.checkboxes = {}
+        self.dirty_paths = set()
+        self.history = History()
+        self.load_task = None
+        self.build_generation = 0
+        self.build_started = 0
+        self.outbound_groups = {}
+        self.outbound_layout = None
+        self.outbound_more = None
+        self.outbound_limit = self.OUTBOUND_PAGE
+        self.section_widgets = {}
+        self.server_search = None
+        self.current_outbound = None
+        self.probe_task = None
+        self.probe_cache = None
+        self.share_task = None
+        # Ссылки и QR по хэшу outbound: при повторной раздаче рисуются только изменённые
+        self.share_cache = None
+        self.outbound_latency = {}
+        self.validator = ConfigValidator()
+        self.field_rows = {}
+        # Строки формы переиспользуются при перестроении
+        self.field_pool = FieldPool(self.on_field_edited, self.seal_history)
+        self.form_complete = False
+        self.workspace_dir = None
+        self.confdir = None
+        self.config_cache = ConfigCache(on_evict=self.release_state)
+        # Изменения config.json другими программами
+        self.watcher = ConfigWatcher(self)
+        self.watcher.changed.connect(self.on_external_change)
+        self.watcher.removed.connect(
+            lambda path: self.status_label.setText(f"{path.name} удалён или перемещён на диске"))
+        self.watcher.failed.connect(
+            lambda path, error: self.status_label.setText(f"{path.name} изменён, но не читается: {error}"))
+        # Фоновая запись сохранений и экспорта; путь -> (конфиг, правки) до окончания записи
+        self.writer = BackgroundWriter(parent=self)
+        self.writer.finished.connect(self.on_write_finished)
+        self.unsaved_paths = {}
+
+        self.resize(600, 700)
+        self.setMinimumSize(600, 700)
+
+        self.init_ui()
+        apply_theme()
+        QApplication.instance().focusChanged.connect(self.on_focus_changed)
+        QTimer.singleShot(PRELOAD_DELAY_MS, lambda: self.preload_modules(list(OPTIONAL_MODULES)))
+
+    def preload_modules(self, names):
+        """Догружает необязательные модули после показа окна, не задерживая его"""
+        if names:
+            importlib.import_module(names.pop(0))
+            QTimer.singleShot(0, lambda: self.preload_modules(names))
+
+    # ----------------- UI -----------------
+    def init_ui(self):
+        main_layout = QVBoxLayout()
+        main_layout.setContentsMargins(15, 15, 15, 15)
+        main_layout.setSpacing(10)
+
+        # --- Файл конфигурации ---
+        file_layout = QHBoxLayout()
+        file_layout.setSpacing(10)
+        self.file_label = QLabel("Файл не выбран")
+        self.file_label.setObjectName("fileLabel")
+
+        select_button = QPushButton("Выбрать config.json")
+        select_button.clicked.connect(self.select_file)
+        select_button.setCursor(Qt.CursorShape.PointingHandCursor)
+
+        new_button = QPushButton("Новый config")
+        new_button.clicked.connect(self.create_new_config)
+        new_button.setCursor(Qt.CursorShape.PointingHandCursor)
+        set_role(new_button, "accent")
+
+        workspace_button = QPushButton("Открыть папку")
+        workspace_button.setCursor(Qt.CursorShape.PointingHandCursor)
+        workspace_menu = QMenu(workspace_button)
+        workspace_menu.addAction("Рабочая папка (список конфигов)...", self.open_workspace)
+        workspace_menu.addAction("Папка -confdir (фрагменты)...", self.open_confdir)
+        workspace_button.setMenu(workspace_menu)
+
+        file_layout.addWidget(self.file_label)
+        file_layout.addWidget(select_button)
+        file_layout.addWidget(workspace_button)
+        file_layout.addWidget(new_button)
+        main_layout.addLayout(file_layout)
+
+        # --- Кнопка вставки ссылки ---
+        paste_button = QPushButton("Вставить ссылку из буфера")
+        paste_button.setToolTip("vless://, vmess://, trojan://, ss://, hysteria2://")
+        paste_button.clicked.connect(self.paste_link)
+        paste_button.setCursor(Qt.CursorShape.PointingHandCursor)
+        set_role(paste_button, "link")
+
+        # --- Импорт подписки ---
+        subscription_button = QPushButton("Импорт подписки")
+        subscription_button.setCursor(Qt.CursorShape.PointingHandCursor)
+        set_role(subscription_button, "link")
+        subscription_menu = QMenu(subscription_button)
+        subscription_menu.addAction("Из файла...", self.import_subscription_file)
+        subscription_menu.addAction("Из буфера обмена", self.import_subscription_clipboard)
+        subscription_button.setMenu(subscription_menu)
+
+        # --- Раздача ссылок и QR ---
+        self.share_button = QPushButton("Ссылки и QR")
+        self.share_button.setToolTip("Ссылки и QR-коды всех outbound и пользователей")
+        self.share_button.setCursor(Qt.CursorShape.PointingHandCursor)
+        set_role(self.share_button, "link")
+        share_menu = QMenu(self.share_button)
+        share_menu.addAction("В папку...", self.share_to_directory)
+        share_menu.addAction("В архив .zip...", self.share_to_zip)
+        self.share_button.setMenu(share_menu)
+
+        link_layout = QHBoxLayout()
+        link_layout.addWidget(paste_button)
+        link_layout.addWidget(subscription_button)
+        link_layout.addWidget(self.share_button)
+
+        # --- Проверка задержки ---
+        self.probe_button = QPushButton("Проверить задержку")
+        self.probe_button.clicked.connect(self.probe_servers)
+        self.probe_button.setCursor(Qt.CursorShape.PointingHandCursor)
+        link_layout.addWidget(self.probe_button)
+        main_layout.addLayout(link_layout)
+
+        # --- Scroll area для полей ---
+        self.scroll = QScrollArea()
+        self.scroll.setWidgetResizable(True)
+        self.new_form_container()
+
+        # --- Дерево всего конфига ---
+        self.tree_model = ConfigTreeModel(self)
+        self.tree_model.value_edited.connect(self.on_tree_value_edited)
+        self.tree_view = QTreeView()
+        self.tree_view.setModel(self.tree_model)
+        self.tree_view.setUniformRowHeights(True)
+        self.tree_view.setAlternatingRowColors(True)
+        self.tree_view.header().setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
+
+        # --- Поиск по серверам ---
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Поиск серверов: tag, адрес, SNI, publicKey, ID")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.textChanged.connect(self.on_search_changed)
+        main_layout.addWidget(self.search_input)
+
+        self.tabs = QTabWidget()
+        self.tabs.addTab(self.scroll, "Основные поля")
+        self.tabs.addTab(self.tree_view, "Весь конфиг")
+        self.tabs.currentChanged.connect(self.on_tab_changed)
+
+        # --- Список конфигов рабочей папки ---
+        self.workspace_list = QListWidget()
+        self.workspace_list.currentItemChanged.connect(self.on_workspace_item_changed)
+        self.workspace_list.setVisible(False)
+
+        splitter = QSplitter(Qt.Orientation.Horizontal)
+        splitter.addWidget(self.workspace_list)
+        splitter.addWidget(self.tabs)
+        splitter.setStretchFactor(1, 1)
+        main_layout.addWidget(splitter)
+
+        # --- Статус загрузки ---
+        status_layout = QHBoxLayout()
+        self.status_label = QLabel("")
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.cancel_button = QPushButton("Отмена")
+        self.cancel_button.clicked.connect(self.cancel_loading)
+        self.cancel_button.setCursor(Qt.CursorShape.PointingHandCursor)
+        status_layout.addWidget(self.status_label, 1)
+        status_layout.addWidget(self.progress_bar)
+        status_layout.addWidget(self.cancel_button)
+        main_layout.addLayout(status_layout)
+        self.set_loading(False)
+
+        # --- Кнопки действий ---
+        button_layout = QHBoxLayout()
+
+        export_btn = QPushButton("Экспорт настроек")
+        export_btn.clicked.connect(self.export_settings)
+        export_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        set_role(export_btn, "accent")
+
+        compare_btn = QPushButton("Сравнить с файлом...")
+        compare_btn.clicked.connect(self.open_compare)
+        compare_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+
+        save_btn = QPushButton("Сохранить изменения")
+        save_btn.clicked.connect(self.save_config)
+        save_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        set_role(save_btn, "primary")
+
+        # --- Отмена/повтор ---
+        self.undo_button = QPushButton("Отменить")
+        self.undo_button.clicked.connect(self.undo)
+        self.undo_button.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.redo_button = QPushButton("Повторить")
+        self.redo_button.clicked.connect(self.redo)
+        self.redo_button.setCursor(Qt.CursorShape.PointingHandCursor)
+        QShortcut(QKeySequence.StandardKey.Undo, self, self.undo)
+        QShortcut(QKeySequence.StandardKey.Redo, self, self.redo)
+        if trace.ENABLED:
+            # Трасса для отчёта об ошибке без выхода из редактора
+            QShortcut(QKeySequence("Ctrl+Shift+T"), self, self.dump_trace)
+        self.update_history_actions()
+
+        button_layout.addWidget(self.undo_button)
+        button_layout.addWidget(self.redo_button)
+        button_layout.addWidget(compare_btn)
+        button_layout.addWidget(export_btn)
+        button_layout.addWidget(save_btn)
+        main_layout.addLayout(button_layout)
+
+        self.setLayout(main_layout)
+
+    def new_form_container(self):
+        """Ставит в область прокрутки пустой контейнер формы"""
+        self.scroll_content = QWidget()
+        self.scroll_layout = QVBoxLayout()
+        self.scroll_layout.setSpacing(8)
+        self.scroll_layout.setContentsMargins(5, 5, 5, 5)
+        self.scroll_content.setLayout(self.scroll_layout)
+        self.scroll.setWidget(self.scroll_content)
+
+    # ----------------- Поля -----------------
+    @trace.traced()
+    def add_field(self, label_text, value, key_path, field_type="text", layout=None, tooltip=None):
+        target_layout = layout if layout is not None else self.scroll_layout
+        kind = "checkbox" if field_type == "checkbox" else "text"
+        row = self.field_pool.acquire(kind)
+
+        tooltips = [tooltip] if tooltip else []
+        if self.confdir is not None:
+            origin = self.confdir.origin(self.config_data, key_path)
+            tooltips.append(f"Фрагмент: {origin.name}" if origin else "Новое значение")
+
+        key_path_tuple = tuple(key_path)
+        row.bind(label_text, value, key_path_tuple, "\n".join(tooltips))
+        if kind == "checkbox":
+            self.checkboxes[key_path_tuple] = row.editor
+        else:
+            self.inputs[key_path_tuple] = row.editor
+        self.field_rows[key_path_tuple] = row
+        message = self.validator.error_for(key_path_tuple)
+        if message:
+            row.set_error(message)
+
+        self.index.add_label(label_text, key_path_tuple)
+        target_layout.addWidget(row)
+        row.show()
+
+    def show_field_error(self, key_path, message=None):
+        """Показывает (или убирает при message=None) ошибку проверки рядом с полем"""
+        row = self.field_rows.get(key_path)
+        if row is not None:
+            row.set_error(message)
+
+    @trace.traced()
+    def revalidate(self, key_path):
+        """Перепроверяет единицу конфига (inbound/outbound/dns), содержащую key_path"""
+        result = self.validator.validate_path(self.config_data, key_path)
+        if result is None:
+            return
+        _unit, old_errors, new_errors = result
+        for path, _message in old_errors:
+            self.show_field_error(path)
+        for path, message in new_errors:
+            self.show_field_error(path, message)
+
+    def validation_summary(self):
+        count = self.validator.count()
+        return f"Ошибок проверки: {count}" if count else "Ошибок проверки нет"
+
+    def on_focus_changed(self, _old, new):
+        """Outbound, в поле которого стоит курсор, становится целью вставки ссылки"""
+        key_path = getattr(new, "key_path", None)
+        if key_path and key_path[0] == "outbounds":
+            self.current_outbound = key_path[1]
+
+    # ----------------- Создание нового конфига -----------------
+    def create_new_config(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Создать новый config.json", "", "JSON Files (*.json)")
+        if path:
+            template = {
+                "log": {
+                    "loglevel": "warning"
+                },
+                "inbounds": [
+                    {
+                        "tag": "socks-inbound",
+                        "port": 1080,
+                        "listen": "127.0.0.1",
+                        "protocol": "socks",
+                        "settings": {
+                            "auth": "noauth",
+                            "udp": True
+                        }
+                    }
+                ],
+                "outbounds": [
+                    {
+                        "tag": "proxy",
+                        "protocol": "vless",
+                        "settings": {
+                            "vnext": [
+                                {
+                                    "address": "",
+                                    "port": 443,
+                                    "users": [
+                                        {
+                                            "id": "",
+                                            "encryption": "none",
+                                            "flow": ""
+                                        }
+                                    ]
+                                }
+                            ]
+                        },
+                        "streamSettings": {
+                            "network": "tcp",
+                            "security": "reality",
+                            "realitySettings": {
+                                "publicKey": "",
+                                "shortId": "",
+                                "serverName": "",
+                                "fingerprint": "chrome",
+                                "spx": ""
+                            }
+                        }
+                    }
+                ],
+                "dns": {
+                    "servers": ["8.8.8.8", "1.1.1.1"]
+                }
+            }
+
+            try:
+                write_config(Path(path), template)
+                self.stash_current()
+                self.config_path = Path(path)
+                self.file_label.setText(str(self.config_path))
+                self.config_data = template
+                self.validator.validate(self.config_data)
+                self.load_config_from_data()
+                self.show_message("Успех", "Новый конфиг создан и загружен!")
+            except Exception as e:
+                self.show_message("Ошибка", f"Не удалось создать файл:\n{e}", icon=QMessageBox.Icon.Critical)
+
+    # ----------------- Загрузка файла -----------------
+    def select_file(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Выберите config.json", "", "JSON Files (*.json)")
+        if path:
+            if self.config_path is not None and Path(path) == Path(self.config_path):
+                # Тот же файл — перечитываем с диска
+                self.load_config(Path(path))
+            else:
+                self.switch_config(Path(path))
+
+    @trace.traced()
+    def load_config(self, path=None):
+        """Запускает чтение и разбор файла в фоновом потоке"""
+        path = Path(path) if path else self.config_path
+        if self.confdir is not None and path == self.config_path:
+            self.load_confdir(path)
+            return
+        # Новый проверяющий на каждую загрузку: правки старого конфига
+        # не смешиваются с результатом фоновой проверки
+        self.start_load_task(ConfigLoadTask(path, ConfigValidator()), path)
+
+    def open_confdir(self):
+        directory = QFileDialog.getExistingDirectory(self, "Открыть папку -confdir")
+        if directory:
+            self.stash_current()
+            self.load_confdir(Path(directory))
+
+    def load_confdir(self, directory):
+        """Загружает папку фрагментов: сразу читаются только секции формы"""
+        self.start_load_task(ConfDirLoadTask(directory, self.FORM_SECTIONS, ConfigValidator()), directory)
+
+    def start_load_task(self, task, path):
+        if self.load_task is not None:
+            self.load_task.cancel()
+        task.signals.progress.connect(self.progress_bar.setValue)
+        task.signals.finished.connect(self.on_config_loaded)
+        task.signals.failed.connect(self.on_config_load_failed)
+        task.signals.cancelled.connect(self.on_config_load_cancelled)
+        self.load_task = task
+
+        self.progress_bar.setValue(0)
+        self.set_loading(True, f"Загрузка {path.name}...")
+        QThreadPool.globalInstance().start(task)
+
+    def cancel_loading(self):
+        if self.load_task is not None:
+            self.load_task.cancel()
+        # Прерываем и постепенное построение полей
+        self.build_generation += 1
+        self.set_loading(False, "Загрузка отменена")
+
+    def set_loading(self, loading, text=""):
+        self.progress_bar.setVisible(loading)
+        self.cancel_button.setVisible(loading)
+        self.status_label.setText(text)
+
+    def _is_current_task(self):
+        return self.sender() is not None and self.load_task is not None \
+            and self.sender() is self.load_task.signals
+
+    def on_config_loaded(self, path, data, index):
+        if not self._is_current_task():
+            return
+        self.validator = self.load_task.validator
+        self.confdir = getattr(self.load_task, "confdir", None)
+        self.load_task = None
+        self.config_path = path
+        self.file_label.setText(str(self.config_path))
+        self.config_data = data
+        self.load_config_from_data(index)
+
+    def on_config_load_failed(self, path, error):
+        if not self._is_current_task():
+            return
+        self.load_task = None
+        self.set_loading(False, "Ошибка загрузки")
+        self.show_message("Ошибка", f"Не удалось загрузить config.json:\n{error}", icon=QMessageBox.Icon.Critical)
+
+    def on_config_load_cancelled(self, path):
+        if self._is_current_task():
+            self.load_task = None
+
+    @trace.traced()
+    def load_config_from_data(self, index=None):
+        """Показывает новый config_data: индекс, история и форма начинаются заново"""
+        self.index = index if index is not None else ConfigIndex(self.config_data)
+        self.dirty_paths.clear()
+        self.history.clear()
+        self.update_history_actions()
+        self.outbound_latency = {}
+        self.current_outbound = None
+        self.watch_current()
+        self.rebuild_form()
+
+    def rebuild_form(self):
+        """Очищает форму и заполняет её по секциям, отдавая управление циклу событий"""
+        # Строки полей уходят в пул до удаления групп, в которых они лежат
+        for row in self.field_rows.values():
+            self.field_pool.release(row)
+        for i in reversed(range(self.scroll_layout.count())):
+            widget = self.scroll_layout.itemAt(i).widget()
+            if widget:
+                widget.setParent(None)
+        self.inputs.clear()
+        self.checkboxes.clear()
+        self.field_rows.clear()
+        self.index.clear_labels()
+        self.outbound_groups.clear()
+        self.section_widgets.clear()
+        self.outbound_layout = None
+        self.outbound_limit = self.OUTBOUND_PAGE
+        self.server_search = ServerSearchIndex(self.config_data.get("outbounds", []))
+        self.tree_model.set_config(self.config_data)
+
+        self.form_complete = False
+        self.build_generation += 1
+        self.build_started = trace.now()
+        self.set_loading(True, "Построение полей...")
+        self._continue_build(self.build_generation, self.build_field_sections())
+
+    def _continue_build(self, generation, steps):
+        if generation != self.build_generation:
+            # Начата новая загрузка или загрузка отменена
+            return
+        try:
+            section = next(steps)
+        except StopIteration:
+            self.form_complete = True
+            trace.add("build_form", self.build_started, {"fields": len(self.inputs) + len(self.checkboxes)})
+            self.trace_widgets()
+            self.set_loading(False, f"Все поля загружены для редактирования. {self.validation_summary()}")
+            return
+        self.status_label.setText(f"Построение полей: {section}")
+        QTimer.singleShot(0, lambda: self._continue_build(generation, steps))
+
+    def build_field_sections(self):
+        """Генератор: добавляет поля одной секции за шаг"""
+        for name in self.FIELD_SECTIONS:
+            container = self.new_section(name)
+            self.scroll_layout.addWidget(container)
+            yield from self.section_steps(name, container.layout())
+
+        # --- Outbounds (по группе на outbound, только показанные) ---
+        yield from self.build_outbound_groups()
+
+    def new_section(self, name):
+        container = QWidget()
+        layout = QVBoxLayout()
+        layout.setSpacing(8)
+        layout.setContentsMargins(0, 0, 0, 0)
+        container.setLayout(layout)
+        self.section_widgets[name] = container
+        return container
+
+    def section_steps(self, name, layout):
+        builders = {
+            "log": self.build_log_section,
+            "inbounds": self.build_inbound_section,
+            "dns": self.build_dns_section,
+            "routing": self.build_routing_section,
+        }
+        return builders[name](layout)
+
+    def refresh_section(self, name):
+        """Строит секцию формы заново на том же месте; строки берутся из пула"""
+        old = self.section_widgets.get(name)
+        if old is None:
+            return
+        self.release_rows((name,))
+        container = self.new_section(name)
+        self.scroll_layout.replaceWidget(old, container)
+        old.setParent(None)
+        old.deleteLater()
+        for _step in self.section_steps(name, container.layout()):
+            pass
+
+    def release_rows(self, prefix):
+        """Возвращает в пул строки полей под prefix"""
+        n = len(prefix)
+        for key_path in [key_path for key_path in self.field_rows if key_path[:n] == prefix]:
+            self.field_pool.release(self.field_rows.pop(key_path))
+            self.inputs.pop(key_path, None)
+            self.checkboxes.pop(key_path, None)
+        self.index.discard_labels(prefix)
+
+    def build_log_section(self, layout):
+        # --- Логирование ---
+        log = self.config_data.get("log", {})
+        self.add_field("Log Level", log.get("loglevel", "warning"), ["log", "loglevel"], layout=layout)
+        yield "log"
+
+    def build_inbound_section(self, layout):
+        # --- Inbounds ---
+        inbounds = self.config_data.get("inbounds", [])
+
+        # SOCKS inbound
+        socks_index = self.index.first("inbounds", "socks")
+
+        if socks_index is not None:
+            inbound = inbounds[socks_index]
+            self.add_field("SOCKS Port", inbound.get("port", 1080), ["inbounds", socks_index, "port"],
+                           layout=layout)
+            self.add_field("SOCKS Listen", inbound.get("listen", "127.0.0.1"), ["inbounds", socks_index, "listen"],
+                           layout=layout)
+            self.add_field("SOCKS UDP", inbound.get("settings", {}).get("udp", True),
+                           ["inbounds", socks_index, "settings", "udp"], "checkbox", layout=layout)
+            self.add_field("SOCKS Auth", inbound.get("settings", {}).get("auth", "noauth"),
+                           ["inbounds", socks_index, "settings", "auth"], layout=layout)
+
+        # HTTP inbound (если есть)
+        http_index = self.index.first("inbounds", "http")
+
+        if http_index is not None:
+            inbound = inbounds[http_index]
+            self.add_field("HTTP Port", inbound.get("port", 1087), ["inbounds", http_index, "port"],
+                           layout=layout)
+            self.add_field("HTTP Listen", inbound.get("listen", "127.0.0.1"), ["inbounds", http_index, "listen"],
+                           layout=layout)
+        yield "inbounds"
+
+    def build_dns_section(self, layout):
+        # --- DNS Servers ---
+        dns_servers = self.config_data.get("dns", {}).get("servers", [])
+        for i, server in enumerate(dns_servers[:4]):
+            if isinstance(server, str):
+                self.add_field(f"DNS Server {i + 1}", server, ["dns", "servers", i], layout=layout)
+        yield "dns"
+
+    def build_routing_section(self, section_layout):
+        """Генератор: domainStrategy и outbound каждого правила, по 50 правил за шаг"""
+        group = QGroupBox("Маршрутизация")
+        layout = QVBoxLayout()
+        layout.setSpacing(6)
+        group.setLayout(layout)
+        section_layout.addWidget(group)
+
+        test_button = QPushButton("Проверить маршрут...")
+        test_button.clicked.connect(self.open_routing_tester)
+        test_button.setCursor(Qt.CursorShape.PointingHandCursor)
+        layout.addWidget(test_button)
+
+        if self.confdir is not None and "routing" not in self.confdir.merged:
+            # В режиме -confdir фрагменты маршрутизации читаются по запросу
+            load_button = QPushButton("Загрузить правила маршрутизации")
+            load_button.clicked.connect(self.load_routing_section)
+            load_button.setCursor(Qt.CursorShape.PointingHandCursor)
+            layout.addWidget(load_button)
+            yield "routing"
+            return
+
+        routing = self.config_data.get("routing", {})
+        self.add_field("Domain Strategy", routing.get("domainStrategy", "AsIs"),
+                       ["routing", "domainStrategy"], layout=layout)
+        rules = routing.get("rules", [])
+        for i, rule in enumerate(rules[:self.MAX_ROUTING_RULES]):
+            if not isinstance(rule, dict):
+                continue
+            key = "balancerTag" if "balancerTag" in rule and "outboundTag" not in rule else "outboundTag"
+            self.add_field(f"Rule #{i + 1} {key}", rule.get(key, ""), ["routing", "rules", i, key],
+                           layout=layout, tooltip=rule_summary(rule))
+            if i % 50 == 49:
+                yield "routing"
+        if len(rules) > self.MAX_ROUTING_RULES:
+            layout.addWidget(QLabel(f"Ещё правил: {len(rules) - self.MAX_ROUTING_RULES} — во вкладке «Весь конфиг»"))
+        yield "routing"
+
+    def load_routing_section(self):
+        self.ensure_sections(("routing",))
+        self.refresh_section("routing")
+
+    def open_routing_tester(self):
+        if not self.config_data:
+            self.show_message("Ошибка", "Сначала загрузите конфиг", icon=QMessageBox.Icon.Warning)
+            return
+        from gui.routing_dialog import RoutingTesterDialog
+
+        self.ensure_sections(("routing",))
+        RoutingTesterDialog(self.config_data, self).exec()
+
+    def open_compare(self):
+        if not self.config_data:
+            self.show_message("Ошибка", "Сначала загрузите конфиг", icon=QMessageBox.Icon.Warning)
+            return
+        from gui.diff_dialog import CompareDialog
+
+        CompareDialog(self.config_data, self).exec()
+
+    def build_outbound_groups(self):
+        """Генератор: контейнер групп outbound и первая страница подходящих под поиск.
+
+        Группы остальных outbound строятся, только когда попадают в показанные
+        (поиск, «Показать ещё»), поэтому число виджетов не растёт с конфигом.
+        """
+        container = QWidget()
+        self.outbound_layout = QVBoxLayout()
+        self.outbound_layout.setSpacing(8)
+        self.outbound_layout.setContentsMargins(0, 0, 0, 0)
+        container.setLayout(self.outbound_layout)
+        self.scroll_layout.addWidget(container)
+
+        self.outbound_more = QPushButton()
+        self.outbound_more.clicked.connect(self.show_more_outbounds)
+        self.outbound_more.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.scroll_layout.addWidget(self.outbound_more)
+        self.apply_server_filter()
+        yield "outbounds"
+
+    def add_outbound_group(self, i, outbound, position=-1):
+        """Группа полей одного outbound: все vnext/servers, все пользователи, stream"""
+        protocol = outbound.get("protocol", "")
+        group = QGroupBox(self.outbound_title(i, outbound))
+        layout = QVBoxLayout()
+        layout.setSpacing(6)
+        group.setLayout(layout)
+        base = ["outbounds", i]
+
+        self.add_field("Tag", outbound.get("tag", ""), base + ["tag"], layout=layout)
+        self.add_field("Outbound Protocol", protocol or "vless", base + ["protocol"], layout=layout)
+
+        settings = outbound.get("settings", {})
+        servers_key = "servers" if "servers" in settings else "vnext"
+        servers = settings.get(servers_key) or ([{}] if protocol == "vless" else [])
+        for j, server in enumerate(servers):
+            suffix = f" #{j + 1}" if j else ""
+            server_path = base + ["settings", servers_key, j]
+            self.add_field(f"Server Address{suffix}", server.get("address", ""),
+                           server_path + ["address"], layout=layout)
+            self.add_field(f"Server Port{suffix}", server.get("port", 443),
+                           server_path + ["port"], layout=layout)
+            if "password" in server:
+                self.add_field(f"Password{suffix}", server.get("password", ""),
+                               server_path + ["password"], layout=layout)
+            for k, user in enumerate(server.get("users", [])):
+                user_suffix = f" #{j + 1}.{k + 1}" if j or k else ""
+                user_path = server_path + ["users", k]
+                self.add_field(f"User ID{user_suffix}", user.get("id", ""), user_path + ["id"], layout=layout)
+                if protocol == "vless":
+                    self.add_field(f"Flow{user_suffix}", user.get("flow", ""),
+                                   user_path + ["flow"], layout=layout)
+                    self.add_field(f"Encryption{user_suffix}", user.get("encryption", "none"),
+                                   user_path + ["encryption"], layout=layout)
+
+        if protocol == "vless" or "streamSettings" in outbound:
+            stream = outbound.get("streamSettings", {})
+            stream_path = base + ["streamSettings"]
+            self.add_field("Network", stream.get("network", "tcp"), stream_path + ["network"], layout=layout)
+            self.add_field("Security", stream.get("security", "reality"), stream_path + ["security"], layout=layout)
+
+            if protocol == "vless" or "realitySettings" in stream or stream.get("security") == "reality":
+                reality = stream.get("realitySettings", {})
+                reality_path = stream_path + ["realitySettings"]
+                self.add_field("Public Key", reality.get("publicKey", ""),
+                               reality_path + ["publicKey"], layout=layout)
+                self.add_field("Short ID", reality.get("shortId", ""), reality_path + ["shortId"], layout=layout)
+                self.add_field("Server Name", reality.get("serverName", ""),
+                               reality_path + ["serverName"], layout=layout)
+                self.add_field("Fingerprint", reality.get("fingerprint", "chrome"),
+                               reality_path + ["fingerprint"], layout=layout)
+                self.add_field("SPX", reality.get("spx", ""), reality_path + ["spx"], "checkbox", layout=layout)
+            elif stream.get("security") == "tls":
+                tls = stream.get("tlsSettings", {})
+                self.add_field("Server Name", tls.get("serverName", ""),
+                               stream_path + ["tlsSettings", "serverName"], layout=layout)
+                self.add_field("Fingerprint", tls.get("fingerprint", ""),
+                               stream_path + ["tlsSettings", "fingerprint"], layout=layout)
+
+        self.outbound_groups[i] = group
+        self.outbound_layout.insertWidget(position, group)
+        return group
+
+    def refresh_outbound_group(self, i):
+        """Строит группу outbound заново на том же месте; строки берутся из пула"""
+        group = self.outbound_groups.pop(i, None)
+        if group is None:
+            return
+        position = self.outbound_layout.indexOf(group)
+        hidden = group.isHidden()
+        self.release_rows(("outbounds", i))
+        group.setParent(None)
+        group.deleteLater()
+        self.add_outbound_group(i, self.config_data["outbounds"][i], position).setVisible(not hidden)
+
+    def ensure_sections(self, sections=None):
+        """В режиме -confdir дочитывает фрагменты секций (None — все) и добавляет их в конфиг"""
+        if self.confdir is None or self.config_data is None:
+            return False
+        try:
+            values = self.confdir.load_sections(sections)
+        except Exception as e:
+            self.show_message("Ошибка", f"Не удалось прочитать фрагмент:\n{e}", icon=QMessageBox.Icon.Critical)
+            return False
+        for section, value in values.items():
+            self.index.set((section,), value)
+        if values:
+            self.validator.validate(self.config_data)
+        return bool(values)
+
+    def on_tab_changed(self, index):
+        # Дерево показывает весь конфиг — дочитываем остальные фрагменты
+        if self.tabs.widget(index) is self.tree_view and self.ensure_sections():
+            self.tree_model.set_config(self.config_data)
+
+    # ----------------- Изменения на диске -----------------
+    def watch_current(self, base=None, base_key=None):
+        if self.confdir is None and self.config_path is not None:
+            self.watcher.watch(self.config_path, base, base_key)
+        else:
+            self.watcher.unwatch()
+
+    def on_external_change(self, path, changes):
+        """Файл изменён другой программой: применяем изменения без перестроения формы.
+
+        Изменения полей с несохранёнными правками применяются только с согласия.
+        """
+        if self.config_data is None or self.config_path is None or Path(path) != Path(self.config_path):
+            return
+        clean, conflicts = split_conflicts(changes, self.config_data, self.dirty_paths)
+        kept = 0
+        if conflicts:
+            if self.ask_merge(path, conflicts):
+                clean.extend(conflicts)
+                self.dirty_paths.difference_update(
+                    [dirty for dirty in self.dirty_paths if any(overlaps(dirty, c[0]) for c in conflicts)])
+                if not self.dirty_paths:
+                    self.mark_workspace_item(self.config_path, False)
+            else:
+                kept = len(conflicts)
+        self.apply_external(clean)
+        text = f"{Path(path).name} изменён на диске: применено изменений {len(clean)}"
+        if kept:
+            text += f", оставлены ваши правки: {kept}"
+        self.status_label.setText(text)
+
+    def ask_merge(self, path, conflicts):
+        """True — взять значения с диска, False — оставить свои правки"""
+        lines = "\n".join(f"• {format_path(key_path)}" for key_path, _old, _new in conflicts[:10])
+        if len(conflicts) > 10:
+            lines += f"\n• ... и еще {len(conflicts) - 10}"
+        box = QMessageBox(self)
+        box.setIcon(QMessageBox.Icon.Warning)
+        box.setWindowTitle("Файл изменён на диске")
+        box.setText(f"{Path(path).name} изменён другой программой, и часть изменений касается "
+                    f"полей с несохранёнными правками:\n{lines}")
+        disk_button = box.addButton("Взять с диска", QMessageBox.ButtonRole.DestructiveRole)
+        box.addButton("Оставить мои", QMessageBox.ButtonRole.RejectRole)
+        box.exec()
+        return box.clickedButton() is disk_button
+
+    def apply_external(self, changes):
+        """Вносит изменения в config_data и обновляет только затронутые строки формы"""
+        if not changes:
+            return
+        for key_path, _old, value in changes:
+            self.index.restore(key_path, value)
+        self.refresh_form(changes)
+
+    def refresh_form(self, changes):
+        """Показывает в форме и дереве изменения config_data, сделанные не через поля формы.
+
+        Форма строится заново, только если добавлены или удалены inbound/outbound.
+        Иначе обновляются строки изменённых полей, а секция или группа outbound,
+        у которой меняется набор строк, строится заново из пула.
+        """
+        if not self.form_complete or resizes_sections(changes):
+            # Неизменённые единицы берутся из кэша проверки
+            self.validator.validate(self.config_data)
+            self.rebuild_form()
+            return
+        sections, groups = set(), set()
+        for key_path, old_value, value in changes:
+            self.tree_model.refresh_path(key_path)
+            self.reindex_server(key_path)
+            self.revalidate(key_path)
+            # Строка остаётся той же, если поле было и осталось скаляром
+            same_row = key_path in self.field_rows and not any(
+                other is MISSING or is_container(other) for other in (old_value, value))
+            if key_path[0] == "outbounds":
+                if same_row and key_path[-1] not in self.GROUP_LAYOUT_KEYS:
+                    self.sync_widget(key_path)
+                else:
+                    groups.add(key_path[1])
+            elif same_row:
+                self.sync_widget(key_path)
+            else:
+                sections.add(key_path[0])
+        for name in sections:
+            self.refresh_section(name)
+        for i in groups:
+            self.refresh_outbound_group(i)
+
+    # ----------------- Рабочая папка -----------------
+    def open_workspace(self):
+        directory = QFileDialog.getExistingDirectory(self, "Открыть папку с конфигами")
+        if directory:
+            self.set_workspace(Path(directory))
+
+    def set_workspace(self, directory):
+        """Показывает список конфигов папки; выбор в списке переключает конфиг"""
+        try:
+            configs = list_configs(directory)
+        except OSError as e:
+            self.show_message("Ошибка", f"Не удалось открыть папку:\n{e}", icon=QMessageBox.Icon.Critical)
+            return
+        self.workspace_dir = directory
+        self.workspace_list.blockSignals(True)
+        self.workspace_list.clear()
+        for path in configs:
+            item = QListWidgetItem(path.name)
+            item.setData(Qt.ItemDataRole.UserRole, str(path))
+            item.setToolTip(str(path))
+            self.workspace_list.addItem(item)
+        self.workspace_list.blockSignals(False)
+        self.workspace_list.setVisible(True)
+        self.status_label.setText(f"Конфигов в папке: {len(configs)}")
+
+    def on_workspace_item_changed(self, current, _previous):
+        if current is not None:
+            self.switch_config(Path(current.data(Qt.ItemDataRole.UserRole)))
+
+    def switch_config(self, path):
+        """Делает path текущим конфигом: из кэша мгновенно, иначе загрузкой с диска"""
+        if self.config_data is not None and self.config_path is not None and Path(self.config_path) == path:
+            return
+        self.stash_current()
+        state = self.config_cache.take(path)
+        if state is None:
+            self.load_config(path)
+            return
+        self.restore_state(state)
+        self.status_label.setText(f"{path.name}: из кэша. {self.validation_summary()}")
+
+    def stash_current(self):
+        """Кладёт текущий конфиг вместе с формой в кэш и начинает с пустого состояния"""
+        if self.load_task is not None:
+            self.load_task.cancel()
+            self.load_task = None
+            self.set_loading(False)
+        base, base_key = self.watcher.baseline()
+        self.watcher.unwatch()
+        if self.config_data is None or self.config_path is None:
+            return
+        # Недостроенная форма достроится при возврате
+        self.build_generation += 1
+        state = {attr: getattr(self, attr) for attr in self.STATE_ATTRS}
+        state["form"] = self.scroll.takeWidget()
+        state["scroll_layout"] = self.scroll_layout
+        # Версия с диска, с которой совпадает config_data: при возврате файл сверяется с ней
+        state["base"] = (base, base_key)
+        try:
+            file_size = Path(self.config_path).stat().st_size
+        except OSError:
+            file_size = 0
+        size = estimate_size(file_size, len(self.inputs) + len(self.checkboxes))
+        self.config_cache.put(self.config_path, state, size, pinned=bool(self.dirty_paths), key=base_key)
+        self.mark_workspace_item(self.config_path, bool(self.dirty_paths))
+
+        self.config_path = None
+        self.config_data = None
+        self.index = None
+        self.validator = ConfigValidator()
+        self.history = History()
+        self.dirty_paths = set()
+        self.inputs = {}
+        self.checkboxes = {}
+        self.field_rows = {}
+        self.outbound_groups = {}
+        self.outbound_layout = None
+        self.outbound_more = None
+        self.outbound_limit = self.OUTBOUND_PAGE
+        self.section_widgets = {}
+        self.server_search = None
+        self.current_outbound = None
+        self.outbound_latency = {}
+        self.form_complete = False
+        self.confdir = None
+        self.new_form_container()
+        self.tree_model.set_config(None)
+
+    def restore_state(self, state):
+        for attr in self.STATE_ATTRS:
+            setattr(self, attr, state[attr])
+        self.scroll_content = state["form"]
+        self.scroll_layout = state["scroll_layout"]
+        self.scroll.setWidget(self.scroll_content)
+        self.file_label.setText(str(self.config_path))
+        self.tree_model.set_config(self.config_data)
+        self.update_history_actions()
+        self.apply_server_filter()
+        self.watch_current(*state["base"])
+        if not self.form_complete:
+            self.rebuild_form()
+
+    def release_state(self, state):
+        """Освобождает форму конфига, вытесненного из кэша"""
+        state["form"].deleteLater()
+        self.mark_workspace_item(state["config_path"], False)
+
+    def mark_workspace_item(self, path, dirty):
+        """Помечает «*» конфиг с несохранёнными правками в списке папки"""
+        for row in range(self.workspace_list.count()):
+            item = self.workspace_list.item(row)
+            if item.data(Qt.ItemDataRole.UserRole) == str(path):
+                name = Path(path).name
+                item.setText(f"* {name}" if dirty else name)
+                return
+
+    # ----------------- Поиск серверов -----------------
+    def matching_outbounds(self):
+        """Индексы outbound под строкой поиска; после проверки задержки — быстрые первыми"""
+        outbounds = self.config_data.get("outbounds", []) if self.config_data else []
+        matches = self.server_search.search(self.search_input.text()) \
+            if self.server_search is not None else None
+        candidates = range(len(outbounds)) if matches is None else sorted(matches)
+        order = [i for i in candidates if isinstance(outbounds[i], dict)]
+        if self.outbound_latency:
+            order.sort(key=self.latency_key)
+        return order
+
+    def latency_key(self, i):
+        latency = self.outbound_latency.get(i)
+        return (latency is None, latency or 0.0, i)
+
+    def apply_server_filter(self):
+        """Показывает первые outbound_limit подходящих outbound, достраивая их группы"""
+        if self.outbound_layout is None:
+            return
+        order = self.matching_outbounds()
+        shown = order[:self.outbound_limit]
+        visible = set(shown)
+        for i, group in self.outbound_groups.items():
+            if i not in visible and not group.isHidden():
+                group.setVisible(False)
+        outbounds = self.config_data["outbounds"] if shown else []
+        for position, i in enumerate(shown):
+            group = self.outbound_groups.get(i) or self.add_outbound_group(i, outbounds[i])
+            if self.outbound_layout.indexOf(group) != position:
+                self.outbound_layout.insertWidget(position, group)
+            if group.isHidden():
+                group.setVisible(True)
+        rest = len(order) - len(shown)
+        self.outbound_more.setText(f"Показать ещё (осталось {rest})")
+        self.outbound_more.setVisible(rest > 0)
+        self.search_input.setToolTip(f"Найдено серверов: {len(order)}")
+
+    def on_search_changed(self, _text):
+        self.outbound_limit = self.OUTBOUND_PAGE
+        self.apply_server_filter()
+
+    def show_more_outbounds(self):
+        self.outbound_limit += self.OUTBOUND_PAGE
+        self.apply_server_filter()
+
+    def reindex_server(self, key_path):
+        """Обновляет поисковый индекс после правки поля outbound"""
+        if self.server_search is not None and len(key_path) > 1 and key_path[0] == "outbounds":
+            i = key_path[1]
+            outbound = self.config_data["outbounds"][i]
+            self.server_search.update(i, outbound)
+            if i in self.outbound_groups:
+                self.outbound_groups[i].setTitle(self.outbound_title(i, outbound))
+
+    def outbound_title(self, i, outbound):
+        title = f"#{i} {outbound.get('tag', '')} — {outbound.get('protocol', '')}"
+        if i in self.outbound_latency:
+            latency = self.outbound_latency[i]
+            title += f"  [{latency:.0f} ms]" if latency is not None else "  [недоступен]"
+        return title
+
+    # ----------------- Проверка задержки -----------------
+    def probe_servers(self):
+        """Параллельно измеряет TCP/TLS задержку всех серверов outbound"""
+        if not self.config_data:
+            self.show_message("Ошибка", "Сначала загрузите или создайте конфиг файл", icon=QMessageBox.Icon.Warning)
+            return
+
+        from core.probe import ProbeCache, collect_endpoints
+        from gui.probe_task import ProbeTask
+
+        endpoints = collect_endpoints(self.config_data)
+        if not endpoints:
+            self.status_label.setText("Нет серверов для проверки")
+            return
+
+        if self.probe_cache is None:
+            self.probe_cache = ProbeCache()
+        task = ProbeTask(endpoints, self.probe_cache)
+        task.signals.progress.connect(
+            lambda done, total: self.status_label.setText(f"Проверка задержки: {done}/{total}"))
+        task.signals.finished.connect(self.on_probe_finished)
+        task.signals.failed.connect(
+            lambda error: self.show_message("Ошибка", f"Ошибка проверки:\n{error}", icon=QMessageBox.Icon.Critical))
+        task.signals.failed.connect(lambda _error: self.probe_button.setEnabled(True))
+        self.probe_task = task
+        self.probe_button.setEnabled(False)
+        self.status_label.setText("Проверка задержки...")
+        QThreadPool.globalInstance().start(task)
+
+    def on_probe_finished(self, endpoints):
+        self.probe_task = None
+        self.probe_button.setEnabled(True)
+        from core.probe import outbound_latency
+
+        self.outbound_latency = outbound_latency(endpoints)
+        outbounds = self.config_data.get("outbounds", [])
+        for i, group in self.outbound_groups.items():
+            if i < len(outbounds):
+                group.setTitle(self.outbound_title(i, outbounds[i]))
+        self.apply_server_filter()
+
+        alive = sum(1 for latency in self.outbound_latency.values() if latency is not None)
+        self.status_label.setText(f"Доступно серверов: {alive} из {len(self.outbound_latency)}")
+
+    # ----------------- Ссылки и QR -----------------
+    def share_to_directory(self):
+        directory = QFileDialog.getExistingDirectory(self, "Папка для ссылок и QR-кодов")
+        if directory:
+            self.share_links(directory)
+
+    def share_to_zip(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Архив ссылок и QR-кодов", "xray_links.zip", "ZIP (*.zip)")
+        if path:
+            self.share_links(path if path.lower().endswith(".zip") else path + ".zip")
+
+    def share_links(self, target):
+        """Ссылки и QR-коды всех outbound в фоне; экспорт в папку или архив target"""
+        if not self.config_data:
+            self.show_message("Ошибка", "Сначала загрузите или создайте конфиг файл", icon=QMessageBox.Icon.Warning)
+            return
+
+        from core.share import ShareCache, default_cache_dir
+        from gui.share_task import ShareTask
+
+        if self.share_cache is None:
+            self.share_cache = ShareCache(default_cache_dir())
+        task = ShareTask(copy.deepcopy(self.config_data.get("outbounds", [])), target, self.share_cache)
+        task.signals.progress.connect(
+            lambda done, total: self.status_label.setText(f"QR-коды: {done}/{total}"))
+        task.signals.finished.connect(self.on_share_finished)
+        task.signals.failed.connect(
+            lambda error: self.show_message("Ошибка", f"Не удалось выгрузить ссылки:\n{error}",
+                                            icon=QMessageBox.Icon.Critical))
+        task.signals.failed.connect(lambda _error: self.share_button.setEnabled(True))
+        self.share_task = task
+        self.share_button.setEnabled(False)
+        self.status_label.setText("Сборка ссылок...")
+        QThreadPool.globalInstance().start(task)
+
+    def on_share_finished(self, target, stats):
+        self.share_task = None
+        self.share_button.setEnabled(True)
+        text = (f"Ссылок: {stats['links']} -> {target} (заново: {stats['rendered']}, "
+                f"из кэша: {stats['cached']}, {stats['elapsed_s']} с)")
+        if stats["errors"]:
+            text += f", без адреса или id: {stats['errors']}"
+        if not stats["qr"]:
+            text += ". QR-коды не созданы: установите пакет qrcode"
+        self.status_label.setText(text)
+
+    # ----------------- Правки и история -----------------
+    def apply_edit(self, key_path, value):
+        """Записывает значение поля в config_data (с приведением типа) через индекс.
+
+        Возвращает изменение (key_path, old, new) и созданный промежуточный узел (или None)
+        для истории.
+        """
+        key_path = tuple(key_path)
+        old_value = self.index.get(key_path, MISSING)
+        created = self.index.update(key_path, value)
+        self.dirty_paths.add(key_path)
+        self.tree_model.refresh_path(key_path)
+        self.reindex_server(key_path)
+        self.revalidate(key_path)
+        return (key_path, old_value, self.index.get(key_path)), created
+
+    @trace.traced()
+    def on_field_edited(self, key_path, value):
+        """Правка в форме сразу попадает в config_data; набор в одном поле — один шаг истории"""
+        change, created = self.apply_edit(key_path, value)
+        self.history.record(f"Правка {key_path[-1]}", [change], merge_key=key_path, created=[created])
+        if key_path[0] == "outbounds":
+            self.current_outbound = key_path[1]
+        self.update_history_actions()
+
+    def seal_history(self):
+        # Пул строк общий для конфигов рабочей папки: история берётся текущая
+        self.history.seal()
+
+    def sync_widget(self, key_path):
+        """Показывает в поле формы текущее значение из config_data"""
+        value = self.index.get(key_path, "")
+        if key_path in self.inputs:
+            self.inputs[key_path].setText(str(value))
+        elif key_path in self.checkboxes:
+            self.checkboxes[key_path].setChecked(bool(value))
+
+    def _replay(self, replay, verb):
+        applied = []
+
+        def restore_value(key_path, value):
+            # Значение из истории (MISSING — удалить ключ); форма обновляется после шага
+            applied.append((key_path, self.index.get(key_path, MISSING), value))
+            self.index.restore(key_path, value)
+            self.dirty_paths.add(key_path)
+
+        step = replay(restore_value)
+        if step is None:
+            return
+        self.refresh_form(applied)
+        self.status_label.setText(f"{verb}: {step.label}")
+        self.update_history_actions()
+
+    def undo(self):
+        self._replay(self.history.undo, "Отменено")
+
+    def redo(self):
+        self._replay(self.history.redo, "Повторено")
+
+    def update_history_actions(self):
+        self.undo_button.setEnabled(self.history.can_undo())
+        self.redo_button.setEnabled(self.history.can_redo())
+        self.undo_button.setToolTip(self.history.undo_label())
+        self.redo_button.setToolTip(self.history.redo_label())
+
+    # ----------------- Сохранение -----------------
+    def save_config(self):
+        if not self.config_path or not self.config_data:
+            self.show_message("Ошибка", "Сначала выберите или создайте конфиг файл", icon=QMessageBox.Icon.Warning)
+            return
+
+        if self.confdir is None and self.watcher.is_stale():
+            # Изменения с диска ещё не подхвачены — не затираем их молча
+            answer = QMessageBox.question(
+                self, "Файл изменён на диске",
+                f"{Path(self.config_path).name} изменён другой программой после загрузки.\n"
+                "Перезаписать его вашей версией?")
+            if answer != QMessageBox.StandardButton.Yes:
+                return
+
+        # Правки уже применены к config_data в момент редактирования. Здесь снимаются
+        # только байты, запись (fsync, rename) идёт в фоне; повторные сохранения
+        # до окончания записи объединяются
+        started = trace.now()
+        dirty = set(self.dirty_paths)
+
+        def queue_write(path, data):
+            _owner, pending = self.unsaved_paths.get(Path(path), (None, set()))
+            self.unsaved_paths[Path(path)] = (self.config_path, pending | dirty)
+            self.writer.submit(path, dump_config(data))
+            return True
+
+        suspended = False
+        try:
+            if self.confdir is not None:
+                # Перезаписываются только фрагменты, которых касались правки
+                queued = self.confdir.save(self.config_data, self.dirty_paths, write=queue_write)
+            else:
+                self.watcher.suspend()
+                suspended = True
+                queued = [Path(self.config_path)]
+                queue_write(self.config_path, self.config_data)
+        except Exception as e:
+            if suspended:
+                self.watcher.resume()
+            self.status_label.setText(f"Не удалось сохранить изменения: {e}")
+            return
+
+        trace.add("save_config", started, {"dirty": len(self.dirty_paths)})
+        self.dirty_paths.clear()
+        self.history.seal()
+        self.mark_workspace_item(self.config_path, False)
+        if queued:
+            self.status_label.setText(f"Сохранение: {', '.join(path.name for path in queued)}...")
+        else:
+            self.status_label.setText("Изменений нет, файлы не перезаписаны")
+
+    def on_write_finished(self, result):
+        """Итог фоновой записи: сообщение в строке состояния без диалога"""
+        owner, dirty = self.unsaved_paths.get(result.path, (None, set()))
+        if not result.queued:
+            self.unsaved_paths.pop(result.path, None)
+            if self.watcher.path == result.path:
+                self.watcher.resume()
+        if result.error:
+            if owner is not None and owner == self.config_path:
+                # Правки не записаны — при следующем сохранении файл запишется снова
+                self.dirty_paths.update(dirty)
+                self.mark_workspace_item(self.config_path, True)
+            self.status_label.setText(f"Ошибка записи {result.path.name}: {result.error}")
+        elif result.queued:
+            self.status_label.setText(f"Сохранение: {result.path.name}...")
+        elif result.written:
+            text = f"Сохранено: {result.path.name} ({result.elapsed_s:.2f} с"
+            if result.coalesced:
+                text += f", объединено сохранений: {result.coalesced + 1}"
+            self.status_label.setText(text + ")")
+        else:
+            self.status_label.setText(f"{result.path.name}: изменений нет, файл не перезаписан")
+
+    @trace.traced()
+    def on_tree_value_edited(self, key_path, old_value, value):
+        """Синхронизирует индекс, историю и поле формы с правкой, сделанной в дереве"""
+        key_path_tuple = tuple(key_path)
+        self.index.set(key_path_tuple, value)
+        self.dirty_paths.add(key_path_tuple)
+        self.history.record(f"Правка {key_path_tuple[-1]} в дереве", [(key_path_tuple, old_value, value)])
+        self.update_history_actions()
+        self.reindex_server(key_path_tuple)
+        self.sync_widget(key_path_tuple)
+        self.revalidate(key_path_tuple)
+
+    # ----------------- Вставка ссылки -----------------
+    def paste_link(self):
+        if not self.config_data:
+            self.show_message("Ошибка", "Сначала загрузите или создайте конфиг файл", icon=QMessageBox.Icon.Warning)
+            return
+
+        clipboard = QApplication.clipboard()
+        url = clipboard.text().strip()
+
+        try:
+            started = trace.now()
+            link = parse_link(url)
+
+            # Цель — outbound, с полями которого работали последним, иначе первый того же протокола
+            outbound_index = self.current_outbound
+            if outbound_index is None or self.index.get(("outbounds", outbound_index, "protocol")) != link.protocol:
+                outbound_index = self.index.first("outbounds", link.protocol)
+            if outbound_index is None:
+                # Такого протокола в конфиге нет — ссылка становится новым outbound
+                used = {o.get("tag") for o in self.config_data.get("outbounds", []) if isinstance(o, dict)}
+                tag = unique_tag(link.name or link.protocol, used, {})
+                self.append_outbounds([link.to_outbound(tag)], f"Вставка {link.protocol}")
+                trace.add("paste_link", started, {"fields": len(link.fields)})
+                self.show_message("Успех", f"Добавлен outbound {tag} ({link.protocol}).\n"
+                                           "Не забудьте сохранить изменения.")
+                return
+
+            # Значения ссылки уже нужных типов: пишем как есть, поля формы только показываем
+            field_mapping = {}
+            changes = []
+            created = []
+            # Настройки другой security (tlsSettings при вставке reality-ссылки) удаляются
+            for rel_path in link.stale_blocks(self.config_data["outbounds"][outbound_index]):
+                key_path = ("outbounds", outbound_index, *rel_path)
+                old_value = self.index.get(key_path)
+                self.index.restore(key_path, MISSING)
+                self.dirty_paths.add(key_path)
+                changes.append((key_path, old_value, MISSING))
+            for label, rel_path, value in link.field_values():
+                key_path = ("outbounds", outbound_index, *rel_path)
+                old_value = self.index.get(key_path, MISSING)
+                created.append(self.index.set(key_path, value))
+                self.dirty_paths.add(key_path)
+                changes.append((key_path, old_value, value))
+                field_mapping[label] = value
+            # Строки формы и ветви дерева обновляются по изменённым путям; дерево не сбрасывается
+            self.refresh_form(changes)
+            updated = len(field_mapping)
+            self.history.record(f"Вставка {link.protocol}", changes, created=created)
+            self.update_history_actions()
+            trace.add("paste_link", started, {"fields": updated})
+
+            # Показываем какие поля были обновлены
+            updated_fields = list(field_mapping)
+
+            message = f"Обновлено {updated} полей:\n"
+            for field in updated_fields[:5]:  # Показываем первые 5 полей
+                value = field_mapping[field]
+                if field in SECRET_LABELS:
+                    value = f"{str(value)[:8]}..."
+                message += f"• {field}: {value}\n"
+
+            if len(updated_fields) > 5:
+                message += f"• ... и еще {len(updated_fields) - 5} полей\n"
+
+            self.show_message("Успех", message)
+
+        except LinkError as e:
+            self.show_message("Ошибка", str(e), icon=QMessageBox.Icon.Warning)
+        except Exception as e:
+            self.show_message("Ошибка", f"Ошибка при разборе ссылки:\n{str(e)}", icon=QMessageBox.Icon.Critical)
+
+    # ----------------- Импорт подписки -----------------
+    def import_subscription_file(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Выберите файл подписки", "", "All Files (*)")
+        if path:
+            try:
+                blob = Path(path).read_bytes()
+            except OSError as e:
+                self.show_message("Ошибка", f"Не удалось прочитать файл:\n{e}", icon=QMessageBox.Icon.Critical)
+                return
+            self.import_subscription(blob)
+
+    def import_subscription_clipboard(self):
+        self.import_subscription(QApplication.clipboard().text())
+
+    def import_subscription(self, blob):
+        """Добавляет outbound на каждый уникальный сервер из подписки"""
+        if not self.config_data:
+            self.show_message("Ошибка", "Сначала загрузите или создайте конфиг файл", icon=QMessageBox.Icon.Warning)
+            return
+
+        start = len(self.config_data.get("outbounds", []))
+        indexed = ("outbounds",) in self.index
+        try:
+            new_outbounds, stats = import_subscription(self.config_data, blob)
+        except Exception as e:
+            self.show_message("Ошибка", f"Ошибка при разборе подписки:\n{e}", icon=QMessageBox.Icon.Critical)
+            return
+
+        if new_outbounds:
+            self.index_new_outbounds(start, indexed, "Импорт подписки")
+        self.show_message(
+            "Импорт подписки",
+            f"Ссылок: {stats['links']}\n"
+            f"Добавлено outbound: {stats['unique']}\n"
+            f"Дубликатов: {stats['duplicates']}\n"
+            f"Ошибок разбора: {stats['errors']}\n"
+            f"Скорость: {stats['links_per_s']} ссылок/с\n\n"
+            "Не забудьте сохранить изменения.",
+        )
+
+    def append_outbounds(self, new_outbounds, label):
+        """Дописывает outbounds в конец списка одним шагом истории"""
+        start = len(self.config_data.get("outbounds", []))
+        indexed = ("outbounds",) in self.index
+        self.config_data.setdefault("outbounds", []).extend(new_outbounds)
+        self.index_new_outbounds(start, indexed, label)
+
+    def index_new_outbounds(self, start, indexed, label):
+        """Индекс, история, поиск, проверка и группы формы для outbounds начиная с start"""
+        outbounds = self.config_data["outbounds"]
+        if indexed:
+            self.index.add_list_items(("outbounds",), start)
+            changes = [(("outbounds", i), MISSING, outbounds[i]) for i in range(start, len(outbounds))]
+        else:
+            self.index.set(("outbounds",), outbounds)
+            changes = [(("outbounds",), MISSING, outbounds)]
+
+        self.history.record(label, changes)
+        self.update_history_actions()
+        self.dirty_paths.add(("outbounds",))
+        self.tree_model.set_config(self.config_data)
+        self.server_search.add_many((i, outbounds[i]) for i in range(start, len(outbounds)))
+        for i in range(start, len(outbounds)):
+            self.validator.validate_path(self.config_data, ("outbounds", i))
+        self.apply_server_filter()
+
+    # ----------------- Экспорт настроек -----------------
+    def export_settings(self):
+        if not self.config_data:
+            self.show_message("Ошибка", "Нет данных для экспорта", icon=QMessageBox.Icon.Warning)
+            return
+
+        self.ensure_sections()
+        filters = {EXPORT_FILTERS[fmt]: fmt for fmt in available_formats()}
+        path, selected = QFileDialog.getSaveFileName(self, "Экспорт настроек", "xray_config_export.json",
+                                                     ";;".join(filters))
+        if path:
+            fmt = filters.get(selected, "pretty")
+            suffix = FORMATS[fmt][2]
+            if not path.endswith(suffix):
+                path = str(Path(path).with_suffix("")) + suffix if path.endswith(".json") else path + suffix
+            try:
+                # Снимок байтов здесь, сжатие и запись — в фоне
+                started = trace.now()
+                data, compress = encode(self.config_data, fmt)
+                self.writer.submit(path, data, compress)
+                trace.add("export_settings", started, {"format": fmt})
+                self.status_label.setText(f"Экспорт: {Path(path).name}...")
+            except Exception as e:
+                self.status_label.setText(f"Не удалось экспортировать: {e}")
+
+    # ----------------- Трассировка -----------------
+    def trace_widgets(self):
+        """Счётчик виджетов формы в трассе (только при XRAY_EDITOR_TRACE)"""
+        if trace.ENABLED:
+            trace.counter("widgets", {
+                "inputs": len(self.inputs),
+                "checkboxes": len(self.checkboxes),
+                "outbound_groups": len(self.outbound_groups),
+                "all": len(self.findChildren(QWidget)),
+            })
+
+    def dump_trace(self):
+        self.trace_widgets()
+        summary_path = trace.dump()
+        self.status_label.setText(f"Трасса записана: {trace.PATH}, сводка: {summary_path}")
+
+    def closeEvent(self, event):
+        # Незаконченные записи дописываются до выхода
+        self.writer.close()
+        super().closeEvent(event)
+
+    # ----------------- Сообщения -----------------
+    def show_message(self, title, text, icon=QMessageBox.Icon.Information):
+        msg = QMessageBox(self)
+        msg.setIcon(icon)
+        msg.setWindowTitle(title)
+        msg.setText(text)
+        msg.exec()
@@ -0,0 +1,111 @@
+"""Пул строк формы: при перестроении строки не создаются заново, а
+привязываются к новым путям ключей.
+
+Стиль строк задаётся таблицей стилей приложения (gui/theme.py) по
+objectName, поэтому повторное использование не требует разбора CSS.
+"""
+from PyQt6.QtWidgets import QCheckBox, QFrame, QHBoxLayout, QLabel, QLineEdit
+
+# Сверх этого числа свободные строки удаляются, а не хранятся
+POOL_LIMIT = 20000
+
+TRUE_STRINGS = ("true", "/", "1", "yes", "on")
+
+
+class FieldRow(QFrame):
+    """Строка формы: подпись, поле ввода или флажок и текст ошибки проверки"""
+
+    def __init__(self, kind, on_edited, on_finished):
+        super().__init__()
+        self.kind = kind
+        self.key_path = None
+        self.setObjectName("fieldRow")
+        layout = QHBoxLayout()
+        layout.setContentsMargins(5, 5, 5, 5)
+        layout.setSpacing(10)
+        self.setLayout(layout)
+
+        self.label = QLabel()
+        self.label.setObjectName("fieldLabel")
+        self.label.setFixedWidth(180)
+        layout.addWidget(self.label)
+
+        # Сигналы подключаются один раз; путь берётся в момент правки
+        if kind == "checkbox":
+            self.editor = QCheckBox()
+            self.editor.clicked.connect(lambda checked: on_edited(self.key_path, checked))
+            # Каждое нажатие — отдельный шаг истории
+            self.editor.clicked.connect(lambda _checked: on_finished())
+        else:
+            self.editor = QLineEdit()
+            self.editor.textEdited.connect(lambda text: on_edited(self.key_path, text))
+            self.editor.editingFinished.connect(on_finished)
+        self.editor.key_path = None
+        layout.addWidget(self.editor)
+
+        self.error_label = QLabel()
+        self.error_label.setObjectName("fieldError")
+        self.error_label.setWordWrap(True)
+        self.error_label.hide()
+        layout.addWidget(self.error_label)
+
+    def bind(self, label_text, value, key_path, tooltip=""):
+        """Показывает value поля key_path; прежняя ошибка сбрасывается"""
+        self.key_path = key_path
+        self.editor.key_path = key_path
+        self.label.setText(label_text)
+        self.label.setToolTip(tooltip)
+        if self.kind == "checkbox":
+            # Для SPX: если значение равно "/" или "true" - это True
+            if isinstance(value, str):
+                self.editor.setChecked(value.lower() in TRUE_STRINGS)
+            else:
+                self.editor.setChecked(bool(value))
+        else:
+            self.editor.setText(str(value))
+            self.editor.setCursorPosition(0)
+        self.set_error(None)
+
+    def set_error(self, message):
+        if not message and self.error_label.isHidden() and not self.editor.property("invalid"):
+            return
+        self.error_label.setText(message or "")
+        self.error_label.setVisible(bool(message))
+        self.editor.setToolTip(message or "")
+        if bool(self.editor.property("invalid")) != bool(message):
+            self.editor.setProperty("invalid", bool(message))
+            self.editor.style().unpolish(self.editor)
+            self.editor.style().polish(self.editor)
+
+
+class FieldPool:
+    """Свободные строки по виду ("text", "checkbox")"""
+
+    def __init__(self, on_edited, on_finished, limit=POOL_LIMIT):
+        self.on_edited = on_edited
+        self.on_finished = on_finished
+        self.limit = limit
+        self.free = {"text": [], "checkbox": []}
+        self.created = 0
+
+    def __len__(self):
+        return sum(len(rows) for rows in self.free.values())
+
+    def acquire(self, kind):
+        rows = self.free[kind]
+        if rows:
+            return rows.pop()
+        self.created += 1
+        return FieldRow(kind, self.on_edited, self.on_finished)
+
+    def release(self, row):
+        """Забирает строку из формы; родитель строки после этого может быть удалён"""
+        row.key_path = None
+        row.editor.key_path = None
+        if len(self) >= self.limit:
+            row.setParent(None)
+            row.deleteLater()
+            return
+        row.hide()
+        row.setParent(None)
+        self.free[row.kind].append(row)
@@ -0,0 +1,85 @@
+import threading
+
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+
+from core.confdir import ConfDir
+from core.config import LoadCancelled, load_config
+from core.index import ConfigIndex
+from core.trace import span
+
+
+class LoaderSignals(QObject):
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(object, object, object)
+    failed = pyqtSignal(object, str)
+    cancelled = pyqtSignal(object)
+
+
+class ConfigLoadTask(QRunnable):
+    """Чтение и разбор config.json в пуле потоков.
+
+    Сигналы приходят в GUI-поток; finished(path, config_data, index).
+    Структурный индекс и полная проверка схемы (validator) выполняются
+    здесь же, чтобы не занимать GUI-поток.
+    """
+
+    def __init__(self, path, validator=None):
+        super().__init__()
+        self.path = path
+        self.validator = validator
+        self.signals = LoaderSignals()
+        self._cancel = threading.Event()
+        self._last_percent = -1
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _report(self, done, total):
+        # Разбор занимает последние 10% шкалы
+        percent = int(done * 90 / total) if total else 90
+        if percent != self._last_percent:
+            self._last_percent = percent
+            self.signals.progress.emit(percent)
+
+    def read(self):
+        return load_config(self.path, progress=self._report, is_cancelled=self._cancel.is_set)
+
+    def run(self):
+        try:
+            data = self.read()
+            with span("ConfigIndex"):
+                index = None if self._cancel.is_set() else ConfigIndex(data)
+            if self.validator is not None and not self._cancel.is_set():
+                with span("validate"):
+                    self.validator.validate(data)
+        except LoadCancelled:
+            self.signals.cancelled.emit(self.path)
+            return
+        except Exception as e:
+            self.signals.failed.emit(self.path, str(e))
+            return
+        if self._cancel.is_set():
+            self.signals.cancelled.emit(self.path)
+            return
+        self.signals.progress.emit(100)
+        self.signals.finished.emit(self.path, data, index)
+
+
+class ConfDirLoadTask(ConfigLoadTask):
+    """Загрузка папки -confdir: читаются только фрагменты секций формы.
+
+    Остальные фрагменты читаются позже, когда их секция понадобится;
+    объект ConfDir доступен как task.confdir.
+    """
+
+    def __init__(self, path, sections, validator=None):
+        super().__init__(path, validator)
+        self.sections = sections
+        self.confdir = None
+
+    def read(self):
+        self.confdir = ConfDir(self.path)
+        data = self.confdir.compose(self.sections, is_cancelled=self._cancel.is_set)
+        if self._cancel.is_set():
+            raise LoadCancelled()
+        return data
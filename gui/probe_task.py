@@ -0,0 +1,34 @@
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+
+from core.probe import probe_endpoints
+
+
+class ProbeSignals(QObject):
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(list)
+    failed = pyqtSignal(str)
+
+
+class ProbeTask(QRunnable):
+    """Проверка задержки адресов в пуле потоков (свой цикл asyncio).
+
+    Адреса собираются заранее в GUI-потоке, чтобы не читать config_data
+    параллельно с правками.
+    """
+
+    def __init__(self, endpoints, cache, concurrency=200, timeout=3.0):
+        super().__init__()
+        self.endpoints = endpoints
+        self.cache = cache
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.signals = ProbeSignals()
+
+    def run(self):
+        try:
+            endpoints = probe_endpoints(self.endpoints, self.concurrency, self.timeout, self.cache,
+                                        progress=self.signals.progress.emit)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(endpoints)
@@ -0,0 +1,151 @@
+from PyQt6.QtCore import QObject, QRunnable, Qt, QThreadPool, pyqtSignal
+from PyQt6.QtWidgets import (
+    QCheckBox, QDialog, QFileDialog, QHBoxLayout, QLabel, QPlainTextEdit, QPushButton,
+    QSpinBox, QVBoxLayout
+)
+
+from core.routing import compile_config, format_result, read_targets, route_batch
+
+# Сколько строк результата показывать в окне (остальное — через «Сохранить»)
+MAX_SHOWN = 5000
+
+
+class RoutingTestSignals(QObject):
+    finished = pyqtSignal(list, object, object)
+    failed = pyqtSignal(str)
+
+
+class RoutingTestTask(QRunnable):
+    """Компиляция routing.rules и проверка списка целей в пуле потоков.
+
+    Окно модальное, поэтому config_data во время проверки не меняется.
+    """
+
+    def __init__(self, config, lines=None, path=None, field=None, loose=False):
+        super().__init__()
+        self.config = config
+        self.lines = lines
+        self.path = path
+        self.field = field
+        self.loose = loose
+        self.signals = RoutingTestSignals()
+
+    def run(self):
+        try:
+            matcher = compile_config(self.config, self.loose)
+            if self.path is not None:
+                with open(self.path, encoding="utf-8", errors="replace") as f:
+                    results, summary = route_batch(matcher, read_targets(f, self.field))
+            else:
+                results, summary = route_batch(matcher, read_targets(self.lines, self.field))
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(results, summary, dict(matcher.stats))
+
+
+class RoutingTesterDialog(QDialog):
+    """«Куда пойдёт трафик»: домены/IP из поля ввода или файла (например, DNS-лога)"""
+
+    def __init__(self, config, parent=None):
+        super().__init__(parent)
+        # Окно создаётся на каждое открытие: после закрытия освобождаем его вместе с результатами
+        self.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        self.setWindowTitle("Проверка маршрута")
+        self.resize(700, 600)
+        self.config = config
+        self.path = None
+        self.results = []
+        self.task = None
+
+        layout = QVBoxLayout()
+        self.input = QPlainTextEdit()
+        self.input.setPlaceholderText("Домены или IP по одному в строке, можно host:port\n"
+                                      "example.com\n8.8.8.8:53")
+        layout.addWidget(self.input)
+
+        options = QHBoxLayout()
+        file_button = QPushButton("Из файла...")
+        file_button.clicked.connect(self.choose_file)
+        self.file_label = QLabel("")
+        options.addWidget(file_button)
+        options.addWidget(self.file_label, 1)
+        options.addWidget(QLabel("Поле строки:"))
+        self.field_input = QSpinBox()
+        self.field_input.setRange(0, 50)
+        self.field_input.setSpecialValueText("вся строка")
+        self.field_input.setToolTip("Номер поля (через пробел) с доменом, например в строках DNS-лога")
+        options.addWidget(self.field_input)
+        self.loose_box = QCheckBox("Без inboundTag/source")
+        self.loose_box.setToolTip("Не учитывать условия правил, которые нельзя проверить по одному адресу")
+        options.addWidget(self.loose_box)
+        layout.addLayout(options)
+
+        buttons = QHBoxLayout()
+        self.run_button = QPushButton("Проверить")
+        self.run_button.clicked.connect(self.run_test)
+        self.save_button = QPushButton("Сохранить результат...")
+        self.save_button.clicked.connect(self.save_results)
+        self.save_button.setEnabled(False)
+        buttons.addWidget(self.run_button)
+        buttons.addWidget(self.save_button)
+        layout.addLayout(buttons)
+
+        self.summary_label = QLabel("")
+        self.summary_label.setWordWrap(True)
+        layout.addWidget(self.summary_label)
+        self.output = QPlainTextEdit()
+        self.output.setReadOnly(True)
+        self.output.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        layout.addWidget(self.output, 1)
+        self.setLayout(layout)
+
+    def choose_file(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Файл с доменами/IP", "", "Все файлы (*)")
+        if path:
+            self.path = path
+            self.file_label.setText(path)
+
+    def run_test(self):
+        field = self.field_input.value() or None
+        if self.path is not None:
+            task = RoutingTestTask(self.config, path=self.path, field=field, loose=self.loose_box.isChecked())
+        else:
+            task = RoutingTestTask(self.config, lines=self.input.toPlainText().splitlines(),
+                                   field=field, loose=self.loose_box.isChecked())
+        task.signals.finished.connect(self.on_finished)
+        task.signals.failed.connect(self.on_failed)
+        self.task = task
+        self.run_button.setEnabled(False)
+        self.summary_label.setText("Проверка...")
+        QThreadPool.globalInstance().start(task)
+
+    def on_finished(self, results, summary, stats):
+        self.task = None
+        self.results = results
+        self.run_button.setEnabled(True)
+        self.save_button.setEnabled(bool(results))
+        lines = [f"{count} → {tag}" for tag, count in summary.most_common()]
+        unsupported = stats.get("unsupported", 0)
+        text = f"Запросов: {len(results)}. " + "; ".join(lines)
+        if unsupported:
+            text += f"\nНе проверяются (geosite/geoip/ext): {unsupported}"
+        self.summary_label.setText(text)
+        shown = "\n".join(format_result(result) for result in results[:MAX_SHOWN])
+        if len(results) > MAX_SHOWN:
+            shown += f"\n... ещё {len(results) - MAX_SHOWN} (сохраните результат в файл)"
+        self.output.setPlainText(shown)
+
+    def on_failed(self, error):
+        self.task = None
+        self.run_button.setEnabled(True)
+        self.summary_label.setText(f"Ошибка: {error}")
+
+    def save_results(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Сохранить результат", "routing_test.tsv",
+                                              "TSV (*.tsv);;Все файлы (*)")
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("target\trule\toutbound\tmatched\n")
+                for result in self.results:
+                    f.write(format_result(result) + "\n")
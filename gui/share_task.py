@@ -0,0 +1,33 @@
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+
+from core.share import export, generate
+
+
+class ShareSignals(QObject):
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(str, dict)
+    failed = pyqtSignal(str)
+
+
+class ShareTask(QRunnable):
+    """Ссылки, QR-коды и их экспорт в пуле потоков (QR рисуются в пуле процессов).
+
+    outbounds — копия, снятая в GUI-потоке: правки во время работы её не меняют.
+    """
+
+    def __init__(self, outbounds, target, cache, qr=True):
+        super().__init__()
+        self.outbounds = outbounds
+        self.target = target
+        self.cache = cache
+        self.qr = qr
+        self.signals = ShareSignals()
+
+    def run(self):
+        try:
+            items, stats = generate(self.outbounds, self.qr, self.cache, progress=self.signals.progress.emit)
+            export(items, self.target)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(self.target, stats)
@@ -0,0 +1,107 @@
+"""Оформление редактора: одна таблица стилей на всё приложение.
+
+Виджеты не получают собственных setStyleSheet — Qt разбирает стили один
+раз, а строки формы различаются по objectName и динамическим свойствам:
+
+- QFrame#fieldRow, QLabel#fieldLabel, QLabel#fieldError — строка формы;
+- QLineEdit[invalid="true"] — поле с ошибкой проверки;
+- QPushButton[role="accent" | "link" | "primary"] — цвет кнопки.
+"""
+from PyQt6.QtWidgets import QApplication
+
+STYLESHEET = """
+QWidget {
+    background-color: #f0f2f5;
+    font-family: Arial;
+    font-size: 12pt;
+}
+QPushButton {
+    background-color: #2196F3;
+    color: white;
+    border-radius: 5px;
+    padding: 8px 12px;
+    font-size: 12pt;
+}
+QPushButton:hover {
+    background-color: #1976D2;
+}
+QPushButton[role="accent"] {
+    background-color: #FF9800;
+}
+QPushButton[role="link"] {
+    background-color: #9C27B0;
+}
+QPushButton[role="primary"] {
+    font-weight: bold;
+    font-size: 14px;
+    background-color: #4CAF50;
+    color: white;
+    padding: 8px;
+    border-radius: 6px;
+}
+QScrollArea {
+    background-color: transparent;
+    border: none;
+}
+QCheckBox {
+    spacing: 10px;
+}
+QCheckBox::indicator {
+    width: 20px;
+    height: 20px;
+}
+QLabel#fileLabel {
+    font-weight: bold;
+    color: #000000;
+}
+QFrame#fieldRow {
+    background-color: #ffffff;
+    border: 1px solid #ddd;
+    border-radius: 5px;
+    padding: 5px;
+}
+QFrame#fieldRow QLabel, QFrame#fieldRow QCheckBox {
+    background-color: #ffffff;
+}
+QLabel#fieldLabel {
+    color: #000000;
+    font-weight: bold;
+}
+QLabel#fieldError {
+    color: #e53935;
+    font-size: 10pt;
+}
+QFrame#fieldRow QLineEdit {
+    border: 1px solid #ccc;
+    border-radius: 4px;
+    padding: 4px;
+    background-color: #ffffff;
+    color: #000000;
+}
+QFrame#fieldRow QLineEdit:focus {
+    border: 1px solid #4CAF50;
+}
+QFrame#fieldRow QLineEdit[invalid="true"] {
+    border: 1px solid #e53935;
+}
+QMessageBox QLabel {
+    color: #000000;
+    font-size: 12pt;
+}
+QMessageBox QPushButton {
+    min-width: 80px;
+    padding: 5px;
+}
+"""
+
+
+def apply_theme(app=None):
+    """Ставит таблицу стилей на всё приложение"""
+    app = app or QApplication.instance()
+    app.setStyleSheet(STYLESHEET)
+
+
+def set_role(button, role):
+    """Цвет кнопки по свойству role (см. STYLESHEET)"""
+    button.setProperty("role", role)
+    return button
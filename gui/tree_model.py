@@ -0,0 +1,274 @@
+import json
+
+from PyQt6.QtCore import QAbstractItemModel, QModelIndex, Qt, pyqtSignal
+
+from core.config import MISSING
+
+
+class _Node:
+    """Узел дерева: родитель и ключ в его значении.
+
+    Дочерние узлы создаются только при обращении к строке, поэтому
+    свёрнутые ветви не занимают памяти. Ключи строк запоминаются при первом
+    обращении: это состав строк, который знает вид, до refresh_path.
+    """
+    __slots__ = ("parent", "holder", "key", "row", "children", "keys")
+
+    def __init__(self, parent, key, row, holder=None):
+        self.parent = parent
+        self.holder = holder
+        self.key = key
+        self.row = row
+        self.children = {}
+        self.keys = None
+
+    @property
+    def value(self):
+        """Текущее значение из config_data или MISSING, если ключа уже нет"""
+        if self.parent is None:
+            return self.holder[0]
+        container = self.parent.value
+        if isinstance(container, dict):
+            return container.get(self.key, MISSING)
+        if isinstance(container, list) and type(self.key) is int and self.key < len(container):
+            return container[self.key]
+        return MISSING
+
+    def current_keys(self):
+        value = self.value
+        if isinstance(value, dict):
+            return list(value)
+        if isinstance(value, list):
+            return range(len(value))
+        return ()
+
+    def child_keys(self):
+        if self.keys is None:
+            self.keys = self.current_keys()
+        return self.keys
+
+    def row_of(self, key):
+        try:
+            return self.child_keys().index(key)
+        except ValueError:
+            return None
+
+    def child(self, row):
+        node = self.children.get(row)
+        if node is None:
+            node = _Node(self, self.child_keys()[row], row)
+            self.children[row] = node
+        return node
+
+    def key_path(self):
+        path = []
+        node = self
+        while node.parent is not None:
+            path.append(node.key)
+            node = node.parent
+        path.reverse()
+        return path
+
+
+def format_value(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        return f"{{{len(value)}}}"
+    if isinstance(value, list):
+        return f"[{len(value)}]"
+    return json.dumps(value)
+
+
+def parse_value(text, old_value):
+    """Преобразует введённый текст, сохраняя тип прежнего значения"""
+    if isinstance(old_value, str):
+        return text
+    try:
+        value = json.loads(text)
+    except ValueError:
+        return text
+    if isinstance(old_value, (int, float)) and not isinstance(old_value, bool) \
+            and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    if old_value is None or type(value) is type(old_value):
+        return value
+    return text
+
+
+class ConfigTreeModel(QAbstractItemModel):
+    """Модель дерева поверх config_data: столбцы «Ключ» и «Значение».
+
+    Изменения пишутся прямо в config_data и сообщаются сигналом
+    value_edited(key_path, old_value, value).
+    """
+    value_edited = pyqtSignal(list, object, object)
+
+    HEADERS = ("Ключ", "Значение")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._holder = [None]
+        self._root = _Node(None, 0, 0, self._holder)
+
+    def set_config(self, config_data):
+        self.beginResetModel()
+        self._holder[0] = config_data if config_data is not None else {}
+        self._root = _Node(None, 0, 0, self._holder)
+        self.endResetModel()
+
+    # ----------------- Навигация -----------------
+    def _node(self, index):
+        return index.internalPointer() if index.isValid() else self._root
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        return self.createIndex(row, column, self._node(parent).child(row))
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is None or parent is self._root:
+            return QModelIndex()
+        return self.createIndex(parent.row, 0, parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        if self._holder[0] is None:
+            return 0
+        return len(self._node(parent).child_keys())
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        if self._holder[0] is None:
+            return False
+        node = self._node(parent)
+        if node.keys is not None:
+            return len(node.keys) > 0
+        value = node.value
+        return isinstance(value, (dict, list)) and len(value) > 0
+
+    def index_for_path(self, key_path, column=1):
+        """Индекс узла по пути ключей или пустой индекс"""
+        index = QModelIndex()
+        node = self._root
+        for key in key_path:
+            row = node.row_of(key)
+            if row is None:
+                return QModelIndex()
+            index = self.index(row, 0, index)
+            node = index.internalPointer()
+        return index.siblingAtColumn(column) if index.isValid() else index
+
+    # ----------------- Данные -----------------
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if index.column() == 0:
+            if role == Qt.ItemDataRole.DisplayRole:
+                return str(node.key)
+            return None
+
+        value = node.value
+        if value is MISSING:
+            # Ключ удалён вне модели, строка уйдёт при refresh_path
+            return None
+        if role == Qt.ItemDataRole.CheckStateRole and isinstance(value, bool):
+            return Qt.CheckState.Checked if value else Qt.CheckState.Unchecked
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            if isinstance(value, bool):
+                return None if role == Qt.ItemDataRole.DisplayRole else json.dumps(value)
+            return format_value(value)
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        flags = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+        if index.column() == 1:
+            value = index.internalPointer().value
+            if isinstance(value, bool):
+                flags |= Qt.ItemFlag.ItemIsUserCheckable
+            elif value is not MISSING and not isinstance(value, (dict, list)):
+                flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or index.column() != 1:
+            return False
+        node = index.internalPointer()
+        old_value = node.value
+        if old_value is MISSING:
+            return False
+        if role == Qt.ItemDataRole.CheckStateRole and isinstance(old_value, bool):
+            new_value = Qt.CheckState(value) == Qt.CheckState.Checked
+        elif role == Qt.ItemDataRole.EditRole:
+            new_value = parse_value(str(value), old_value)
+        else:
+            return False
+        if new_value == old_value and type(new_value) is type(old_value):
+            return False
+        node.parent.value[node.key] = new_value
+        self.dataChanged.emit(index, index, [role])
+        self.value_edited.emit(node.key_path(), old_value, new_value)
+        return True
+
+    def refresh_path(self, key_path):
+        """Сообщает виду, что значение по пути изменилось вне модели.
+
+        Добавленные и удалённые ключи на пути и в загруженной части поддерева
+        вставляются и удаляются строками, раскрытые ветви остаются раскрытыми.
+        """
+        node, index = self._root, QModelIndex()
+        for key in key_path:
+            if node.keys is None:
+                # Ветвь ещё не раскрывалась: вид о её строках не знает
+                return
+            self._sync_rows(node, index)
+            row = node.row_of(key)
+            if row is None:
+                return
+            node = node.child(row)
+            index = self.createIndex(row, 0, node)
+        self._sync_subtree(node, index)
+
+    def _sync_subtree(self, node, index):
+        if index.isValid():
+            self.dataChanged.emit(index, index.siblingAtColumn(1))
+        self._sync_rows(node, index)
+        for row, child in list(node.children.items()):
+            self._sync_subtree(child, self.createIndex(row, 0, child))
+
+    def _sync_rows(self, node, index):
+        """Приводит строки узла к текущим ключам: общее начало остаётся, остальное заменяется"""
+        if node.keys is None:
+            return
+        old_keys, new_keys = node.keys, node.current_keys()
+        if old_keys == new_keys:
+            return
+        common = min(len(old_keys), len(new_keys))
+        if not (isinstance(old_keys, range) and isinstance(new_keys, range)):
+            common = next((n for n in range(common) if old_keys[n] != new_keys[n]), common)
+        if common < len(old_keys):
+            self.beginRemoveRows(index, common, len(old_keys) - 1)
+            for row in [row for row in node.children if row >= common]:
+                del node.children[row]
+            node.keys = old_keys[:common]
+            self.endRemoveRows()
+        if common < len(new_keys):
+            self.beginInsertRows(index, common, len(new_keys) - 1)
+            node.keys = new_keys
+            self.endInsertRows()
+        if index.isValid():
+            self.dataChanged.emit(index.siblingAtColumn(1), index.siblingAtColumn(1))
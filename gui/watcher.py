@@ -0,0 +1,192 @@
+"""Слежение за config.json на диске: изменения другими программами
+подхватываются без полной перезагрузки.
+
+Серия событий файловой системы сводится в одно (debounce); после замены
+файла через rename путь добавляется в QFileSystemWatcher заново. Собственные
+записи редактора распознаются по (mtime, размер) сохранённой версии, а на
+время фоновой записи (suspend/resume) проверки не выполняются.
+
+В фоне разбираются прошлая версия с диска (хранится в байтах) и новая, а
+GUI получает только список изменений между ними. Дерево хэшей разобранной
+версии (core.merkle) остаётся прошлым для следующей проверки: её
+поддеревья не хэшируются заново.
+"""
+from pathlib import Path
+
+from PyQt6.QtCore import QFileSystemWatcher, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+from core.diff import diff
+from core.merkle import MerkleTree
+from core.serialize import loads
+from core.workspace import file_key
+
+DEBOUNCE_MS = 300
+
+
+class SnapshotSignals(QObject):
+    finished = pyqtSignal(object, bytes, object, object)
+    failed = pyqtSignal(object, str)
+
+
+class SnapshotTask(QRunnable):
+    """Читает байты файла и, если есть прошлая версия, сравнивает их разбор с ней.
+
+    base_tree — дерево хэшей прошлой версии, если оно уже построено.
+    """
+
+    def __init__(self, path, base=None, base_tree=None):
+        super().__init__()
+        self.path = Path(path)
+        self.base = base
+        self.base_tree = base_tree
+        self.signals = SnapshotSignals()
+
+    def run(self):
+        tree = changes = None
+        try:
+            key = file_key(self.path)
+            data = self.path.read_bytes()
+            if self.base is not None:
+                base_tree = self.base_tree or MerkleTree(loads(self.base))
+                tree = MerkleTree(loads(data))
+                changes = diff(base_tree.data, tree.data, old_tree=base_tree, new_tree=tree)
+        except Exception as e:
+            self.signals.failed.emit(self.path, str(e))
+            return
+        self.signals.finished.emit(key, data, changes, tree)
+
+
+class ConfigWatcher(QObject):
+    """Следит за одним файлом; changed(path, changes) — изменения с прошлой версии"""
+
+    changed = pyqtSignal(object, list)
+    removed = pyqtSignal(object)
+    failed = pyqtSignal(object, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.path = None
+        # Версия файла, с которой совпадает config_data (кроме несохранённых правок)
+        self.base = None
+        self.base_key = None
+        # Дерево хэшей прошлой версии (строится при первой проверке)
+        self.base_tree = None
+        self.task = None
+        self.suspended = False
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.on_file_changed)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(DEBOUNCE_MS)
+        self.timer.timeout.connect(self.check)
+
+    def watch(self, path, base=None, base_key=None):
+        """Начинает следить за path; текущее содержимое становится прошлой версией.
+
+        С base (байты и file_key версии, с которой совпадает config_data, —
+        например, конфига из кэша рабочей папки) файл сразу сверяется с ней,
+        и изменения, сделанные без слежения, приходят сигналом changed.
+        """
+        self.unwatch()
+        self.path = Path(path)
+        self._rewatch()
+        if base is None:
+            self.snapshot()
+        else:
+            self.base, self.base_key = base, base_key
+            self.check()
+
+    def unwatch(self):
+        if self.watcher.files():
+            self.watcher.removePaths(self.watcher.files())
+        self.timer.stop()
+        self.path = None
+        self.base = None
+        self.base_key = None
+        self.base_tree = None
+        self.task = None
+        self.suspended = False
+
+    def suspend(self):
+        """Файл пишет сам редактор: события до resume() — свои"""
+        self.suspended = True
+        self.timer.stop()
+
+    def resume(self):
+        """Запись закончена: версия на диске становится прошлой"""
+        self.suspended = False
+        self.snapshot()
+
+    def baseline(self):
+        """(байты, file_key) прошлой версии для watch() или (None, None), если она неизвестна"""
+        if self.suspended or self.task is not None or self.base is None:
+            # Идёт собственная запись или чтение: прошлая версия вот-вот сменится
+            return None, None
+        return self.base, self.base_key
+
+    def snapshot(self):
+        """Запоминает версию на диске (после загрузки или собственного сохранения)"""
+        if self.path is None:
+            return
+        self._rewatch()
+        self._start(SnapshotTask(self.path), self.on_snapshot)
+
+    def is_stale(self):
+        """Файл на диске отличается от версии, с которой совпадает config_data"""
+        return not self.suspended and self.base_key is not None and file_key(self.path) != self.base_key
+
+    def _rewatch(self):
+        # rename заменяет файл, и QFileSystemWatcher перестаёт за ним следить
+        if self.path is not None and str(self.path) not in self.watcher.files() and self.path.exists():
+            self.watcher.addPath(str(self.path))
+
+    def _start(self, task, on_finished):
+        task.signals.finished.connect(on_finished)
+        task.signals.failed.connect(self.on_task_failed)
+        self.task = task
+        QThreadPool.globalInstance().start(task)
+
+    def on_file_changed(self, _path):
+        self._rewatch()
+        self.timer.start()
+
+    def check(self):
+        if self.path is None or self.suspended:
+            return
+        if self.task is not None:
+            # Прошлая проверка ещё идёт — проверим после неё
+            self.timer.start()
+            return
+        key = file_key(self.path)
+        if key is None:
+            self.removed.emit(self.path)
+            return
+        self._rewatch()
+        if key == self.base_key:
+            # Собственная запись или касание без изменений
+            return
+        self._start(SnapshotTask(self.path, self.base, self.base_tree), self.on_reparsed)
+
+    def _current(self):
+        return self.sender() is not None and self.task is not None and self.sender() is self.task.signals
+
+    def on_snapshot(self, key, data, _changes, _tree):
+        if not self._current():
+            return
+        self.task = None
+        self.base, self.base_key, self.base_tree = data, key, None
+
+    def on_reparsed(self, key, data, changes, tree):
+        if not self._current():
+            return
+        self.task = None
+        self.base, self.base_key, self.base_tree = data, key, tree
+        if changes and not self.suspended:
+            self.changed.emit(self.path, changes)
+
+    def on_task_failed(self, path, error):
+        if not self._current():
+            return
+        self.task = None
+        # Файл может быть записан наполовину — следующее событие проверит снова
+        self.failed.emit(path, error)
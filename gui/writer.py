@@ -0,0 +1,24 @@
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from core.writer import WriteQueue
+
+
+class BackgroundWriter(QObject):
+    """Очередь записи core.writer; итог каждой записи приходит в GUI-поток
+    сигналом finished(WriteResult)"""
+
+    finished = pyqtSignal(object)
+
+    def __init__(self, fsync=None, parent=None):
+        super().__init__(parent)
+        # Сигнал из потока записи доставляется в поток получателя через очередь событий
+        self.queue = WriteQueue(fsync, on_done=self.finished.emit)
+
+    def submit(self, path, data, encode=None):
+        return self.queue.submit(path, data, encode)
+
+    def busy(self, path=None):
+        return self.queue.busy(path)
+
+    def close(self, timeout=None):
+        return self.queue.close(timeout)
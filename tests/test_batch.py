@@ -0,0 +1,30 @@
+import io
+import json
+
+from core.batch import run
+from core.config import load_config, write_config
+
+
+def run_manifest(lines, **kwargs):
+    out = io.StringIO()
+    summary = run(io.StringIO("".join(line + "\n" for line in lines)), workers=2, out=out, fsync="none", **kwargs)
+    return summary, [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def test_non_object_lines_fail_alone(tmp_path):
+    path = tmp_path / "config.json"
+    write_config(path, {"log": {"loglevel": "warning"}}, fsync="none")
+    summary, results = run_manifest([
+        "[1, 2]",
+        '"clients/a.json"',
+        "null",
+        json.dumps({"file": str(path), "set": {"log.loglevel": "info"}}),
+        "{broken",
+    ])
+
+    assert summary["total"] == 5
+    assert summary["failed"] == 4
+    errors = [result for result in results if not result["ok"]]
+    assert [result["line"] for result in errors] == [1, 2, 3, 5]
+    assert all(result["error"].startswith("Неверная строка манифеста") for result in errors)
+    assert load_config(path)["log"]["loglevel"] == "info"
@@ -0,0 +1,89 @@
+import json
+
+from core.confdir import ConfDir, fragment_hints
+
+
+def write(directory, name, data):
+    path = directory / name
+    path.write_text(json.dumps(data, indent=4))
+    return path
+
+
+def outbound(tag, address="a.example"):
+    return {"tag": tag, "protocol": "vless", "settings": {"vnext": [{"address": address, "port": 443}]}}
+
+
+def make_confdir(tmp_path):
+    write(tmp_path, "00_log.json", {"log": {"loglevel": "warning"}})
+    write(tmp_path, "01_inbounds.json", {"inbounds": [{"tag": "socks", "protocol": "socks", "port": 1080}]})
+    write(tmp_path, "02_inbounds.json", {"inbounds": [{"tag": "http", "protocol": "http", "port": 1087}]})
+    write(tmp_path, "03_outbounds.json", {"outbounds": [outbound("a"), outbound("b")]})
+    write(tmp_path, "04_outbounds.json", {"outbounds": [outbound("c"), outbound("a", "new.example")]})
+    write(tmp_path, "05_outbounds_tail.json", {"outbounds": [{"tag": "direct", "protocol": "freedom"}]})
+    return ConfDir(tmp_path)
+
+
+def tags(items):
+    return [item["tag"] for item in items]
+
+
+def snapshot(tmp_path):
+    return {path.name: path.read_bytes() for path in tmp_path.glob("*.json")}
+
+
+def test_fragment_hints_match_whole_words():
+    assert fragment_hints("02_outbounds.json") == {"outbounds"}
+    assert fragment_hints("00-log.json") == {"log"}
+    assert fragment_hints("blog.json") == frozenset()
+    assert fragment_hints("10_burstObservatory.json") == {"burstObservatory"}
+
+
+def test_arrays_merge_across_fragments(tmp_path):
+    config = make_confdir(tmp_path).compose()
+    assert tags(config["inbounds"]) == ["socks", "http"]
+    # Более поздний файл — в начало, tail — в конец, тот же tag заменяет элемент на месте
+    assert tags(config["outbounds"]) == ["c", "a", "b", "direct"]
+    assert config["outbounds"][1]["settings"]["vnext"][0]["address"] == "new.example"
+
+
+def test_edited_outbound_goes_back_to_its_fragment(tmp_path):
+    confdir = make_confdir(tmp_path)
+    config = confdir.compose()
+    before = snapshot(tmp_path)
+    config["outbounds"][2]["settings"]["vnext"][0]["port"] = 8443
+
+    written = confdir.save(config, {("outbounds", 2, "settings", "vnext", 0, "port")})
+
+    assert [path.name for path in written] == ["03_outbounds.json"]
+    saved = json.loads((tmp_path / "03_outbounds.json").read_text())
+    assert saved["outbounds"][1]["settings"]["vnext"][0]["port"] == 8443
+    after = snapshot(tmp_path)
+    # Остальные фрагменты не перезаписаны и совпадают байт в байт
+    assert {name for name in before if before[name] != after[name]} == {"03_outbounds.json"}
+
+
+def test_added_and_removed_outbounds(tmp_path):
+    confdir = make_confdir(tmp_path)
+    config = confdir.compose()
+    before = snapshot(tmp_path)
+    # Новый элемент после "b" попадает во фрагмент соседа, "c" удалён из своего
+    config["outbounds"].insert(3, outbound("d"))
+    del config["outbounds"][0]
+
+    written = confdir.save(config, {("outbounds",)})
+
+    assert sorted(path.name for path in written) == ["03_outbounds.json", "04_outbounds.json"]
+    assert tags(json.loads((tmp_path / "03_outbounds.json").read_text())["outbounds"]) == ["a", "b", "d"]
+    assert tags(json.loads((tmp_path / "04_outbounds.json").read_text())["outbounds"]) == ["a"]
+    after = snapshot(tmp_path)
+    for name in ("00_log.json", "01_inbounds.json", "02_inbounds.json", "05_outbounds_tail.json"):
+        assert after[name] == before[name]
+    assert tags(ConfDir(tmp_path).compose()["outbounds"]) == ["a", "b", "d", "direct"]
+
+
+def test_lazy_fragments_load_by_hint(tmp_path):
+    write(tmp_path, "blog.json", {"log": {"loglevel": "debug"}})
+    confdir = make_confdir(tmp_path)
+    # blog.json без подсказки в имени читается сразу, фрагменты секций — по запросу
+    assert [fragment.path.name for fragment in confdir.fragments if fragment.loaded] == ["blog.json"]
+    assert set(confdir.load_sections(("log",))) == {"log"}
@@ -0,0 +1,28 @@
+from core.diff import diff, resizes_sections
+
+
+def make_config():
+    return {
+        "log": {"loglevel": "warning"},
+        "routing": {"domainStrategy": "AsIs", "rules": [{"outboundTag": "direct", "domain": ["a.example"]}]},
+        "outbounds": [{"tag": "proxy", "protocol": "vless", "settings": {"vnext": []}}],
+    }
+
+
+def test_scalar_changes_keep_form_layout():
+    old, new = make_config(), make_config()
+    new["log"]["loglevel"] = "debug"
+    new["routing"]["domainStrategy"] = "IPIfNonMatch"
+    new["routing"]["rules"].append({"outboundTag": "block", "domain": ["b.example"]})
+    changes = diff(old, new)
+    assert [path for path, _old, _new in changes] == [
+        ("log", "loglevel"), ("routing", "domainStrategy"), ("routing", "rules")]
+    assert not resizes_sections(changes)
+
+
+def test_added_or_removed_outbound_changes_form_layout():
+    old, new = make_config(), make_config()
+    new["outbounds"].append({"tag": "direct", "protocol": "freedom"})
+    assert resizes_sections(diff(old, new))
+    assert resizes_sections([(("outbounds", 1), {"tag": "direct"}, None)])
+    assert not resizes_sections([(("outbounds", 0, "tag"), "proxy", "main")])
@@ -0,0 +1,82 @@
+import os
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PyQt6.QtWidgets")
+
+from core.config import MISSING  # noqa: E402
+from gui.editor import FullXrayEditor  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def make_config():
+    return {
+        "log": {"loglevel": "warning"},
+        "inbounds": [{"protocol": "socks", "port": 1080, "listen": "127.0.0.1", "settings": {"udp": True}}],
+        "routing": {"domainStrategy": "AsIs", "rules": [{"outboundTag": "direct", "domain": ["a.example"]}]},
+        "outbounds": [{"tag": "proxy", "protocol": "vless",
+                       "settings": {"vnext": [{"address": "a.example", "port": 443, "users": [{"id": "u"}]}]}}],
+    }
+
+
+def make_editor(app):
+    editor = FullXrayEditor()
+    editor.config_data = make_config()
+    editor.load_config_from_data()
+    while not editor.form_complete:
+        app.processEvents()
+    return editor
+
+
+def test_external_loglevel_change_keeps_other_rows(app):
+    editor = make_editor(app)
+    rows = dict(editor.field_rows)
+    generation = editor.build_generation
+
+    editor.apply_external([(("log", "loglevel"), "warning", "debug")])
+
+    assert editor.build_generation == generation
+    assert editor.inputs[("log", "loglevel")].text() == "debug"
+    assert editor.field_rows.keys() == rows.keys()
+    assert all(editor.field_rows[key_path] is row for key_path, row in rows.items())
+
+
+def test_external_rule_added_refreshes_only_routing(app):
+    editor = make_editor(app)
+    outbound_rows = {key_path: row for key_path, row in editor.field_rows.items() if key_path[0] == "outbounds"}
+    generation = editor.build_generation
+    rules = editor.config_data["routing"]["rules"]
+
+    editor.apply_external([(("routing", "rules"), rules, rules + [{"outboundTag": "block"}])])
+
+    assert editor.build_generation == generation
+    assert editor.inputs[("routing", "rules", 1, "outboundTag")].text() == "block"
+    assert all(editor.field_rows[key_path] is row for key_path, row in outbound_rows.items())
+
+
+def test_external_outbound_added_rebuilds_form(app):
+    editor = make_editor(app)
+    generation = editor.build_generation
+
+    editor.apply_external([(("outbounds", 1), MISSING, {"tag": "direct", "protocol": "freedom"})])
+
+    assert editor.build_generation == generation + 1
+
+
+def test_undo_loglevel_edit_keeps_other_rows(app):
+    editor = make_editor(app)
+    editor.on_field_edited(("log", "loglevel"), "debug")
+    rows = dict(editor.field_rows)
+    generation = editor.build_generation
+
+    editor.undo()
+
+    assert editor.build_generation == generation
+    assert editor.config_data["log"]["loglevel"] == "warning"
+    assert editor.inputs[("log", "loglevel")].text() == "warning"
+    assert all(editor.field_rows[key_path] is row for key_path, row in rows.items())
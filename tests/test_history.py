@@ -0,0 +1,56 @@
+from core.config import MISSING
+from core.history import History
+from core.index import ConfigIndex
+
+PUBLIC_KEY = ("outbounds", 0, "streamSettings", "realitySettings", "publicKey")
+
+
+def make_config():
+    return {"outbounds": [{"tag": "proxy", "protocol": "vless", "streamSettings": {"network": "tcp"}}]}
+
+
+def edit(index, history, key_path, value):
+    """Как правка поля формы: набор в одном поле сливается в один шаг"""
+    old = index.get(key_path, MISSING)
+    created = index.update(key_path, value)
+    history.record("Правка", [(key_path, old, index.get(key_path))], merge_key=key_path, created=[created])
+
+
+def test_undo_removes_created_containers():
+    config = make_config()
+    index, history = ConfigIndex(config), History()
+    edit(index, history, PUBLIC_KEY, "k")
+    edit(index, history, PUBLIC_KEY, "ke")
+    assert config["outbounds"][0]["streamSettings"]["realitySettings"] == {"publicKey": "ke"}
+
+    history.undo(index.restore)
+    assert config == make_config()
+    assert PUBLIC_KEY[:-1] not in index
+
+    history.redo(index.restore)
+    assert index.get(PUBLIC_KEY) == "ke"
+    history.undo(index.restore)
+    assert config == make_config()
+
+
+def test_existing_parent_is_kept_on_undo():
+    config = make_config()
+    index, history = ConfigIndex(config), History()
+    edit(index, history, ("outbounds", 0, "streamSettings", "security"), "tls")
+    history.undo(index.restore)
+    assert config == make_config()
+
+
+def test_sealed_steps_undo_separately():
+    config = make_config()
+    index, history = ConfigIndex(config), History()
+    path = ("outbounds", 0, "streamSettings", "realitySettings", "spx")
+    edit(index, history, path, True)
+    history.seal()
+    edit(index, history, path, False)
+    history.seal()
+
+    history.undo(index.restore)
+    assert index.get(path) is True
+    history.undo(index.restore)
+    assert config == make_config()
@@ -0,0 +1,21 @@
+import pytest
+
+from bench.importtime import BUDGETS, forbidden_imports, run_import
+
+CORE_MODULES = sorted(module for module in BUDGETS if module.startswith("core.")) + ["core.probe"]
+
+
+def test_main_imports_only_itself():
+    entries = run_import("main")
+    assert forbidden_imports("main", entries) == []
+    assert "main" in {name for name, *_ in entries}
+
+
+@pytest.mark.parametrize("module", CORE_MODULES)
+def test_core_defers_heavy_imports(module):
+    assert forbidden_imports(module, run_import(module)) == []
+
+
+def test_editor_defers_optional_modules():
+    pytest.importorskip("PyQt6.QtWidgets")
+    assert forbidden_imports("gui.editor", run_import("gui.editor")) == []
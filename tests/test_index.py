@@ -0,0 +1,53 @@
+import pytest
+
+from core.config import MISSING
+from core.index import ConfigIndex, escape_key, from_pointer, to_pointer
+
+
+def make_config():
+    return {"outbounds": [{"tag": "proxy", "protocol": "vless", "settings": {"vnext": []}}]}
+
+
+def test_pointer_roundtrip():
+    assert from_pointer(to_pointer(("outbounds", 0, "a/b~c"))) == ["outbounds", 0, "a/b~c"]
+
+
+def test_escape_key_rejects_non_str():
+    with pytest.raises(TypeError):
+        escape_key(None)
+
+
+def test_set_updates_protocol_and_tag_index():
+    config = make_config()
+    index = ConfigIndex(config)
+    index.set(("outbounds", 0, "protocol"), "trojan")
+    index.set(("outbounds", 0, "tag"), "direct")
+    assert index.find("outbounds", "vless") == []
+    assert index.first("outbounds", "trojan") == 0
+    assert index.by_tag("outbounds", "direct") == 0
+    assert index.by_tag("outbounds", "proxy") is None
+
+
+def test_set_creates_missing_ancestors():
+    config = make_config()
+    index = ConfigIndex(config)
+    index.set(("outbounds", 0, "streamSettings", "security"), "tls")
+    assert config["outbounds"][0]["streamSettings"] == {"security": "tls"}
+    assert index.get(("outbounds", 0, "streamSettings", "security")) == "tls"
+
+
+def test_get_with_missing_outbound_index_raises_type_error():
+    # current_outbound равен None сразу после загрузки — вызывающий должен это проверять
+    index = ConfigIndex(make_config())
+    with pytest.raises(TypeError):
+        index.get(("outbounds", None, "protocol"))
+    assert index.first("outbounds", "vless") == 0
+
+
+def test_restore_missing_removes_key():
+    config = make_config()
+    index = ConfigIndex(config)
+    index.set(("outbounds", 0, "mux"), {"enabled": True})
+    index.restore(("outbounds", 0, "mux"), MISSING)
+    assert "mux" not in config["outbounds"][0]
+    assert ("outbounds", 0, "mux", "enabled") not in index
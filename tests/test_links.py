@@ -0,0 +1,49 @@
+import base64
+import json
+
+import pytest
+
+from core.links import LinkError, format_link, parse_link
+
+REALITY_LINK = ("vless://11111111-2222-4333-8444-555555555555@r.example:443?encryption=none"
+                "&security=reality&sni=www.example.com&fp=chrome&pbk=key&sid=ab&type=tcp#r")
+
+
+def tls_config():
+    return {"outbounds": [{
+        "tag": "proxy", "protocol": "vless",
+        "settings": {"vnext": [{"address": "t.example", "port": 443, "users": [{"id": "old"}]}]},
+        "streamSettings": {"network": "tcp", "security": "tls",
+                           "tlsSettings": {"serverName": "t.example", "alpn": ["h2"]}},
+    }]}
+
+
+def test_reality_link_replaces_tls_settings():
+    config = tls_config()
+    updated = parse_link(REALITY_LINK).apply_to(config)
+    stream = config["outbounds"][0]["streamSettings"]
+    assert "tlsSettings" not in stream
+    assert stream["security"] == "reality"
+    assert stream["realitySettings"] == {"serverName": "www.example.com", "fingerprint": "chrome",
+                                         "publicKey": "key", "shortId": "ab"}
+    assert ["outbounds", 0, "streamSettings", "tlsSettings"] in updated
+
+
+def test_link_without_security_keeps_stream_blocks():
+    config = tls_config()
+    parse_link("vless://id@n.example:443?type=tcp").apply_to(config)
+    assert "tlsSettings" in config["outbounds"][0]["streamSettings"]
+
+
+def vmess_body(**data):
+    return base64.b64encode(json.dumps(data).encode()).decode()
+
+
+def test_vmess_scheme_is_stripped_explicitly():
+    body = vmess_body(v="2", add="v.example", port="443", id="uuid", ps="name", net="tcp")
+    for url in (f"vmess://{body}", f"VMess://{body}", f"vmess://{body}#ignored"):
+        link = parse_link(url)
+        assert (link.params["address"], link.params["port"], link.params["id"]) == ("v.example", "443", "uuid")
+    assert parse_link(format_link(link.to_outbound("name"))).params["address"] == "v.example"
+    with pytest.raises(LinkError):
+        parse_link("vmess://")
@@ -0,0 +1,61 @@
+from core.merkle import MerkleTree, diff_configs, format_change
+
+
+def moves(old, new):
+    changes = diff_configs({"rules": old}, {"rules": new})
+    return [(i, j) for kind, _path, i, j in changes if kind == "moved"]
+
+
+def rules(names):
+    return [{"tag": name} for name in names]
+
+
+def test_item_in_place_is_not_moved():
+    assert moves(rules("ABC"), rules("CBA")) == [(2, 0), (0, 2)]
+
+
+def test_shift_by_insert_or_delete_is_not_moved():
+    assert moves(rules("ABCD"), rules("XABCD")) == []
+    assert moves(rules("ABCDE"), rules("ACDE")) == []
+    assert moves(rules("ABCD"), rules("XACDB")) == [(1, 4)]
+
+
+def test_no_move_to_same_position():
+    for old, new in (("ABXCD", "CDXAB"), ("ABX", "YBA"), ("ABCDEF", "FBCDEA")):
+        changes = diff_configs({"rules": rules(old)}, {"rules": rules(new)})
+        assert all(i != j for kind, _path, i, j in changes if kind == "moved"), \
+            [format_change(change) for change in changes]
+
+
+def test_digest_ignores_key_order_but_not_types():
+    digest = MerkleTree({"a": 1, "b": [1, "x"]}).digest()
+    assert MerkleTree({"b": [1, "x"], "a": 1}).digest() == digest
+    assert MerkleTree({"a": True, "b": [1, "x"]}).digest() != digest
+    assert MerkleTree({"a": "1", "b": [1, "x"]}).digest() != digest
+    assert MerkleTree({"a": 1, "b": ["x", 1]}).digest() != digest
+
+
+def test_invalidate_after_edit_in_place():
+    config = {"outbounds": [{"tag": "a", "settings": {"port": 1}}, {"tag": "b"}]}
+    tree = MerkleTree(config)
+    before, other = tree.digest(), tree.digest(config["outbounds"][1])
+    config["outbounds"][0]["settings"]["port"] = 2
+    # Без invalidate хэш прежний: правки на месте дереву не видны
+    assert tree.digest() == before
+    tree.invalidate(("outbounds", 0, "settings", "port"))
+    assert tree.digest() == MerkleTree(config).digest() != before
+    assert tree.digest(config["outbounds"][1]) == other
+
+
+def test_changed_added_removed_paths():
+    old = {"log": {"loglevel": "warning", "access": "none"}, "rules": [{"tag": "a", "ip": ["1.1.1.1"]}]}
+    new = {"log": {"loglevel": "debug", "error": "x"}, "rules": [{"tag": "a", "ip": ["8.8.8.8"]}, {"tag": "b"}]}
+    changes = {(kind, path) for kind, path, _old, _new in diff_configs(old, new)}
+    assert changes == {
+        ("changed", ("log", "loglevel")),
+        ("removed", ("log", "access")),
+        ("added", ("log", "error")),
+        ("changed", ("rules", 0, "ip", 0)),
+        ("added", ("rules", 1)),
+    }
+    assert diff_configs(old, {"rules": old["rules"], "log": dict(old["log"])}) == []
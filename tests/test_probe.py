@@ -0,0 +1,136 @@
+import asyncio
+import shutil
+import socket
+import ssl
+import subprocess
+
+import pytest
+
+from core.probe import ProbeCache, collect_endpoints, endpoint_key, probe_all, probe_endpoint, run_probe
+
+
+@pytest.fixture(scope="module")
+def server_context(tmp_path_factory):
+    """TLS-контекст сервера с одноразовым самоподписанным сертификатом"""
+    if shutil.which("openssl") is None:
+        pytest.skip("нет openssl для сертификата")
+    directory = tmp_path_factory.mktemp("cert")
+    cert, key = directory / "cert.pem", directory / "key.pem"
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                    "-subj", "/CN=localhost", "-keyout", str(key), "-out", str(cert)],
+                   check=True, capture_output=True)
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key)
+    return context
+
+
+async def serve(ssl_context=None):
+    """Локальный сервер, который принимает соединение и держит его открытым"""
+    async def handle(reader, writer):
+        try:
+            await reader.read()
+        except (OSError, ssl.SSLError):
+            pass
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0, ssl=ssl_context)
+    return server, server.sockets[0].getsockname()[1]
+
+
+def probe(**kwargs):
+    async def scenario():
+        server, port = await serve(kwargs.pop("server_ssl", None))
+        async with server:
+            return await probe_endpoint("127.0.0.1", port, **kwargs)
+    return asyncio.run(scenario())
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_tcp_success():
+    result = probe(timeout=2.0)
+    assert result["error"] is None
+    assert result["tcp_ms"] is not None
+    assert result["tls_ms"] is None
+
+
+def test_tls_success(server_context):
+    result = probe(server_ssl=server_context, server_name="localhost", tls=True, timeout=5.0)
+    assert result["error"] is None
+    assert result["tcp_ms"] is not None and result["tls_ms"] is not None
+
+
+def test_tls_timeout():
+    # Сервер принимает TCP, но не отвечает на ClientHello
+    result = probe(server_name="localhost", tls=True, timeout=0.3)
+    assert result["error"] == "timeout"
+    assert result["tcp_ms"] is not None
+    assert result["tls_ms"] is None
+
+
+def test_refused():
+    result = asyncio.run(probe_endpoint("127.0.0.1", free_port(), timeout=2.0))
+    assert result["tcp_ms"] is None
+    assert result["error"].startswith("ConnectionRefusedError")
+
+
+def test_run_probe_sorts_and_caches():
+    async def scenario(config_ports):
+        server, port = await serve()
+        config_ports.append(port)
+        return server
+
+    refused = free_port()
+    loop = asyncio.new_event_loop()
+    try:
+        ports = []
+        server = loop.run_until_complete(scenario(ports))
+        config = {"outbounds": [
+            {"tag": "down", "settings": {"vnext": [{"address": "127.0.0.1", "port": refused}]}},
+            {"tag": "up", "settings": {"vnext": [{"address": "127.0.0.1", "port": ports[0]}]}},
+        ]}
+        # Сервер обслуживается в том же цикле, run_probe идёт в своём — в отдельном потоке
+        cache = ProbeCache()
+        endpoints = loop.run_until_complete(asyncio.to_thread(run_probe, config, 10, 2.0, cache))
+        server.close()
+        loop.run_until_complete(server.wait_closed())
+    finally:
+        loop.close()
+
+    assert [endpoint["tag"] for endpoint in endpoints] == ["up", "down"]
+    assert endpoints[1]["error"]
+    assert cache.get(("127.0.0.1", ports[0], None))["tcp_ms"] is not None
+
+
+def test_bad_addresses_do_not_stop_the_batch():
+    async def scenario():
+        server, port = await serve()
+        endpoints = [
+            {"address": "127.0.0.1", "port": port, "server_name": "", "tls": False},
+            {"address": "a..b", "port": port, "server_name": "", "tls": False},
+            {"address": 12345, "port": port, "server_name": "", "tls": False},
+        ]
+        async with server:
+            return endpoints, await probe_all(endpoints, timeout=2.0)
+
+    endpoints, results = asyncio.run(scenario())
+    good, idna, wrong_type = (results[endpoint_key(endpoint)] for endpoint in endpoints)
+    assert good["error"] is None and good["tcp_ms"] is not None
+    assert idna["error"].startswith("UnicodeError")
+    assert wrong_type["error"].startswith("TypeError")
+
+
+def test_collect_endpoints_includes_hysteria():
+    config = {"outbounds": [
+        {"tag": "vless", "settings": {"vnext": [{"address": "a.example", "port": 443}]}},
+        {"tag": "hy2", "protocol": "hysteria", "settings": {"address": "h.example", "port": 8443},
+         "streamSettings": {"security": "tls", "tlsSettings": {"serverName": "sni.example"}}},
+    ]}
+    endpoints = collect_endpoints(config)
+    assert [(e["tag"], e["address"], e["port"]) for e in endpoints] == [
+        ("vless", "a.example", 443), ("hy2", "h.example", 8443)]
+    assert endpoints[1]["server_name"] == "sni.example" and endpoints[1]["tls"]
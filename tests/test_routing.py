@@ -0,0 +1,41 @@
+from core.routing import RoutingMatcher, compile_config
+
+
+def matcher(rules, default="direct"):
+    return RoutingMatcher({"rules": rules}, default)
+
+
+def test_first_rule_wins():
+    m = matcher([
+        {"domain": ["domain:example.com"], "outboundTag": "A"},
+        {"domain": ["keyword:example"], "outboundTag": "B"},
+    ])
+    assert m.route("www.example.com")["outboundTag"] == "A"
+    assert m.route("example.org")["outboundTag"] == "B"
+    assert m.route("other.net")["outboundTag"] == "direct"
+
+
+def test_rejected_regexp_rule_falls_through_to_next_regexp():
+    m = matcher([
+        {"domain": ["regexp:^ab"], "port": "443", "outboundTag": "A"},
+        {"domain": ["regexp:^ab"], "outboundTag": "B"},
+    ])
+    assert m.route("abc")["outboundTag"] == "B"
+    assert m.route("abc:443")["outboundTag"] == "A"
+
+
+def test_rejected_unanchored_regexp_falls_through():
+    m = matcher([
+        {"domain": ["regexp:b.c"], "network": "udp", "outboundTag": "A"},
+        {"domain": ["regexp:bxc$"], "outboundTag": "B"},
+    ])
+    assert m.route("abxc", network="tcp")["outboundTag"] == "B"
+    assert m.route("abxc", network="udp")["outboundTag"] == "A"
+
+
+def test_cidr_and_default():
+    config = {"outbounds": [{"tag": "proxy"}],
+              "routing": {"rules": [{"ip": ["geoip:private"], "outboundTag": "direct"}]}}
+    m = compile_config(config)
+    assert m.route("192.168.1.1")["outboundTag"] == "direct"
+    assert m.route("8.8.8.8")["outboundTag"] == "proxy"
@@ -0,0 +1,44 @@
+import time
+
+from core.search import ServerSearchIndex
+
+
+def make_outbound(i):
+    return {"tag": f"srv-{i}", "protocol": "vless",
+            "settings": {"vnext": [{"address": f"h{i}.example.com", "users": [{"id": f"{i:08x}-aaaa"}]}]}}
+
+
+def test_add_many_matches_full_build():
+    outbounds = [make_outbound(i) for i in range(50)]
+    index = ServerSearchIndex(outbounds[:10])
+    index.add_many((i, outbounds[i]) for i in range(10, 50))
+    built = ServerSearchIndex(outbounds)
+    assert index._pairs == built._pairs
+    assert index.search("h42.example") == {42}
+    assert len(index) == 50
+
+
+def test_add_many_replaces_existing_tokens():
+    index = ServerSearchIndex([make_outbound(0)])
+    index.add_many([(0, {"tag": "renamed", "protocol": "vless"})])
+    assert index.search("srv") == set()
+    assert index.search("renamed") == {0}
+
+
+def _add_many_seconds(count):
+    outbounds = [make_outbound(i) for i in range(count)]
+    best = None
+    for _ in range(3):
+        index = ServerSearchIndex([make_outbound(-1)])
+        started = time.perf_counter()
+        index.add_many((i, outbound) for i, outbound in enumerate(outbounds, 1))
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def test_add_many_scales_linearly():
+    # В 4 раза больше outbound: почти линейно ~4x, вставка по одному — ~12x и больше
+    small = _add_many_seconds(4000)
+    large = _add_many_seconds(16000)
+    assert large < small * 8
@@ -0,0 +1,43 @@
+import pytest
+
+from core import serialize
+from core.serialize import SLICE, dumps, iterencode, loads, stdlib_dumps
+
+SAMPLES = {
+    "nested": {"log": {"loglevel": "warning"}, "outbounds": [{"tag": "a", "settings": {"vnext": [{"port": 443}]}}],
+               "empty": {"list": [], "dict": {}}, "deep": [[[[{"x": [1, [2, [3]]]}]]]]},
+    "unicode": {"имя": "Сервер 🚀", "escape": "tab\t\"quote\" \\   \x01", "surrogate-free": "日本語"},
+    "floats": {"ratio": 0.1, "big": 1e300, "small": -2.5e-08, "whole": 3.0, "list": [1.5, 2, True, None]},
+    "non-str keys": {1: "int", 2.5: "float", False: "bool", None: "none", "s": {3: [4]}},
+    "big ints": {"u64": 2 ** 64, "neg": -(2 ** 70)},
+    "over slice": {"outbounds": [{"tag": f"srv-{i}", "port": i, "list": list(range(i % 3))}
+                                 for i in range(SLICE * 2 + 3)],
+                   "rules": [[i, str(i)] for i in range(SLICE + 1)]},
+    "scalar": "just a string",
+    "top list": [{"a": 1}] * (SLICE + 5),
+}
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "orjson" and serialize.orjson is None:
+        pytest.skip("orjson не установлен")
+    if request.param == "json":
+        monkeypatch.setattr(serialize, "orjson", None)
+    return request.param
+
+
+@pytest.mark.parametrize("mode", ["pretty", "minified"])
+@pytest.mark.parametrize("name", list(SAMPLES))
+def test_matches_stdlib(backend, name, mode):
+    data = SAMPLES[name]
+    expected = stdlib_dumps(data, mode)
+    assert dumps(data, mode) == expected
+    assert b"".join(iterencode(data, mode)) == expected
+    assert b"".join(iterencode(data, mode, depth=1)) == expected
+
+
+def test_roundtrip(backend):
+    data = SAMPLES["unicode"]
+    assert loads(dumps(data)) == data
+    assert loads(dumps(SAMPLES["big ints"], "minified")) == SAMPLES["big ints"]
@@ -0,0 +1,69 @@
+import os
+import stat
+
+import pytest
+
+from core.share import ShareCache, export_dir, generate
+
+
+def make_outbound(i):
+    return {"tag": f"srv-{i}", "protocol": "vless",
+            "settings": {"vnext": [{"address": f"h{i}.example.com", "port": 443,
+                                    "users": [{"id": f"{i:08x}-0000-4000-8000-000000000000"}]}]},
+            "streamSettings": {"network": "tcp", "security": "none"}}
+
+
+def test_cache_files_are_private(tmp_path):
+    directory = tmp_path / "share"
+    cache = ShareCache(directory)
+    cache.put("key", [{"name": "a", "link": "vless://secret@host:443"}])
+    assert stat.S_IMODE(directory.stat().st_mode) == 0o700
+    assert stat.S_IMODE((directory / "key.json").stat().st_mode) == 0o600
+    assert ShareCache(directory).get("key") == [{"name": "a", "link": "vless://secret@host:443"}]
+
+
+def test_cache_evicts_least_recently_read_files(tmp_path):
+    cache = ShareCache(tmp_path, limit=1, disk_limit=10)
+    for n in range(10):
+        cache.put(f"k{n}", [n])
+        os.utime(tmp_path / f"k{n}.json", ns=(n * 10**9, n * 10**9))
+    # Чтение освежает запись
+    assert ShareCache(tmp_path).get("k0") == [0]
+    cache.put("k10", [10])
+    names = {path.stem for path in tmp_path.glob("*.json")}
+    assert len(names) == 9
+    assert {"k0", "k10"} <= names
+    assert "k1" not in names
+
+
+def test_export_dir_removes_stale_qr(tmp_path):
+    items, _stats = generate([make_outbound(i) for i in range(3)], qr=True)
+    if not any("svg" in item for item in items):
+        pytest.skip("пакет qrcode не установлен")
+    export_dir(items, tmp_path)
+    assert len(list((tmp_path / "qr").glob("*.svg"))) == 3
+
+    items, _stats = generate([make_outbound(0)], qr=True)
+    export_dir(items, tmp_path)
+    assert [path.name for path in (tmp_path / "qr").glob("*.svg")] == ["srv-0.svg"]
+
+
+def test_generate_in_spawned_pool():
+    pytest.importorskip("qrcode")
+    outbounds = [make_outbound(i) for i in range(20)]
+    items, stats = generate(outbounds, qr=True, workers=2)
+    assert stats["rendered"] == 20 and stats["errors"] == 0
+    assert all(item["svg"].startswith("<") for item in items)
+
+
+def test_export_dir_keeps_foreign_svg(tmp_path):
+    def item(name):
+        return {"name": name, "tag": name, "link": f"vless://{name}", "svg": f"<svg>{name}</svg>"}
+
+    foreign = tmp_path / "qr" / "logo.svg"
+    foreign.parent.mkdir()
+    foreign.write_text("<svg/>")
+    export_dir([item("a"), item("b")], tmp_path)
+    export_dir([item("a")], tmp_path)
+    assert sorted(path.name for path in (tmp_path / "qr").glob("*.svg")) == ["a.svg", "logo.svg"]
+    assert foreign.read_text() == "<svg/>"
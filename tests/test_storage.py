@@ -0,0 +1,50 @@
+import os
+import stat
+
+import pytest
+
+from core.config import load_config, write_config
+from core.storage import atomic_write
+
+
+def leftovers(directory):
+    return [path.name for path in directory.iterdir() if path.name.endswith(".tmp")]
+
+
+def test_unchanged_save_keeps_mtime(tmp_path):
+    path = tmp_path / "config.json"
+    config = {"log": {"loglevel": "warning"}}
+    assert write_config(path, config)
+    os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+
+    assert write_config(path, load_config(path)) is False
+    assert path.stat().st_mtime_ns == 1_000_000_000
+
+
+def test_changed_save_replaces_file_and_keeps_mode(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_bytes(b"old")
+    path.chmod(0o600)
+    inode = path.stat().st_ino
+
+    assert atomic_write(path, b"new")
+    assert path.read_bytes() == b"new"
+    # Новый файл переименован на место старого, права прежние
+    assert path.stat().st_ino != inode
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+    assert leftovers(tmp_path) == []
+
+
+@pytest.mark.parametrize("failing", ["fsync", "replace"])
+def test_failed_write_keeps_original(tmp_path, monkeypatch, failing):
+    path = tmp_path / "config.json"
+    path.write_bytes(b"old")
+
+    def fail(*_args):
+        raise OSError("диск недоступен")
+
+    monkeypatch.setattr(os, failing, fail)
+    with pytest.raises(OSError):
+        atomic_write(path, b"new")
+    assert path.read_bytes() == b"old"
+    assert leftovers(tmp_path) == []
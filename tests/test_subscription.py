@@ -0,0 +1,38 @@
+import base64
+
+from core.subscription import decode_subscription, import_subscription
+
+UUID = "11111111-2222-4333-8444-555555555555"
+
+
+def vless(host, name, uuid=UUID):
+    return (f"vless://{uuid}@{host}:443?encryption=none&security=reality&sni=www.example.com"
+            f"&pbk=key&sid=ab&type=tcp#{name}")
+
+
+def make_text():
+    return "\n".join([vless("a.example", "A"), vless("b.example", "B"), "# комментарий",
+                      vless("a.example", "A again"), "vless://broken"]) + "\n"
+
+
+def test_plain_and_base64_bodies_decode_alike():
+    text = make_text()
+    assert decode_subscription(text) == text.strip()
+    assert decode_subscription(base64.b64encode(text.encode())) == text
+    # Без выравнивания "=" и с переносами строк, как отдают некоторые серверы
+    encoded = base64.urlsafe_b64encode(text.encode()).rstrip(b"=")
+    assert decode_subscription(b"\n".join(encoded[i:i + 76] for i in range(0, len(encoded), 76))) == text
+
+
+def test_import_skips_duplicates():
+    config = {"outbounds": [{"tag": "sub-A", "protocol": "freedom"}]}
+    new, stats = import_subscription(config, base64.b64encode(make_text().encode()))
+    assert [outbound["tag"] for outbound in new] == ["sub-A-2", "sub-B"]
+    assert stats["links"] == 4 and stats["unique"] == 2
+    assert stats["duplicates"] == 1 and stats["errors"] == 1 and stats["skipped"] == 1
+    assert config["outbounds"][1:] == new
+
+    # Повторный импорт: серверы уже есть в конфиге
+    again, stats = import_subscription(config, make_text())
+    assert again == [] and stats["duplicates"] == 3
+    assert len(config["outbounds"]) == 3
@@ -0,0 +1,66 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from core import trace
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_nested_spans_export_to_chrome_trace(tmp_path, monkeypatch):
+    tracer = trace.Tracer()
+    monkeypatch.setattr(trace, "TRACER", tracer)
+
+    @trace.traced("outer")
+    def outer():
+        with trace.span("inner", n=1):
+            time.sleep(0.002)
+
+    outer()
+    trace.counter("widgets", {"inputs": 3})
+    path = tmp_path / "trace.json"
+    summary_path = tracer.dump(str(path))
+
+    data = json.loads(path.read_text(encoding="utf-8"))
+    events = {event["name"]: event for event in data["traceEvents"]}
+    inner, outer_event = events["inner"], events["outer"]
+    assert inner["ph"] == outer_event["ph"] == "X"
+    assert inner["args"] == {"n": 1}
+    assert inner["tid"] == outer_event["tid"] and inner["pid"] == outer_event["pid"] == os.getpid()
+    # ts и dur в микросекундах от начала трассы; вложенный участок внутри внешнего
+    assert 0 <= outer_event["ts"] <= inner["ts"]
+    assert inner["dur"] >= 2000
+    assert inner["ts"] + inner["dur"] <= outer_event["ts"] + outer_event["dur"]
+    assert events["widgets"]["ph"] == "C" and events["widgets"]["args"] == {"inputs": 3}
+
+    summary, counters = trace.summary_from_file(str(path))
+    assert summary["inner"]["count"] == summary["outer"]["count"] == 1
+    assert summary["outer"]["max_ms"] >= summary["inner"]["max_ms"] >= 2
+    assert counters == {"widgets": {"inputs": 3}}
+    assert "inner" in Path(summary_path).read_text(encoding="utf-8")
+
+
+def test_disabled_tracer_does_not_wrap(monkeypatch):
+    monkeypatch.setattr(trace, "TRACER", None)
+
+    def func():
+        return 1
+
+    assert trace.traced()(func) is func
+    assert trace.span("x") is trace.span("y")
+
+
+def test_index_edits_are_traced(tmp_path):
+    # Правки из формы и дерева идут через ConfigIndex.update/set, а не update_nested_value
+    path = tmp_path / "trace.json"
+    script = ("from core.index import ConfigIndex\n"
+              "index = ConfigIndex({'log': {}})\n"
+              "index.update(('log', 'loglevel'), 'debug')\n")
+    env = dict(os.environ, XRAY_EDITOR_TRACE=str(path))
+    subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=env, check=True, capture_output=True)
+    summary, _counters = trace.summary_from_file(str(path))
+    assert summary["ConfigIndex.update"]["count"] == 1
+    assert summary["ConfigIndex.set"]["count"] == 1
@@ -0,0 +1,79 @@
+import pytest
+
+QtCore = pytest.importorskip("PyQt6.QtCore")
+QtTest = pytest.importorskip("PyQt6.QtTest")
+
+from gui.tree_model import ConfigTreeModel  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+
+def make_model(config):
+    model = ConfigTreeModel()
+    model.set_config(config)
+    QtTest.QAbstractItemModelTester(model, QtTest.QAbstractItemModelTester.FailureReportingMode.Fatal)
+    return model
+
+
+def expand(model, key_path):
+    """Как раскрытие ветви видом: строки узла запрашиваются и запоминаются"""
+    index = model.index_for_path(key_path, 0) if key_path else QtCore.QModelIndex()
+    model.rowCount(index)
+    return index
+
+
+def keys(model, key_path):
+    index = expand(model, key_path)
+    return [model.data(model.index(row, 0, index)) for row in range(model.rowCount(index))]
+
+
+def test_removed_key_is_removed_row(app):
+    config = {"log": {"loglevel": "warning", "access": "none"}}
+    model = make_model(config)
+    expand(model, ())
+    expand(model, ("log",))
+    removed = []
+    model.rowsRemoved.connect(lambda parent, first, last: removed.append((first, last)))
+
+    del config["log"]["loglevel"]
+    # Строка ещё не убрана, но данные не падают
+    stale = model.index(0, 1, model.index_for_path(("log",), 0))
+    assert model.data(stale) is None
+    model.refresh_path(("log", "loglevel"))
+
+    assert removed
+    assert keys(model, ("log",)) == ["access"]
+    assert model.data(model.index_for_path(("log", "access"))) == "none"
+
+
+def test_added_key_is_inserted_row(app):
+    config = {"outbounds": [{"tag": "proxy", "streamSettings": {"network": "tcp"}}]}
+    model = make_model(config)
+    for key_path in ((), ("outbounds",), ("outbounds", 0), ("outbounds", 0, "streamSettings")):
+        expand(model, key_path)
+    inserted = []
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+
+    config["outbounds"][0]["streamSettings"]["realitySettings"] = {"publicKey": "key"}
+    model.refresh_path(("outbounds", 0, "streamSettings", "realitySettings", "publicKey"))
+
+    assert inserted == [(1, 1)]
+    assert keys(model, ("outbounds", 0, "streamSettings")) == ["network", "realitySettings"]
+    assert model.data(model.index_for_path(("outbounds", 0, "streamSettings", "realitySettings", "publicKey"))) == "key"
+
+
+def test_replaced_list_updates_loaded_rows(app):
+    config = {"dns": {"servers": ["1.1.1.1", "8.8.8.8", "9.9.9.9"]}}
+    model = make_model(config)
+    expand(model, ())
+    expand(model, ("dns",))
+    expand(model, ("dns", "servers"))
+
+    del config["dns"]["servers"][0]
+    model.refresh_path(("dns", "servers"))
+
+    assert keys(model, ("dns", "servers")) == ["0", "1"]
+    assert model.data(model.index_for_path(("dns", "servers", 0))) == "8.8.8.8"
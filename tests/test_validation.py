@@ -0,0 +1,77 @@
+from core import validation
+from core.links import format_link, parse_link
+from core.validation import ConfigValidator
+
+HY2_LINK = "hy2://secret@hy.example.com:8443?sni=hy.example.com&alpn=h3&insecure=1#hy"
+
+
+def test_hysteria2_link_outbound_is_valid():
+    outbound = parse_link(HY2_LINK).to_outbound("hy")
+    config = {"outbounds": [outbound]}
+    assert ConfigValidator().validate(config) == {}
+
+    again = parse_link(format_link(outbound)).to_outbound("hy")
+    assert again == outbound
+    assert ConfigValidator().validate({"outbounds": [again]}) == {}
+
+
+def test_hysteria_settings_are_checked():
+    outbound = parse_link(HY2_LINK).to_outbound("hy")
+    outbound["streamSettings"]["network"] = "hysteria3"
+    outbound["streamSettings"]["hysteriaSettings"]["version"] = 1
+    errors = ConfigValidator().validate({"outbounds": [outbound]})
+    paths = {path for path, _message in errors[("outbounds", 0)]}
+    assert ("outbounds", 0, "streamSettings", "network") in paths
+    assert ("outbounds", 0, "streamSettings", "hysteriaSettings", "version") in paths
+
+
+def count_checks(monkeypatch):
+    """Теги outbound, которые проверялись схемой (а не взяты из кэша)"""
+    checked = []
+    check = validation.COMPILED["outbounds"]
+
+    def counting(value, path, errors):
+        checked.append(value.get("tag"))
+        check(value, path, errors)
+
+    monkeypatch.setitem(validation.COMPILED, "outbounds", counting)
+    return checked
+
+
+def make_outbound(tag, port):
+    return {"tag": tag, "protocol": "freedom", "settings": {"port": port}}
+
+
+def test_unchanged_units_come_from_cache(monkeypatch):
+    checked = count_checks(monkeypatch)
+    config = {"outbounds": [make_outbound("a", 1), make_outbound("b", 2)]}
+    validator = ConfigValidator()
+    assert validator.validate(config) == {}
+    assert checked == ["a", "b"]
+
+    # Тот же хэш содержимого — схема не вызывается, в том числе для копии конфига
+    assert validator.validate({"outbounds": [dict(o) for o in config["outbounds"]]}) == {}
+    assert validator.validate_path(config, ("outbounds", 1, "settings", "port")) == (("outbounds", 1), [], [])
+    assert checked == ["a", "b"]
+
+
+def test_changed_unit_is_revalidated(monkeypatch):
+    checked = count_checks(monkeypatch)
+    config = {"outbounds": [make_outbound("a", 1), make_outbound("b", 2)]}
+    validator = ConfigValidator()
+    validator.validate(config)
+    del checked[:]
+
+    config["outbounds"][1]["protocol"] = "nope"
+    unit, old_errors, new_errors = validator.validate_path(config, ("outbounds", 1, "protocol"))
+    assert checked == ["b"]
+    assert unit == ("outbounds", 1) and old_errors == []
+    assert [path for path, _message in new_errors] == [("outbounds", 1, "protocol")]
+    assert validator.error_for(("outbounds", 1, "protocol"))
+    assert validator.count() == 1
+
+    config["outbounds"][1]["protocol"] = "freedom"
+    _unit, old_errors, new_errors = validator.validate_path(config, ("outbounds", 1, "protocol"))
+    # Прежнее содержимое уже проверялось — результат из кэша
+    assert checked == ["b"]
+    assert old_errors and new_errors == [] and validator.count() == 0
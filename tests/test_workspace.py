@@ -0,0 +1,63 @@
+import os
+
+from core.workspace import ConfigCache, file_key
+
+
+def touch(path, content, mtime_ns):
+    path.write_text(content)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_entry_key_is_base_version(tmp_path):
+    path = tmp_path / "config.json"
+    touch(path, "{}", 1_000_000_000)
+    base_key = file_key(path)
+    # Файл изменили после загрузки, но до того, как конфиг ушёл в кэш
+    touch(path, '{"log": {}}', 2_000_000_000)
+
+    cache = ConfigCache(max_bytes=1 << 20)
+    cache.put(path, "clean", 1, key=base_key)
+    assert cache.get(path) is None
+
+    cache.put(path, "dirty", 1, pinned=True, key=base_key)
+    assert cache.take(path) == "dirty"
+
+
+def test_entry_key_defaults_to_current_file(tmp_path):
+    path = tmp_path / "config.json"
+    touch(path, "{}", 1_000_000_000)
+    cache = ConfigCache(max_bytes=1 << 20)
+    cache.put(path, "state", 1)
+    assert cache.get(path) == "state"
+    touch(path, '{"log": {}}', 2_000_000_000)
+    assert cache.get(path) is None
+
+
+def test_evicts_least_recently_used(tmp_path):
+    evicted = []
+    cache = ConfigCache(max_bytes=2, on_evict=evicted.append)
+    a, b, c = (tmp_path / name for name in ("a.json", "b.json", "c.json"))
+    cache.put(a, "a", 1)
+    cache.put(b, "b", 1)
+    assert cache.get(a) == "a"
+    cache.put(c, "c", 1)
+    assert evicted == ["b"]
+    assert b not in cache and a in cache and c in cache
+    assert cache.total_bytes == 2
+
+
+def test_pinned_entries_are_not_evicted(tmp_path):
+    path = tmp_path / "config.json"
+    touch(path, "{}", 1_000_000_000)
+    cache = ConfigCache(max_bytes=1)
+    cache.put(path, "dirty", 1, pinned=True)
+    cache.put(tmp_path / "other.json", "other", 1)
+    assert path in cache
+    # Несохранённые правки отдаются и после изменения файла на диске
+    touch(path, '{"log": {}}', 2_000_000_000)
+    assert cache.take(path) == "dirty"
+    assert len(cache) == 0 and cache.total_bytes == 0
+
+
+def test_file_key_missing_file(tmp_path):
+    assert file_key(tmp_path / "absent.json") is None
@@ -0,0 +1,75 @@
+import os
+import threading
+
+import pytest
+
+from core.writer import WriteQueue, default_fsync
+
+
+def run_queue(submit, fsync="none"):
+    """Выполняет submit(queue) и ждёт окончания записей; возвращает итоги on_done"""
+    results = []
+    queue = WriteQueue(fsync=fsync, on_done=results.append)
+    try:
+        submit(queue)
+        assert queue.flush(5)
+    finally:
+        queue.close(5)
+    return results
+
+
+def test_writes_to_one_path_coalesce(tmp_path):
+    target = tmp_path / "config.json"
+    release = threading.Event()
+
+    def blocked(data):
+        release.wait(5)
+        return data
+
+    def submit(queue):
+        # Поток занят другим файлом, пока к target ставятся три версии
+        queue.submit(tmp_path / "other.json", b"other", encode=blocked)
+        assert queue.submit(target, b"v1") is False
+        assert queue.submit(target, b"v2") is True
+        assert queue.submit(target, b"v3") is True
+        assert queue.busy(target)
+        release.set()
+
+    results = run_queue(submit)
+    ours = [result for result in results if result.path == target]
+    assert len(ours) == 1
+    assert ours[0].written and ours[0].coalesced == 2 and ours[0].error is None
+    assert target.read_bytes() == b"v3"
+
+
+@pytest.mark.parametrize("policy, expected", [("none", 0), ("file", 1), ("dir", 2)])
+def test_fsync_policy(tmp_path, monkeypatch, policy, expected):
+    calls = []
+    monkeypatch.setattr(os, "fsync", calls.append)
+    results = run_queue(lambda queue: queue.submit(tmp_path / "config.json", b"{}"), policy)
+    assert results[0].written
+    # "file" — только файл, "dir" — файл и каталог после rename
+    assert len(calls) == (expected if os.name == "posix" else min(expected, 1))
+
+
+def test_fsync_policy_validation(monkeypatch):
+    with pytest.raises(ValueError):
+        WriteQueue(fsync="sometimes")
+    monkeypatch.setenv("XRAY_EDITOR_FSYNC", "file")
+    assert default_fsync() == "file" and WriteQueue().fsync == "file"
+    monkeypatch.setenv("XRAY_EDITOR_FSYNC", "bogus")
+    assert default_fsync() == "dir"
+
+
+def test_write_error_reaches_callback(tmp_path):
+    missing = tmp_path / "missing" / "config.json"
+    good = tmp_path / "config.json"
+
+    def submit(queue):
+        queue.submit(missing, b"{}")
+        queue.submit(good, b"{}")
+
+    results = {result.path: result for result in run_queue(submit)}
+    assert results[missing].error and not results[missing].written
+    # Ошибка не останавливает очередь
+    assert results[good].written and results[good].error is None